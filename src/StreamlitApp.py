@@ -1,11 +1,39 @@
+import os
+import sys
+import threading
+
+import streamlit as st
+
+# `streamlit run src/StreamlitApp.py` puts src/ itself on sys.path; the package lives one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import (
+    AnswerFormatter,
+    EmbeddingGenerator,
+    PDFLoader,
+    QueryService,
+    RAGPipeline,
+    Retriever,
+    VectorIndexFAISS,
+)
+from src import TextChunker as SectionAwareChunker
+
+
 @st.cache_resource(show_spinner=True)
 def load_pipeline():
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DATA_DIR = os.path.join(BASE_DIR, "data")
+    CACHE_DIR = os.path.join(BASE_DIR, ".embedding_cache")
+    STORE_DIR = os.path.join(BASE_DIR, ".faiss_store")
+
+    # an index prebuilt with `python -m src build` is served as-is: no PDF loading, no re-embedding;
+    # the index is memory-mapped, so every Streamlit process over the same store shares its pages
+    if os.environ.get("RAG_STORE_DIR"):
+        return RAGPipeline.from_store(os.environ["RAG_STORE_DIR"], top_k=5)
 
-    loader = PDFLoader()
-    chunker = SectionAwareChunker()
-    embedder = EmbeddingGenerator()
+    loader = PDFLoader(workers=os.cpu_count())
+    embedder = EmbeddingGenerator(cache_dir=CACHE_DIR)
+    chunker = SectionAwareChunker.for_embedder(embedder)
     vindex = VectorIndexFAISS()
     retriever = Retriever(
         embedding_model=embedder.model,
@@ -25,29 +53,31 @@ def load_pipeline():
         verbose=False
     )
 
-    # --- load PDFs (local) ---
-    loader.file_names = [
-        os.path.join(DATA_DIR, "DAPO.pdf"),
-        os.path.join(DATA_DIR, "RLAC.pdf"),
-        os.path.join(DATA_DIR, "RLVE.pdf")
-    ]
+    # --- load PDFs (local), re-processing only new or changed files ---
+    pipeline.incremental_build(STORE_DIR, file_names=loader.set_files(DATA_DIR))
 
-    loader.load_documents()
+    return pipeline
 
-    # <<< IMPORTANT FIX
-    pipeline.docs_loaded = True
 
-    pipeline.make_chunks()
-    pipeline.embed()
-    pipeline.build_faiss()
+@st.cache_resource
+def pipeline_lock():
+    # sessions run on separate threads; an index hot-swap must not interleave with a query
+    return threading.Lock()
 
-    return pipeline
+# with RAG_SERVICE_URL set, the app is a thin client of a running QueryService
+SERVICE_URL = os.environ.get("RAG_SERVICE_URL")
 
 st.title("📘 RAG Chatbot for RL in LLM Research")
-pipeline = load_pipeline()
+pipeline = None if SERVICE_URL else load_pipeline()
 
 query = st.text_input("Enter your question:")
 
 if st.button("Search"):
-    results = pipeline.ask(query, top_k=5, pretty=True)
+    if SERVICE_URL:
+        results = QueryService.query_remote(SERVICE_URL, query, top_k=5, pretty=True)
+    else:
+        with pipeline_lock():
+            # a store built with `python -m src build --versioned` is re-attached when a new version is published
+            pipeline.refresh_index()
+            results = pipeline.ask(query, top_k=5, pretty=True)
     st.markdown(results)
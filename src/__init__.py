@@ -0,0 +1,51 @@
+"""RAG pipeline over research PDFs.
+
+Classes are imported on first access (``from src import RAGPipeline``), so importing the package is
+cheap and pulls in faiss / torch / pypdf only when a class that needs them is used. Modules are named
+in snake_case (``src.rag_pipeline``), so a loaded submodule never shadows the class exported under
+the package.
+"""
+import importlib
+
+_EXPORTS = {
+    "AnswerFormatter": "answer_formatter",
+    "BM25Index": "bm25_index",
+    "Benchmark": "benchmark",
+    "ChunkDeduplicator": "chunk_deduplicator",
+    "ChunkMeta": "chunk_meta_store",
+    "ChunkMetaStore": "chunk_meta_store",
+    "ChunkTextStore": "chunk_text_store",
+    "CorpusManifest": "corpus_manifest",
+    "EmbeddingBackend": "embedding_backend",
+    "EmbeddingCache": "embedding_cache",
+    "EmbeddingGenerator": "embedding_generator",
+    "LogExporter": "instrumentation",
+    "LRUCache": "lru_cache",
+    "METRICS": "instrumentation",
+    "Metrics": "instrumentation",
+    "OnnxSentenceEncoder": "onnx_sentence_encoder",
+    "PDFLoader": "pdf_loader",
+    "PrometheusTextExporter": "instrumentation",
+    "QueryService": "query_service",
+    "RAGPipeline": "rag_pipeline",
+    "Retriever": "retriever",
+    "ShardedVectorIndex": "sharded_vector_index",
+    "TextChunker": "text_chunker",
+    "VectorIndexFAISS": "vector_index_faiss",
+    "VersionedStore": "versioned_store",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
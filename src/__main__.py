@@ -0,0 +1,265 @@
+"""Headless entry point: build an index once, then query, bulk-answer or serve from the saved store.
+
+    python -m src build data_sample/ --store .faiss_store
+    python -m src query "How is the reward computed?" --store .faiss_store
+    python -m src bulk queries.jsonl answers.jsonl --store .faiss_store
+    python -m src serve --store .faiss_store --port 8000
+    python -m src build data_sample/ --store .rag_store --versioned   # publish immutable versions
+    python -m src serve --store .rag_store --processes 4              # workers share the mmapped index
+    python -m src bench --out bench.json --baseline bench_main.json
+"""
+import argparse
+import contextlib
+import json
+import sys
+
+from . import (
+    METRICS,
+    AnswerFormatter,
+    Benchmark,
+    ChunkDeduplicator,
+    EmbeddingGenerator,
+    LogExporter,
+    PDFLoader,
+    PrometheusTextExporter,
+    QueryService,
+    RAGPipeline,
+    Retriever,
+    ShardedVectorIndex,
+    TextChunker,
+    VectorIndexFAISS,
+    VersionedStore,
+)
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def metrics_config(args):
+    """METRICS.configure() arguments for the command line flags, or None when metrics stay off."""
+    exporters = []
+    if args.metrics_log:
+        exporters.append(LogExporter())
+    if args.metrics_file:
+        exporters.append(PrometheusTextExporter(args.metrics_file))
+    if exporters or args.slow_query_ms is not None:
+        return dict(enabled=True, exporters=exporters, slow_query_ms=args.slow_query_ms, profile_dir=args.profile_dir)
+    return None
+
+
+def setup_metrics(args):
+    config = metrics_config(args)
+    if config:
+        METRICS.configure(**config)
+
+
+def build(args):
+    loader = PDFLoader(workers=args.workers, verbose=args.verbose)
+    loader.set_files(args.inputs)
+
+    dtype = "float16" if args.float16 else "float32"
+    embedder = EmbeddingGenerator(args.model, batch_size=args.batch_size, cache_dir=args.cache_dir,
+                                  backend=args.backend, dtype=dtype, verbose=args.verbose)
+    chunker = TextChunker.for_embedder(embedder, verbose=args.verbose)
+    index_kw = dict(metric=args.metric, index_type=args.index_type, lexical=not args.no_lexical,
+                    rerank=args.rerank, exact_compaction=args.exact_compaction, vector_dtype=dtype,
+                    verbose=args.verbose)
+    if args.shard_size:
+        vindex = ShardedVectorIndex(shard_size=args.shard_size, **index_kw)
+    else:
+        vindex = VectorIndexFAISS(**index_kw)
+    retriever = Retriever(embedding_model=embedder.model, vector_index=vindex)
+    deduplicator = ChunkDeduplicator(args.dedup_threshold, verbose=args.verbose) if args.dedup_threshold else None
+    pipeline = RAGPipeline(loader, chunker, embedder, vindex, retriever, AnswerFormatter(), verbose=args.verbose,
+                           deduplicator=deduplicator)
+
+    # a versioned store is updated in a staged copy; serving workers switch over when it is published
+    versions = VersionedStore(args.store) if args.versioned or VersionedStore.is_versioned(args.store) else None
+    store_dir = versions.stage() if versions else args.store
+
+    added, changed, removed = pipeline.incremental_build(store_dir, file_names=loader.file_names,
+                                                         streaming=args.streaming)
+    saved_to = args.store
+    if versions and (added or changed or removed or versions.current() is None):
+        saved_to = f"{args.store} (version {versions.publish(store_dir)})"
+    elif versions:
+        versions.discard(store_dir)
+        saved_to = f"{args.store} (unchanged, version {versions.current()})"
+    print(f"[CLI] Index saved to {saved_to}: {vindex.num_live()} live chunks "
+          f"(added={len(added)} changed={len(changed)} removed={len(removed)} files)")
+    METRICS.export()
+
+
+def load_pipeline(args):
+    # model/index loading chatter goes to stderr so stdout stays machine-readable
+    with contextlib.redirect_stdout(sys.stderr):
+        return RAGPipeline.from_store(args.store, model_name=args.model, backend=args.backend, top_k=args.top_k)
+
+
+def query(args):
+    pipeline = load_pipeline(args)
+    answer = pipeline.ask(args.question, top_k=args.top_k, pretty=args.pretty)
+    print(answer if args.pretty else json.dumps(answer, ensure_ascii=False, indent=2))
+    METRICS.export()
+
+
+def read_queries(path):
+    """JSONL with one {"query": ..., "id"?: ...} object (or a bare JSON string) per line."""
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"query": item}
+            if not isinstance(item, dict) or not isinstance(item.get("query"), str):
+                raise Exception(f"{path}:{line_no}: expected a JSON object with a 'query' string")
+            items.append(item)
+    return items
+
+
+def bulk(args):
+    items = read_queries(args.queries)
+    pipeline = load_pipeline(args)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for start in range(0, len(items), args.batch_size):
+            batch = items[start:start + args.batch_size]
+            answers = pipeline.ask_batch([item["query"] for item in batch], top_k=args.top_k)
+            for item, answer in zip(batch, answers):
+                if "id" in item:
+                    answer = {"id": item["id"], **answer}
+                out.write(json.dumps(answer, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"[CLI] Answered {len(items)} queries -> {args.output}", file=sys.stderr)
+    METRICS.export()
+
+
+def serve(args):
+    service_kw = dict(host=args.host, port=args.port, max_batch_size=args.max_batch_size,
+                      max_wait_ms=args.max_wait_ms, default_top_k=args.top_k,
+                      watch_interval_s=args.watch_interval or None)
+    if args.processes > 1:
+        QueryService.run_processes(args.store, args.processes, metrics_kw=metrics_config(args),
+                                   pipeline_kw=dict(model_name=args.model, backend=args.backend, top_k=args.top_k),
+                                   **service_kw)
+        return
+    QueryService(load_pipeline(args), **service_kw).run()
+
+
+def bench(args):
+    embedder = EmbeddingGenerator(args.model, batch_size=args.batch_size, backend=args.backend)
+    vindex = VectorIndexFAISS(index_type=args.index_type)
+    pipeline = RAGPipeline(
+        PDFLoader(workers=args.workers), TextChunker.for_embedder(embedder, verbose=False), embedder, vindex,
+        Retriever(embedding_model=embedder.model, vector_index=vindex), AnswerFormatter(), verbose=False,
+    )
+    benchmark = Benchmark(data_dir=args.data_dir)
+    benchmark.run_suite(pipeline, queries_path=args.queries, out_path=args.out, top_k=args.top_k,
+                        repeats=args.repeats, trace_memory=not args.no_trace_memory)
+    if args.baseline:
+        sys.exit(1 if Benchmark.compare(args.baseline, args.out, tolerance=args.tolerance) else 0)
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog="python -m src", description="Build and query the RAG index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p, model_default=None):
+        p.add_argument("--store", default=".faiss_store", help="index directory (default: .faiss_store)")
+        p.add_argument("--model", default=model_default,
+                       help="embedding model (query commands default to the one recorded at build time)")
+        p.add_argument("--backend", default=None if model_default is None else "torch",
+                       choices=("torch", "torch-int8", "onnx"))
+        p.add_argument("--metrics-log", action="store_true", help="log timers and counters to stderr")
+        p.add_argument("--metrics-file", default=None, help="write metrics in Prometheus text format here")
+        p.add_argument("--slow-query-ms", type=float, default=None, help="cProfile queries slower than this")
+        p.add_argument("--profile-dir", default=None, help="save slow-query profiles here (default: log them)")
+
+    p = sub.add_parser("build", help="chunk, embed and index PDFs; only new or changed files are re-processed")
+    p.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    common(p, model_default=DEFAULT_MODEL)
+    p.add_argument("--workers", type=int, default=None, help="PDF extraction processes")
+    p.add_argument("--batch-size", type=int, default=32)
+    p.add_argument("--cache-dir", default=".embedding_cache")
+    p.add_argument("--metric", default="l2", choices=("l2", "cosine"))
+    p.add_argument("--index-type", default="flat", choices=VectorIndexFAISS.INDEX_TYPES)
+    p.add_argument("--no-lexical", action="store_true", help="skip the BM25 posting lists (dense-only retrieval)")
+    p.add_argument("--rerank", action="store_true",
+                   help="sq8/sqfp16/ivf_pq: keep the raw vectors on disk and re-score the final candidates exactly")
+    p.add_argument("--exact-compaction", action="store_true",
+                   help="sq8/sqfp16/ivf_pq: keep the raw vectors on disk so compaction retrains on them, "
+                        "not on vectors decoded from the codes")
+    p.add_argument("--float16", action="store_true",
+                   help="hold build-time embeddings, the embedding cache and the raw rerank vectors at float16")
+    p.add_argument("--streaming", action="store_true",
+                   help="overlap extraction, chunking, embedding and indexing in bounded-queue stages")
+    p.add_argument("--dedup-threshold", type=float, default=0.8,
+                   help="drop chunks this similar (shingle Jaccard) to an earlier chunk of the same PDF; 0 disables")
+    p.add_argument("--shard-size", type=int, default=0,
+                   help="split the index into shards of this many vectors, searched in parallel (default: one index)")
+    p.add_argument("--versioned", action="store_true",
+                   help="write a new immutable version and publish it atomically (implied once --store is versioned)")
+    p.add_argument("--verbose", action="store_true")
+    p.set_defaults(func=build)
+
+    p = sub.add_parser("query", help="answer one question from a saved index")
+    p.add_argument("question")
+    common(p)
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--pretty", action="store_true")
+    p.set_defaults(func=query)
+
+    p = sub.add_parser("bulk", help="answer a JSONL file of queries, one JSON answer per line")
+    p.add_argument("queries", help="input JSONL")
+    p.add_argument("output", nargs="?", default="-", help="output JSONL (default: stdout)")
+    common(p)
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--batch-size", type=int, default=64)
+    p.set_defaults(func=bulk)
+
+    p = sub.add_parser("serve", help="serve POST /query over HTTP with request micro-batching")
+    common(p)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--max-batch-size", type=int, default=32)
+    p.add_argument("--max-wait-ms", type=float, default=5.0)
+    p.add_argument("--processes", type=int, default=1,
+                   help="query worker processes sharing the port (SO_REUSEPORT) and the memory-mapped index; "
+                        "a worker that has to read the index into RAM says so on stderr")
+    p.add_argument("--watch-interval", type=float, default=2.0,
+                   help="seconds between checks for a newly published store version; 0 disables hot-swapping")
+    p.set_defaults(func=serve)
+
+    p = sub.add_parser("bench", help="time and score a full build plus queries over the sample corpus")
+    p.add_argument("--data-dir", default="data_sample")
+    p.add_argument("--queries", default=None, help="labeled JSONL (default: <data-dir>/queries.jsonl)")
+    p.add_argument("--out", default="bench.json")
+    p.add_argument("--baseline", default=None, help="earlier --out file; exit 1 on regressions")
+    p.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown fraction vs baseline")
+    p.add_argument("--model", default=DEFAULT_MODEL)
+    p.add_argument("--backend", default="torch", choices=("torch", "torch-int8", "onnx"))
+    p.add_argument("--index-type", default="flat", choices=VectorIndexFAISS.INDEX_TYPES)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--batch-size", type=int, default=32)
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--repeats", type=int, default=5)
+    p.add_argument("--no-trace-memory", action="store_true", help="skip tracemalloc (it slows Python-heavy stages)")
+    p.set_defaults(func=bench)
+    return parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    if hasattr(args, "metrics_log"):
+        setup_metrics(args)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,19 @@
+import json
+
+
 class AnswerFormatter:
 
     def __init__(self):
         pass
 
+    def _also_in(self, meta):
+        # citations of duplicate chunks folded into this one by ChunkDeduplicator
+        refs = meta.get("also_in")
+        if isinstance(refs, str):
+            # stores written before also_in was a records field hold it as a JSON string
+            return json.loads(refs)
+        return refs or []
+
     def format_json(self, query, results):
         formatted = {
             "query": query,
@@ -13,13 +24,17 @@ class AnswerFormatter:
         for item in results:
             meta = item["metadata"]
 
-            formatted["answers"].append({
+            answer = {
                 "score": item["final_score"],
                 "source": meta["source"],
                 "section": meta["section"],
                 "chunk_id": meta["chunk_id"],
                 "text": item["chunk"]
-            })
+            }
+            also_in = self._also_in(meta)
+            if also_in:
+                answer["also_in"] = also_in
+            formatted["answers"].append(answer)
 
         return formatted
 
@@ -36,6 +51,8 @@ class AnswerFormatter:
             lines.append(f"     Source : {meta['source']}")
             lines.append(f"     Section: {meta['section']}")
             lines.append(f"     ChunkID: {meta['chunk_id']}")
+            for ref in self._also_in(meta):
+                lines.append(f"     Also in: {ref['source']} (section={ref['section']}, chunk={ref['chunk_id']})")
             lines.append("-" * 100)
             lines.append(item["chunk"][:600] + " ...")
 
@@ -45,6 +62,8 @@ class AnswerFormatter:
         for item in results:
             meta = item["metadata"]
             cited.add(f"{meta['source']} (section={meta['section']}, chunk={meta['chunk_id']})")
+            for ref in self._also_in(meta):
+                cited.add(f"{ref['source']} (section={ref['section']}, chunk={ref['chunk_id']})")
 
         for c in cited:
             lines.append(" - " + c)
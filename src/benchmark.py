@@ -0,0 +1,738 @@
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from .chunk_deduplicator import ChunkDeduplicator
+from .embedding_backend import EmbeddingBackend
+from .pdf_loader import PDFLoader
+from .sharded_vector_index import ShardedVectorIndex
+from .text_chunker import TextChunker
+from .utilities import LazyModule
+from .vector_index_faiss import VectorIndexFAISS
+
+faiss = LazyModule("faiss")
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class Benchmark:
+    """Micro-benchmarks over the sample corpus. Results are collected in self.results."""
+
+    def __init__(self, data_dir="data_sample", verbose=True):
+        self.data_dir = data_dir
+        self.verbose = verbose
+        self.results = {}
+
+    def pdf_files(self):
+        return sorted(glob.glob(os.path.join(self.data_dir, "*.pdf")))
+
+    def _best_of(self, fn, repeats):
+        best = float("inf")
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    def _legacy_extract(self, pdf_path):
+        # the pre-optimization loader: seven regex passes and string concatenation
+        def clean(text):
+            text = text.replace("\u00a0", " ")
+            text = re.sub(r'-\s*\n\s*', '', text)
+            text = re.sub(r'\n+', ' ', text)
+            text = re.sub(r'\[\d+\]', ' ', text)
+            text = re.sub(r'[^\x00-\x7F]+', ' ', text)
+            text = re.sub(r'(?<!\.)\.\.(?!\.)', '.', text)
+            text = re.sub(r'\s+', ' ', text)
+            return text.strip()
+
+        from pypdf import PdfReader
+
+        text = ""
+        for page in PdfReader(pdf_path).pages:
+            text += clean(page.extract_text() or "") + " "
+        return text.strip()
+
+    def pdf_extraction(self, worker_counts=None, repeats=3):
+        files = self.pdf_files()
+        assert files, f"No PDFs found in {self.data_dir}"
+
+        cores = os.cpu_count() or 1
+        if worker_counts is None:
+            worker_counts = sorted({1, 2, 4, cores} | {w for w in (8, 16) if w <= cores})
+
+        legacy = self._best_of(lambda: [self._legacy_extract(f) for f in files], repeats)
+        rows = [{"mode": "legacy", "workers": 1, "seconds": legacy, "speedup": 1.0}]
+
+        loader = PDFLoader()
+        for w in worker_counts:
+            secs = self._best_of(lambda: dict(loader.iter_documents(files, workers=w)), repeats)
+            rows.append({"mode": "pool" if w > 1 else "sequential", "workers": w,
+                         "seconds": secs, "speedup": legacy / secs})
+
+        self.results["pdf_extraction"] = {"files": files, "cpu_count": cores, "rows": rows}
+        if self.verbose:
+            print(f"[Benchmark] PDF extraction over {len(files)} files, cpu_count={cores}")
+            for r in rows:
+                print(f"  {r['mode']:<10} workers={r['workers']:<3} "
+                      f"{r['seconds']:.3f}s  speedup x{r['speedup']:.2f}")
+        return rows
+
+    def sample_embeddings(self, embedder, chunker=None):
+        """Load, chunk and encode data_sample/ once; returns (embeddings, chunk_texts, chunk_meta)."""
+        if getattr(self, "_sample", None) is None:
+            loader = PDFLoader()
+            loader.file_names = self.pdf_files()
+            loader.load_documents()
+            chunker = chunker or TextChunker(verbose=False)
+            chunker.process_documents(loader.get_doc_map())
+            embeddings = embedder.encode_chunks(chunker.get_chunks(), chunker.get_chunk_meta())
+            self._sample = (embeddings, chunker.get_chunks(), chunker.get_chunk_meta())
+        return self._sample
+
+    def ann_indexes(self, embeddings, chunk_texts, chunk_meta, query_embeddings=None,
+                    configs=None, top_k=10, num_queries=200, seed=0):
+        """Recall@k and per-query latency of each index type against the flat baseline."""
+        rng = np.random.default_rng(seed)
+        if query_embeddings is None:
+            # perturbed corpus vectors stand in for queries that land near real chunks
+            picks = rng.choice(len(embeddings), size=min(num_queries, len(embeddings)), replace=False)
+            noise = rng.normal(scale=0.05, size=(len(picks), embeddings.shape[1]))
+            query_embeddings = (embeddings[picks] + noise).astype("float32")
+
+        if configs is None:
+            configs = [
+                {"index_type": "flat"},
+                {"index_type": "ivf_flat", "nprobe": 1},
+                {"index_type": "ivf_flat", "nprobe": 8},
+                {"index_type": "ivf_pq", "nprobe": 8},
+                {"index_type": "hnsw", "ef_search": 16},
+                {"index_type": "hnsw", "ef_search": 64},
+            ]
+
+        flat = VectorIndexFAISS(index_type="flat")
+        flat.build(embeddings, chunk_texts, chunk_meta)
+        _, truth = flat.index.search(query_embeddings, top_k)
+
+        rows = []
+        for cfg in configs:
+            vindex = VectorIndexFAISS(**cfg)
+            t0 = time.perf_counter()
+            vindex.build(embeddings, chunk_texts, chunk_meta)
+            build_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for q in query_embeddings:
+                vindex.index.search(q.reshape(1, -1), top_k)
+            latency_ms = (time.perf_counter() - t0) * 1000 / len(query_embeddings)
+
+            _, found = vindex.index.search(query_embeddings, top_k)
+            recall = np.mean([len(set(f) & set(t)) / top_k for f, t in zip(found, truth)])
+
+            rows.append({
+                "config": cfg,
+                "build_seconds": build_s,
+                "latency_ms": latency_ms,
+                "recall_at_k": float(recall),
+                "index_bytes": int(faiss.serialize_index(vindex.index).nbytes),
+            })
+
+        self.results["ann_indexes"] = {"top_k": top_k, "num_vectors": len(embeddings), "rows": rows}
+        if self.verbose:
+            print(f"[Benchmark] ANN indexes over {len(embeddings)} vectors, recall@{top_k} vs flat")
+            for r in rows:
+                print(f"  {json.dumps(r['config']):<45} recall={r['recall_at_k']:.3f} "
+                      f"latency={r['latency_ms']:.3f}ms build={r['build_seconds']:.2f}s "
+                      f"size={r['index_bytes'] / 1e6:.2f}MB")
+        return rows
+
+    def sharded_search(self, embeddings, chunk_texts, chunk_meta, shard_counts=(1, 2, 4, 8), top_k=10,
+                       num_queries=200, batch_size=32, seed=0):
+        """Batched search latency and recall@k against one flat index when the vectors are split into shards."""
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(len(embeddings), size=min(num_queries, len(embeddings)), replace=False)
+        noise = rng.normal(scale=0.05, size=(len(picks), embeddings.shape[1]))
+        queries = (embeddings[picks] + noise).astype("float32")
+
+        flat = VectorIndexFAISS(index_type="flat", verbose=False)
+        flat.build(embeddings, chunk_texts, chunk_meta)
+        _, truth = flat.search_ids(queries, top_k)
+
+        rows = []
+        for count in shard_counts:
+            vindex = ShardedVectorIndex(shard_size=-(-len(embeddings) // count), verbose=False)
+            vindex.build(embeddings, chunk_texts, chunk_meta)
+
+            found = []
+            t0 = time.perf_counter()
+            for start in range(0, len(queries), batch_size):
+                found.append(vindex.search_ids(queries[start:start + batch_size], top_k)[1])
+            elapsed = time.perf_counter() - t0
+            found = np.vstack(found)
+            recall = np.mean([len(set(f) & set(t)) / top_k for f, t in zip(found, truth)])
+            rows.append({
+                "shards": len(vindex.shards),
+                "batch_latency_ms": elapsed * 1000 / -(-len(queries) // batch_size),
+                "recall_at_k": float(recall),
+            })
+
+        self.results["sharded_search"] = {"top_k": top_k, "num_vectors": len(embeddings),
+                                          "cpu_count": os.cpu_count() or 1, "rows": rows}
+        if self.verbose:
+            print(f"[Benchmark] Sharded search over {len(embeddings)} vectors, batches of {batch_size}, "
+                  f"cpu_count={os.cpu_count() or 1}")
+            for r in rows:
+                print(f"  shards={r['shards']:<3} batch={r['batch_latency_ms']:.3f}ms recall={r['recall_at_k']:.3f}")
+        return rows
+
+    def vector_compression(self, embeddings, chunk_texts, chunk_meta, query_embeddings=None, configs=None,
+                           top_k=10, num_queries=200, repeats=3, seed=0):
+        """Memory footprint, search latency and recall@k of reduced-precision indexes against float32 flat."""
+        rng = np.random.default_rng(seed)
+        if query_embeddings is None:
+            picks = rng.choice(len(embeddings), size=min(num_queries, len(embeddings)), replace=False)
+            noise = rng.normal(scale=0.05, size=(len(picks), embeddings.shape[1]))
+            query_embeddings = (embeddings[picks] + noise).astype("float32")
+
+        if configs is None:
+            configs = [
+                {"index_type": "flat"},
+                {"index_type": "sqfp16"},
+                {"index_type": "sq8"},
+                {"index_type": "sq8", "rerank": True},
+                {"index_type": "sq8", "rerank": True, "vector_dtype": "float16"},
+                {"index_type": "ivf_pq", "nprobe": 8},
+                {"index_type": "ivf_pq", "nprobe": 8, "rerank": True, "vector_dtype": "float16"},
+            ]
+
+        flat = VectorIndexFAISS(index_type="flat", lexical=False, verbose=False)
+        flat.build(embeddings, chunk_texts, chunk_meta)
+        _, truth = flat.search_ids(query_embeddings, top_k)
+
+        rows = []
+        for cfg in configs:
+            vindex = VectorIndexFAISS(lexical=False, verbose=False, **cfg)
+            vindex.build(embeddings, chunk_texts, chunk_meta)
+
+            def run():
+                for q in query_embeddings:
+                    vindex.search_ids(q.reshape(1, -1), top_k)
+            latency_ms = self._best_of(run, repeats) * 1000 / len(query_embeddings)
+            _, found = vindex.search_ids(query_embeddings, top_k)
+            recall = np.mean([len(set(f) & set(t)) / top_k for f, t in zip(found, truth)])
+
+            # raw vectors of a rerank index are memory-mapped after load: disk, and RAM only for touched rows
+            index_bytes = int(faiss.serialize_index(vindex.index).nbytes)
+            raw_bytes = int(vindex._vectors.nbytes) if vindex._vectors is not None else 0
+            rows.append({
+                "config": cfg,
+                "index_bytes": index_bytes,
+                "raw_vector_bytes": raw_bytes,
+                "bytes_per_vector": (index_bytes + raw_bytes) / len(embeddings),
+                "latency_ms": latency_ms,
+                "recall_at_k": float(recall),
+            })
+
+        self.results["vector_compression"] = {"top_k": top_k, "num_vectors": len(embeddings),
+                                              "dimension": int(embeddings.shape[1]), "rows": rows}
+        if self.verbose:
+            print(f"[Benchmark] Vector compression over {len(embeddings)} vectors, recall@{top_k} vs float32 flat")
+            for r in rows:
+                print(f"  {json.dumps(r['config']):<82} recall={r['recall_at_k']:.3f} "
+                      f"latency={r['latency_ms']:.3f}ms index={r['index_bytes'] / 1e6:.2f}MB "
+                      f"raw={r['raw_vector_bytes'] / 1e6:.2f}MB ({r['bytes_per_vector']:.0f}B/vector)")
+        return rows
+
+    def _legacy_encode(self, model, chunk_texts, batch_size=32):
+        # the pre-optimization loop: document order, fixed batches, vstack at the end
+        all_embeddings = []
+        for start in range(0, len(chunk_texts), batch_size):
+            all_embeddings.append(model.encode(chunk_texts[start:start + batch_size], convert_to_numpy=True))
+        return np.vstack(all_embeddings).astype("float32")
+
+    def embedding_throughput(self, embedder, chunk_texts, chunk_meta, configs=None, repeats=1):
+        """Chunks/sec of the legacy encode loop versus EmbeddingGenerator engine settings."""
+        if configs is None:
+            cores = os.cpu_count() or 1
+            configs = [
+                {"batch_size": 32},
+                {"batch_size": 64, "max_batch_tokens": 8192},
+                {"batch_size": 64, "max_batch_tokens": 8192, "num_workers": cores},
+            ]
+
+        saved = (embedder.batch_size, embedder.max_batch_tokens, embedder.num_workers, embedder.cache)
+        embedder.cache = None
+        n = len(chunk_texts)
+
+        legacy = self._best_of(lambda: self._legacy_encode(embedder.model, chunk_texts), repeats)
+        rows = [{"config": "legacy", "seconds": legacy, "chunks_per_sec": n / legacy, "speedup": 1.0}]
+
+        try:
+            for cfg in configs:
+                embedder.batch_size = cfg.get("batch_size", 32)
+                embedder.max_batch_tokens = cfg.get("max_batch_tokens")
+                if cfg.get("num_workers", 1) != embedder.num_workers:
+                    embedder.close()
+                    embedder.num_workers = cfg.get("num_workers", 1)
+                    if embedder.num_workers > 1:
+                        embedder._get_pool()  # pool start-up is not part of the throughput
+                secs = self._best_of(lambda: embedder.encode_chunks(chunk_texts, chunk_meta), repeats)
+                rows.append({"config": cfg, "seconds": secs, "chunks_per_sec": n / secs, "speedup": legacy / secs})
+        finally:
+            embedder.close()
+            embedder.batch_size, embedder.max_batch_tokens, embedder.num_workers, embedder.cache = saved
+
+        self.results["embedding_throughput"] = {"num_chunks": n, "rows": rows}
+        if self.verbose:
+            print(f"[Benchmark] Embedding throughput over {n} chunks")
+            for r in rows:
+                print(f"  {json.dumps(r['config']):<70} {r['chunks_per_sec']:8.1f} chunks/sec  x{r['speedup']:.2f}")
+        return rows
+
+    def chunk_dedup(self, embedder, chunker=None, thresholds=(1.0, 0.9, 0.8, 0.7), repeats=1):
+        """Chunks dropped and embedding seconds saved by ChunkDeduplicator at each threshold (cache off)."""
+        loader = PDFLoader(verbose=False)
+        loader.file_names = self.pdf_files()
+        loader.load_documents()
+        chunker = chunker or TextChunker.for_embedder(embedder, verbose=False)
+        chunker.process_documents(loader.get_doc_map())
+        chunks, meta = chunker.get_chunks(), chunker.get_chunk_meta()
+
+        saved_cache, embedder.cache = embedder.cache, None
+        try:
+            full_s = self._best_of(lambda: embedder.encode_chunks(chunks, meta), repeats)
+            rows = []
+            for threshold in thresholds:
+                dedup = ChunkDeduplicator(threshold=threshold, verbose=False)
+                t0 = time.perf_counter()
+                kept, kept_meta = dedup.dedup(chunks, meta)
+                dedup_s = time.perf_counter() - t0
+                secs = self._best_of(lambda: embedder.encode_chunks(kept, kept_meta), repeats)
+                rows.append(dict(dedup.stats, threshold=threshold, dedup_seconds=dedup_s, embed_seconds=secs,
+                                 embed_seconds_saved=full_s - secs))
+        finally:
+            embedder.cache = saved_cache
+
+        self.results["chunk_dedup"] = {"num_chunks": len(chunks), "embed_seconds": full_s, "rows": rows}
+        if self.verbose:
+            print(f"[Benchmark] Chunk dedup over {len(chunks)} chunks (embedding all of them: {full_s:.2f}s)")
+            for r in rows:
+                print(f"  threshold={r['threshold']:<4} kept={r['chunks_out']:<5} exact={r['exact_duplicates']:<4} "
+                      f"near={r['near_duplicates']:<4} dedup={r['dedup_seconds'] * 1000:.1f}ms "
+                      f"embed={r['embed_seconds']:.2f}s saved={r['embed_seconds_saved']:.2f}s")
+        return rows
+
+    SAMPLE_QUERIES = [
+        "What is the main contribution of the paper?",
+        "How is the reward computed during reinforcement learning?",
+        "Which datasets are used for evaluation?",
+        "What are the limitations of the proposed method?",
+        "How does the method compare to the baselines?",
+        "What training hyperparameters are reported?",
+        "How is the policy optimized?",
+        "What is the role of verification in the environment?",
+    ]
+
+    def embedding_backends(self, chunk_texts, model_name="sentence-transformers/all-MiniLM-L6-v2",
+                           backends=None, queries=None, top_k=5, use_auth_token=None, onnx_dir=None):
+        """Load time, query latency, cosine agreement and top-k overlap of each backend vs full-precision torch."""
+        backends = list(backends or EmbeddingBackend.NAMES)
+        queries = queries or self.SAMPLE_QUERIES
+
+        outputs = {}
+        rows = []
+        for name in backends:
+            t0 = time.perf_counter()
+            model = EmbeddingBackend.load(name, model_name, use_auth_token=use_auth_token, onnx_dir=onnx_dir)
+            load_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            chunk_vecs = np.asarray(model.encode(list(chunk_texts), batch_size=32, convert_to_numpy=True),
+                                    dtype="float32")
+            encode_s = time.perf_counter() - t0
+
+            model.encode([queries[0]], convert_to_numpy=True)  # warm-up
+            latencies = []
+            for q in queries:
+                t0 = time.perf_counter()
+                model.encode([q], convert_to_numpy=True)
+                latencies.append((time.perf_counter() - t0) * 1000)
+            query_vecs = np.asarray(model.encode(queries, convert_to_numpy=True), dtype="float32")
+
+            outputs[name] = (chunk_vecs, query_vecs)
+            rows.append({
+                "backend": name,
+                "load_seconds": load_s,
+                "chunks_per_sec": len(chunk_texts) / encode_s if encode_s > 0 else 0.0,
+                "query_latency_ms_p50": float(np.percentile(latencies, 50)),
+                "query_latency_ms_p95": float(np.percentile(latencies, 95)),
+            })
+
+        def unit(x):
+            return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+        def top_ids(chunk_vecs, query_vecs):
+            return np.argsort(-(unit(query_vecs) @ unit(chunk_vecs).T), axis=1, kind="stable")[:, :top_k]
+
+        ref_chunks, ref_queries = outputs[backends[0]]
+        ref_top = top_ids(ref_chunks, ref_queries)
+        for row in rows:
+            chunk_vecs, query_vecs = outputs[row["backend"]]
+            cosine = np.sum(unit(chunk_vecs) * unit(ref_chunks), axis=1)
+            found = top_ids(chunk_vecs, query_vecs)
+            row["cosine_vs_reference_mean"] = float(cosine.mean())
+            row["cosine_vs_reference_min"] = float(cosine.min())
+            row["top_k_overlap"] = float(np.mean([len(set(f) & set(t)) / top_k for f, t in zip(found, ref_top)]))
+
+        self.results["embedding_backends"] = {
+            "model_name": model_name, "reference": backends[0], "num_chunks": len(chunk_texts),
+            "num_queries": len(queries), "top_k": top_k, "rows": rows,
+        }
+        if self.verbose:
+            print(f"[Benchmark] Embedding backends vs {backends[0]} ({len(chunk_texts)} chunks, {len(queries)} queries)")
+            for r in rows:
+                print(f"  {r['backend']:<11} load={r['load_seconds']:.2f}s {r['chunks_per_sec']:8.1f} chunks/sec "
+                      f"query p50={r['query_latency_ms_p50']:.2f}ms p95={r['query_latency_ms_p95']:.2f}ms "
+                      f"cos={r['cosine_vs_reference_mean']:.4f} (min {r['cosine_vs_reference_min']:.4f}) "
+                      f"overlap@{top_k}={r['top_k_overlap']:.3f}")
+        return rows
+
+    _COLD_START_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import src
+t_import = time.perf_counter()
+preloaded = [m for m in ("faiss", "torch", "sentence_transformers", "pypdf", "nltk", "google.colab") if m in sys.modules]
+
+from src import EmbeddingGenerator, VectorIndexFAISS
+store_dir, model_name, backend, query = sys.argv[1:5]
+vindex = VectorIndexFAISS()
+vindex.load(store_dir)
+t_index = time.perf_counter()
+embedder = EmbeddingGenerator(model_name, backend=backend)
+t_model = time.perf_counter()
+vindex.search(embedder.model.encode([query], convert_to_numpy=True), top_k=5)
+t_query = time.perf_counter()
+
+print("COLD_START " + json.dumps({
+    "import_seconds": t_import - t0, "index_load_seconds": t_index - t_import,
+    "model_load_seconds": t_model - t_index, "first_query_seconds": t_query - t_model,
+    "heavy_modules_after_import": preloaded,
+}))
+"""
+
+    def cold_start(self, store_dir, model_name="sentence-transformers/all-MiniLM-L6-v2", backend="torch",
+                   query="What is the main contribution of the paper?", repeats=3):
+        """Startup of a fresh query-only process: import src, load the saved index, load the model, answer one query."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        store_dir = os.path.abspath(store_dir)
+        env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+
+        runs = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-c", self._COLD_START_SCRIPT, store_dir, model_name, backend, query],
+                cwd=root, env=env, capture_output=True, text=True,
+            )
+            wall = time.perf_counter() - t0
+            if proc.returncode != 0:
+                raise Exception(f"cold-start worker failed:\n{proc.stderr[-2000:]}")
+            line = [l for l in proc.stdout.splitlines() if l.startswith("COLD_START ")][-1]
+            run = json.loads(line[len("COLD_START "):])
+            run["wall_seconds"] = wall
+            runs.append(run)
+
+        best = min(runs, key=lambda r: r["wall_seconds"])
+        self.results["cold_start"] = {"store_dir": store_dir, "model_name": model_name, "backend": backend,
+                                      "best": best, "runs": runs}
+        if self.verbose:
+            print(f"[Benchmark] Cold start ({backend}), best of {repeats}: wall={best['wall_seconds']:.2f}s "
+                  f"import={best['import_seconds'] * 1000:.1f}ms index={best['index_load_seconds']:.2f}s "
+                  f"model={best['model_load_seconds']:.2f}s first_query={best['first_query_seconds']:.3f}s "
+                  f"heavy modules after import: {best['heavy_modules_after_import'] or 'none'}")
+        return best
+
+    # --- end-to-end pipeline suite --------------------------------------
+    def load_queries(self, path=None):
+        """Labeled queries: {"query", "source": expected PDF file name, "keywords": any of which marks a relevant chunk}."""
+        path = path or os.path.join(self.data_dir, "queries.jsonl")
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    @staticmethod
+    def _rss_peak_mb():
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, KiB elsewhere
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+    def _measure(self, fn, trace_memory=True):
+        if trace_memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        try:
+            fn()
+        finally:
+            secs = time.perf_counter() - t0
+            py_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+            if trace_memory:
+                tracemalloc.stop()
+        return {
+            "seconds": secs,
+            "py_peak_mb": py_peak / 1e6 if py_peak is not None else None,
+            "rss_peak_mb": self._rss_peak_mb(),
+        }
+
+    def pipeline_stages(self, pipeline, file_names=None, trace_memory=True):
+        """Wall time and peak memory of load / chunk / embed / index build on a fresh RAGPipeline.
+
+        py_peak_mb is the tracemalloc peak of the stage (Python and numpy allocations; tracing slows
+        pure-Python stages). rss_peak_mb is the process high-water mark after the stage.
+        """
+        stages = [
+            ("load", lambda: pipeline.load_pdfs(file_names or self.pdf_files())),
+            ("chunk", pipeline.make_chunks),
+            ("embed", pipeline.embed),
+            ("index", pipeline.build_faiss),
+        ]
+        rows = [{"stage": name, **self._measure(fn, trace_memory)} for name, fn in stages]
+
+        self.results["pipeline_stages"] = {
+            "num_documents": len(pipeline.loader.get_doc_map()),
+            # the chunker hands its chunks over to the index once it is built
+            "num_chunks": pipeline.index.num_live(),
+            "embedding_cache": pipeline.embedder.cache is not None,
+            "rows": rows,
+        }
+        if self.verbose:
+            info = self.results["pipeline_stages"]
+            print(f"[Benchmark] Pipeline stages ({info['num_documents']} docs, {info['num_chunks']} chunks)")
+            for r in rows:
+                py = f"{r['py_peak_mb']:.1f}MB" if r["py_peak_mb"] is not None else "-"
+                rss = f"{r['rss_peak_mb']:.0f}MB" if r["rss_peak_mb"] is not None else "-"
+                print(f"  {r['stage']:<6} {r['seconds']:8.3f}s  py_peak={py:<9} rss_peak={rss}")
+        return rows
+
+    def streaming_build(self, make_pipeline, file_names=None, trace_memory=True, **stream_kw):
+        """Wall time and peak memory of the phased build versus stream_build, each on a fresh make_pipeline().
+
+        Compare py_peak_mb: rss_peak_mb is the process high-water mark, so the second run inherits the first's.
+        """
+        files = file_names or self.pdf_files()
+
+        def phased_build(pipeline):
+            pipeline.load_pdfs(files)
+            pipeline.make_chunks()
+            pipeline.embed()
+            pipeline.build_faiss()
+
+        rows = []
+        for mode in ("phased", "streaming"):
+            pipeline = make_pipeline()
+            if mode == "phased":
+                run = self._measure(lambda: phased_build(pipeline), trace_memory)
+            else:
+                run = self._measure(lambda: pipeline.stream_build(files, **stream_kw), trace_memory)
+            rows.append({"mode": mode, "vectors": pipeline.index.ntotal, **run})
+
+        self.results["streaming_build"] = {"num_documents": len(files), "rows": rows}
+        if self.verbose:
+            print(f"[Benchmark] Phased vs streaming build ({len(files)} docs)")
+            for r in rows:
+                py = f"{r['py_peak_mb']:.1f}MB" if r["py_peak_mb"] is not None else "-"
+                print(f"  {r['mode']:<9} {r['seconds']:8.3f}s  vectors={r['vectors']:<6} py_peak={py}")
+        return rows
+
+    @staticmethod
+    def _latency_summary(latencies_ms, num_queries, total_s):
+        lat = np.asarray(latencies_ms)
+        return {
+            "p50_ms": float(np.percentile(lat, 50)),
+            "p95_ms": float(np.percentile(lat, 95)),
+            "p99_ms": float(np.percentile(lat, 99)),
+            "qps": num_queries / total_s if total_s > 0 else 0.0,
+        }
+
+    def query_latency(self, pipeline, queries, top_k=5, batch_sizes=(8, 32), repeats=5, cached=False):
+        """Per-call latency percentiles and QPS for single queries and for ask_batch at each batch size.
+
+        With cached=False the retriever's query/result caches are bypassed so every call encodes and searches.
+        """
+        retriever = pipeline.retriever
+        saved = (retriever.embedding_cache, retriever.result_cache)
+        if not cached:
+            retriever.embedding_cache = retriever.result_cache = None
+
+        workload = list(queries) * repeats
+        rows = []
+        try:
+            pipeline.ask_batch(list(queries)[:2], top_k=top_k)  # warm-up
+
+            latencies = []
+            t_start = time.perf_counter()
+            for q in workload:
+                t0 = time.perf_counter()
+                pipeline.ask(q, top_k=top_k)
+                latencies.append((time.perf_counter() - t0) * 1000)
+            total = time.perf_counter() - t_start
+            rows.append({"mode": "single", "batch_size": 1, **self._latency_summary(latencies, len(workload), total)})
+
+            for b in batch_sizes:
+                latencies = []
+                t_start = time.perf_counter()
+                for start in range(0, len(workload), b):
+                    t0 = time.perf_counter()
+                    pipeline.ask_batch(workload[start:start + b], top_k=top_k)
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                total = time.perf_counter() - t_start
+                rows.append({"mode": "batch", "batch_size": b, **self._latency_summary(latencies, len(workload), total)})
+        finally:
+            retriever.embedding_cache, retriever.result_cache = saved
+
+        self.results["query_latency"] = {"num_queries": len(workload), "top_k": top_k, "cached": cached, "rows": rows}
+        if self.verbose:
+            print(f"[Benchmark] Query latency over {len(workload)} queries (top_k={top_k}, cached={cached}); "
+                  f"batch rows are per-batch latency")
+            for r in rows:
+                print(f"  {r['mode']:<6} b={r['batch_size']:<3} p50={r['p50_ms']:.2f}ms p95={r['p95_ms']:.2f}ms "
+                      f"p99={r['p99_ms']:.2f}ms  {r['qps']:.1f} QPS")
+        return rows
+
+    @staticmethod
+    def _is_relevant(result, label):
+        meta = result["metadata"]
+        if os.path.basename(meta["source"]) != label["source"]:
+            return False
+        text = result["chunk"].lower()
+        return any(kw.lower() in text for kw in label.get("keywords", [])) or not label.get("keywords")
+
+    def retrieval_quality(self, pipeline, labeled, ks=(1, 3, 5, 10)):
+        """recall@k (a relevant chunk within the top k) and MRR against the labeled query set."""
+        max_k = max(ks)
+        results = pipeline.retriever.search_batch([item["query"] for item in labeled], top_k=max_k)
+
+        per_query = []
+        for label, hits in zip(labeled, results):
+            rank = next((i + 1 for i, r in enumerate(hits) if self._is_relevant(r, label)), None)
+            top_source = os.path.basename(hits[0]["metadata"]["source"]) if hits else None
+            per_query.append({"query": label["query"], "first_relevant_rank": rank,
+                              "top_source_correct": top_source == label["source"]})
+
+        ranks = [q["first_relevant_rank"] for q in per_query]
+        summary = {f"recall@{k}": float(np.mean([r is not None and r <= k for r in ranks])) for k in ks}
+        summary[f"mrr@{max_k}"] = float(np.mean([1.0 / r if r else 0.0 for r in ranks]))
+        summary["source_accuracy@1"] = float(np.mean([q["top_source_correct"] for q in per_query]))
+
+        self.results["retrieval_quality"] = {"num_queries": len(labeled), **summary, "per_query": per_query}
+        if self.verbose:
+            print(f"[Benchmark] Retrieval quality over {len(labeled)} labeled queries: "
+                  + "  ".join(f"{k}={v:.3f}" for k, v in summary.items()))
+        return summary
+
+    def hybrid_retrieval(self, pipeline, labeled, configs=None, top_k=5):
+        """Retrieval quality and per-query latency of dense-only vs BM25+dense fusion at several candidate pool sizes."""
+        if configs is None:
+            configs = [
+                {"hybrid": False, "candidate_factor": 3},
+                {"hybrid": True, "candidate_factor": 1},
+                {"hybrid": True, "candidate_factor": 2},
+                {"hybrid": True, "candidate_factor": 3},
+            ]
+        retriever = pipeline.retriever
+        saved = (retriever.hybrid, retriever.candidate_factor, retriever.result_cache, retriever.embedding_cache)
+        queries = [item["query"] for item in labeled]
+        verbose, self.verbose = self.verbose, False
+
+        rows = []
+        try:
+            retriever.result_cache = retriever.embedding_cache = None
+            for cfg in configs:
+                retriever.hybrid = cfg["hybrid"]
+                retriever.candidate_factor = cfg["candidate_factor"]
+                quality = self.retrieval_quality(pipeline, labeled, ks=(1, top_k))
+                t0 = time.perf_counter()
+                for q in queries:
+                    retriever.search(q, top_k=top_k)
+                latency_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+                rows.append({"config": cfg, "latency_ms": latency_ms, **quality})
+        finally:
+            self.verbose = verbose
+            retriever.hybrid, retriever.candidate_factor, retriever.result_cache, retriever.embedding_cache = saved
+            self.results.pop("retrieval_quality", None)
+
+        self.results["hybrid_retrieval"] = {"num_queries": len(labeled), "top_k": top_k, "rows": rows}
+        if self.verbose:
+            print(f"[Benchmark] Dense vs hybrid retrieval over {len(labeled)} labeled queries")
+            for r in rows:
+                print(f"  {json.dumps(r['config']):<45} recall@1={r['recall@1']:.3f} recall@{top_k}={r[f'recall@{top_k}']:.3f} "
+                      f"mrr={r[f'mrr@{top_k}']:.3f} latency={r['latency_ms']:.2f}ms")
+        return rows
+
+    def run_suite(self, pipeline, queries_path=None, out_path=None, top_k=5, batch_sizes=(8, 32), repeats=5,
+                  trace_memory=True):
+        """Build an unbuilt RAGPipeline over data_dir stage by stage, then measure query latency and retrieval quality."""
+        labeled = self.load_queries(queries_path)
+        self.results["environment"] = {
+            "python": sys.version.split()[0],
+            "cpu_count": os.cpu_count(),
+            "model_name": pipeline.embedder.model_name,
+            "backend": getattr(pipeline.embedder, "backend", "torch"),
+            "index_type": pipeline.index.index_type,
+        }
+        self.pipeline_stages(pipeline, trace_memory=trace_memory)
+        self.query_latency(pipeline, [item["query"] for item in labeled], top_k=top_k,
+                           batch_sizes=batch_sizes, repeats=repeats)
+        self.retrieval_quality(pipeline, labeled)
+        if out_path:
+            self.save(out_path)
+        return self.results
+
+    @staticmethod
+    def compare(baseline_path, current_path, tolerance=0.10):
+        """Regressions of current vs baseline run: stages/latency more than `tolerance` slower, quality lower."""
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        with open(current_path, "r", encoding="utf-8") as f:
+            cur = json.load(f)
+
+        regressions = []
+        stages = {r["stage"]: r for r in base.get("pipeline_stages", {}).get("rows", [])}
+        for r in cur.get("pipeline_stages", {}).get("rows", []):
+            old = stages.get(r["stage"])
+            if old and r["seconds"] > old["seconds"] * (1 + tolerance):
+                regressions.append(f"stage {r['stage']}: {old['seconds']:.3f}s -> {r['seconds']:.3f}s")
+
+        latency = {(r["mode"], r["batch_size"]): r for r in base.get("query_latency", {}).get("rows", [])}
+        for r in cur.get("query_latency", {}).get("rows", []):
+            old = latency.get((r["mode"], r["batch_size"]))
+            if old and r["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{r['mode']} b={r['batch_size']} p95: {old['p95_ms']:.2f}ms -> {r['p95_ms']:.2f}ms")
+
+        quality = base.get("retrieval_quality", {})
+        for key, value in cur.get("retrieval_quality", {}).items():
+            if isinstance(value, float) and key in quality and value < quality[key] - 1e-9:
+                regressions.append(f"{key}: {quality[key]:.3f} -> {value:.3f}")
+
+        for line in regressions:
+            print(f"[Benchmark] REGRESSION {line}")
+        if not regressions:
+            print("[Benchmark] No regressions against baseline.")
+        return regressions
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.results, f, indent=2)
+        if self.verbose:
+            print(f"[Benchmark] Results saved to {path}")
@@ -0,0 +1,247 @@
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from .utilities import atomic_write
+
+
+class BM25Index:
+    """Okapi BM25 over chunk texts with CSR posting lists (term offsets, int32 doc ids, uint16 term counts)."""
+
+    # keeps "clip-higher", "qwen2.5-32b", "17k" and "3.37" whole; hyphen/dot parts are indexed as well
+    _TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+    STOPWORDS = frozenset(
+        "a an and are as at be by for from has have how in is it its of on or that the this to was "
+        "were what when which who why with does do did can we our their than then there these they".split()
+    )
+    FILES = ("bm25_indptr.npy", "bm25_doc_ids.npy", "bm25_tf.npy", "bm25_doc_len.npy", "bm25_vocab.json")
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.tf = np.zeros(0, dtype=np.uint16)
+        self.doc_len = np.zeros(0, dtype=np.int32)
+        # add() appends (terms, docs, counts, lengths) segments here; the next read merges them in
+        self._pending = []
+        self._pending_docs = 0
+        # queries merge from the retriever's lexical thread while a build may still be adding
+        self._lock = threading.Lock()
+        self._refresh()
+
+    @classmethod
+    def tokenize(cls, text):
+        tokens = []
+        for tok in cls._TOKEN_RE.findall(text.lower()):
+            if tok in cls.STOPWORDS:
+                continue
+            tokens.append(tok)
+            if "-" in tok or "." in tok:
+                tokens.extend(p for p in re.split(r"[.\-]", tok) if p and p not in cls.STOPWORDS)
+        return tokens
+
+    def __len__(self):
+        return len(self.doc_len) + self._pending_docs
+
+    def nbytes(self):
+        self._merge()
+        return self.indptr.nbytes + self.doc_ids.nbytes + self.tf.nbytes + self.doc_len.nbytes
+
+    @staticmethod
+    def idf_of(n, df):
+        return np.log1p((n - df + 0.5) / (df + 0.5))
+
+    def _refresh(self):
+        n = len(self.doc_len)
+        df = np.diff(self.indptr).astype(np.float64)
+        self.idf = self.idf_of(n, df).astype(np.float32)
+        self.total_len = int(np.asarray(self.doc_len, dtype=np.int64).sum())
+        self.avg_len = self.total_len / n if n else 0.0
+
+    def doc_freq(self, term):
+        self._merge()
+        tid = self.vocab.get(term)
+        return 0 if tid is None else int(self.indptr[tid + 1] - self.indptr[tid])
+
+    # --- writes -----------------------------------------------------------
+    def _postings_for(self, texts, first_doc):
+        terms, docs, counts, lengths = [], [], [], []
+        for offset, text in enumerate(texts):
+            tokens = self.tokenize(text)
+            lengths.append(len(tokens))
+            tf = {}
+            for tok in tokens:
+                tid = self.vocab.get(tok)
+                if tid is None:
+                    tid = self.vocab[tok] = len(self.vocab)
+                tf[tid] = tf.get(tid, 0) + 1
+            terms.extend(tf)
+            counts.extend(tf.values())
+            docs.extend([first_doc + offset] * len(tf))
+        return (np.asarray(terms, dtype=np.int64), np.asarray(docs, dtype=np.int32),
+                np.minimum(np.asarray(counts, dtype=np.int64), 65535).astype(np.uint16),
+                np.asarray(lengths, dtype=np.int32))
+
+    def _set_postings(self, terms, docs, counts):
+        order = np.lexsort((docs, terms))
+        self.doc_ids = np.ascontiguousarray(docs[order])
+        self.tf = np.ascontiguousarray(counts[order])
+        self.indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self.vocab)), out=self.indptr[1:])
+        self._refresh()
+
+    def _posting_terms(self):
+        return np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+
+    def add(self, texts):
+        """Index texts as the next doc ids (matching the FAISS ids they are added with).
+
+        Only the new postings are built here; they are merged into the posting lists on the next read,
+        so a build that adds many batches pays one merge instead of a full re-sort per batch.
+        """
+        with self._lock:
+            segment = self._postings_for(texts, len(self))
+            self._pending.append(segment)
+            self._pending_docs += len(segment[3])
+            self.total_len += int(segment[3].sum())
+            self.avg_len = self.total_len / len(self) if len(self) else 0.0
+
+    def _merge(self):
+        """Fold pending add() segments into the CSR arrays: sorts the new postings, moves the old ones once."""
+        if not self._pending:
+            return
+        with self._lock:
+            if self._pending:
+                self._merge_pending()
+
+    def _merge_pending(self):
+        terms, docs, counts, lengths = (np.concatenate(parts) for parts in zip(*self._pending))
+        self._pending = []
+        self._pending_docs = 0
+
+        order = np.lexsort((docs, terms))
+        terms, docs, counts = terms[order], docs[order], counts[order]
+        n_terms = len(self.vocab)
+        old_indptr = np.full(n_terms + 1, self.indptr[-1], dtype=np.int64)
+        old_indptr[:len(self.indptr)] = self.indptr
+        new_start = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=n_terms), out=new_start[1:])
+
+        # new doc ids follow every indexed one, so a term's new postings go right after its old ones:
+        # old posting j of term t moves up by the new postings of terms < t, new posting k (in term
+        # order) lands after all old postings of terms <= t
+        doc_ids = np.empty(old_indptr[-1] + len(terms), dtype=np.int32)
+        tf = np.empty(len(doc_ids), dtype=np.uint16)
+        old_terms = self._posting_terms()
+        old_dest = np.arange(len(old_terms)) + new_start[old_terms]
+        new_dest = np.arange(len(terms)) + old_indptr[terms + 1]
+        doc_ids[old_dest], tf[old_dest] = self.doc_ids, self.tf
+        doc_ids[new_dest], tf[new_dest] = docs, counts
+
+        self.doc_ids, self.tf = doc_ids, tf
+        self.indptr = old_indptr + new_start
+        self.doc_len = np.concatenate([np.asarray(self.doc_len), lengths])
+        self._refresh()
+
+    @classmethod
+    def build(cls, texts, k1=1.2, b=0.75):
+        index = cls(k1=k1, b=b)
+        index.add(texts)
+        return index
+
+    def take(self, keep):
+        """New index over docs `keep` (renumbered 0..len(keep)-1), as after VectorIndexFAISS.compact()."""
+        self._merge()
+        keep = np.asarray(keep, dtype=np.int64)
+        remap = np.full(len(self.doc_len), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+
+        new_docs = remap[self.doc_ids]
+        ok = new_docs >= 0
+        out = BM25Index(k1=self.k1, b=self.b)
+        out.vocab = dict(self.vocab)
+        out.doc_len = np.asarray(self.doc_len)[keep]
+        out._set_postings(self._posting_terms()[ok], new_docs[ok].astype(np.int32), np.asarray(self.tf)[ok])
+        return out
+
+    # --- reads ------------------------------------------------------------
+    def scores(self, query, idf=None, avg_len=None):
+        """BM25 score of every doc for one query string.
+
+        idf (term -> weight) and avg_len override the local statistics, so the shards of one corpus
+        score on the same scale.
+        """
+        self._merge()
+        scores = np.zeros(len(self.doc_len), dtype=np.float32)
+        if not len(scores):
+            return scores
+        avg_len = self.avg_len if avg_len is None else avg_len
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / max(avg_len, 1e-9))
+        for tok in set(self.tokenize(query)):
+            tid = self.vocab.get(tok)
+            if tid is None:
+                continue
+            weight = self.idf[tid] if idf is None else idf[tok]
+            start, end = self.indptr[tid], self.indptr[tid + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.tf[start:end].astype(np.float32)
+            # doc ids are unique within a posting list, so a fancy-index += is safe
+            scores[docs] += weight * tf * (self.k1 + 1) / (tf + norm[docs])
+        return scores
+
+    @staticmethod
+    def top_hits(scores, top_k, allowed_mask=None):
+        """Ids of the best top_k docs with a positive score, best first."""
+        if allowed_mask is not None:
+            scores[~allowed_mask[:len(scores)]] = 0.0
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+        return hits[np.argsort(-scores[hits], kind="stable")]
+
+    def search(self, queries, top_k=10, allowed_mask=None):
+        """(scores, ids) of shape (len(queries), top_k), best first; ids are -1 past the matching docs."""
+        out_s = np.zeros((len(queries), top_k), dtype=np.float32)
+        out_i = np.full((len(queries), top_k), -1, dtype=np.int64)
+        for qi, query in enumerate(queries):
+            scores = self.scores(query)
+            hits = self.top_hits(scores, top_k, allowed_mask)
+            out_s[qi, :len(hits)] = scores[hits]
+            out_i[qi, :len(hits)] = hits
+        return out_s, out_i
+
+    # --- persistence ------------------------------------------------------
+    @classmethod
+    def exists(cls, dirpath):
+        return all(os.path.exists(os.path.join(dirpath, f)) for f in cls.FILES)
+
+    def save(self, dirpath):
+        self._merge()
+        for name, arr in (("indptr", self.indptr), ("doc_ids", self.doc_ids), ("tf", self.tf),
+                          ("doc_len", self.doc_len)):
+            with atomic_write(os.path.join(dirpath, f"bm25_{name}.npy")) as f:
+                np.save(f, arr)
+        terms = [None] * len(self.vocab)
+        for term, tid in self.vocab.items():
+            terms[tid] = term
+        with atomic_write(os.path.join(dirpath, "bm25_vocab.json"), "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "terms": terms}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, dirpath, mmap=True):
+        with open(os.path.join(dirpath, "bm25_vocab.json"), "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        mode = "r" if mmap else None
+        index = cls(k1=spec["k1"], b=spec["b"])
+        index.vocab = {term: i for i, term in enumerate(spec["terms"])}
+        index.indptr = np.load(os.path.join(dirpath, "bm25_indptr.npy"), mmap_mode=mode)
+        index.doc_ids = np.load(os.path.join(dirpath, "bm25_doc_ids.npy"), mmap_mode=mode)
+        index.tf = np.load(os.path.join(dirpath, "bm25_tf.npy"), mmap_mode=mode)
+        index.doc_len = np.load(os.path.join(dirpath, "bm25_doc_len.npy"), mmap_mode=mode)
+        index._refresh()
+        return index
@@ -0,0 +1,139 @@
+import hashlib
+import re
+import time
+import zlib
+
+import numpy as np
+
+from .chunk_meta_store import ChunkMetaStore
+from .instrumentation import METRICS
+
+
+class ChunkDeduplicator:
+    """Drops exact and near-duplicate chunks (MinHash + LSH over word shingles) before embedding.
+
+    The first chunk of each duplicate group is kept; the citations of the dropped ones are stored on it
+    in the "also_in" records field ({source, section, chunk_id} each), so answers can still point at
+    every copy.
+    """
+
+    _WORD_RE = re.compile(r"\w+")
+    _PRIME = (1 << 31) - 1
+
+    def __init__(self, threshold=0.8, num_perm=64, shingle_size=3, per_document=True, seed=0, verbose=True):
+        assert 0 < threshold <= 1, "threshold is a Jaccard similarity in (0, 1]"
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # across documents, dropping a paper's copy would break incremental rebuilds of the other paper
+        self.per_document = per_document
+        self.verbose = verbose
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, self._PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, self._PRIME, size=num_perm, dtype=np.uint64)
+        self.rows_per_band = self._rows_per_band()
+
+        self.duplicate_of = None
+        self.stats = {}
+
+    def _rows_per_band(self):
+        # the LSH S-curve crosses ~(1/bands)^(1/rows); take the strictest banding at or below the
+        # threshold, candidates are then checked against the exact shingle Jaccard
+        best = 1
+        for rows in range(1, self.num_perm + 1):
+            if self.num_perm % rows == 0 and (rows / self.num_perm) ** (1 / rows) <= self.threshold:
+                best = rows
+        return best
+
+    def _shingles(self, words):
+        k = min(self.shingle_size, len(words))
+        if k == 0:
+            return np.zeros(0, dtype=np.uint64)
+        hashes = {zlib.crc32(" ".join(words[i:i + k]).encode("utf-8")) for i in range(len(words) - k + 1)}
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def _signature(self, shingles):
+        # a < 2**31 and crc32 < 2**32, so a * x + b stays inside uint64
+        return ((np.outer(self._a, shingles) + self._b[:, None]) % self._PRIME).min(axis=1)
+
+    @staticmethod
+    def _jaccard(x, y):
+        inter = len(np.intersect1d(x, y, assume_unique=True))
+        return inter / (len(x) + len(y) - inter)
+
+    def find_duplicates(self, chunks, doc_ids=None):
+        """Index of the kept chunk each chunk duplicates, or -1 for kept chunks."""
+        duplicate_of = np.full(len(chunks), -1, dtype=np.int64)
+        exact = {}
+        buckets = {}
+        shingles = {}
+        exact_dups = near_dups = 0
+
+        for i, text in enumerate(chunks):
+            scope = int(doc_ids[i]) if doc_ids is not None else 0
+            words = self._WORD_RE.findall(text.lower())
+
+            # 128-bit digest: a 32-bit checksum collides often enough to silently drop distinct chunks
+            key = (scope, hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=16).digest())
+            if key in exact:
+                duplicate_of[i] = exact[key]
+                exact_dups += 1
+                continue
+
+            x = self._shingles(words)
+            bands = []
+            match = -1
+            if len(x):
+                sig = self._signature(x)
+                for start in range(0, self.num_perm, self.rows_per_band):
+                    band = (scope, start, sig[start:start + self.rows_per_band].tobytes())
+                    bands.append(band)
+                    if match < 0:
+                        for j in buckets.get(band, ()):
+                            if self._jaccard(x, shingles[j]) >= self.threshold:
+                                match = j
+                                break
+            if match >= 0:
+                duplicate_of[i] = match
+                near_dups += 1
+                continue
+
+            exact[key] = i
+            shingles[i] = x
+            for band in bands:
+                buckets.setdefault(band, []).append(i)
+
+        self.stats = {"chunks_in": len(chunks), "exact_duplicates": exact_dups, "near_duplicates": near_dups,
+                      "chunks_out": len(chunks) - exact_dups - near_dups}
+        return duplicate_of
+
+    def dedup(self, chunks, chunk_meta):
+        """(kept chunks, kept metadata with "also_in" back-references); the mapping is left in duplicate_of."""
+        t0 = time.perf_counter()
+        meta = ChunkMetaStore.from_dicts(chunk_meta) if not isinstance(chunk_meta, ChunkMetaStore) else chunk_meta
+        doc_ids = meta.column("doc_id") if self.per_document and "doc_id" in meta.kinds else None
+
+        self.duplicate_of = self.find_duplicates(chunks, doc_ids)
+        keep = np.flatnonzero(self.duplicate_of < 0)
+        out_meta = meta.take(keep)
+
+        refs = {}
+        for i in np.flatnonzero(self.duplicate_of >= 0):
+            refs.setdefault(int(self.duplicate_of[i]), []).append({
+                "source": meta.get_value(i, "source"),
+                "section": meta.get_value(i, "section"),
+                "chunk_id": meta.get_value(i, "chunk_id"),
+            })
+        row_of = {int(k): row for row, k in enumerate(keep)}
+        for k, dropped in refs.items():
+            out_meta.set_value(row_of[k], "also_in", dropped)
+
+        METRICS.observe("build.dedup", (time.perf_counter() - t0) * 1000)
+        METRICS.incr("dedup.exact_duplicates", self.stats["exact_duplicates"])
+        METRICS.incr("dedup.near_duplicates", self.stats["near_duplicates"])
+        if self.verbose:
+            print(f"[Dedup] {self.stats['chunks_in']} chunks → {self.stats['chunks_out']} "
+                  f"(exact={self.stats['exact_duplicates']}, near={self.stats['near_duplicates']}, "
+                  f"threshold={self.threshold})")
+        return [chunks[i] for i in keep], out_meta
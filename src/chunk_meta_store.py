@@ -0,0 +1,282 @@
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+from .utilities import atomic_write
+
+
+class ChunkMeta(Mapping):
+    """Read-only dict view over one row of a ChunkMetaStore."""
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __getitem__(self, key):
+        value = self.store.get_value(self.row, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        for field in self.store.fields:
+            if self.store.get_value(self.row, field) is not None:
+                yield field
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class ChunkMetaStore:
+    """Columnar chunk metadata: int32 columns for numbers, interned int32 codes for strings.
+
+    A list-of-dicts value (e.g. the citations ChunkDeduplicator folds into a kept chunk) becomes a
+    "records" field: the rows' records live in a nested store, the column holds each row's first record
+    and counts[field] how many follow.
+    """
+
+    INT_MISSING = np.iinfo(np.int32).min
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.capacity = capacity
+        self.fields = []
+        self.kinds = {}
+        self.columns = {}
+        self.vocab = {}
+        self._lookup = {}
+        self.records = {}
+        self.counts = {}
+
+    @classmethod
+    def from_dicts(cls, metas):
+        if isinstance(metas, ChunkMetaStore):
+            return metas.take(np.arange(len(metas)))
+        store = cls(capacity=max(len(metas), 1))
+        store.extend(metas)
+        return store
+
+    # --- schema / storage -------------------------------------------------
+    @staticmethod
+    def _kind_of(value):
+        if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+            return "int"
+        return "records" if isinstance(value, (list, tuple)) else "str"
+
+    def _add_field(self, field, kind):
+        fill = self.INT_MISSING if kind == "int" else -1
+        self.fields.append(field)
+        self.kinds[field] = kind
+        self.columns[field] = np.full(self.capacity, fill, dtype=np.int32)
+        if kind == "str":
+            self.vocab[field] = []
+            self._lookup[field] = {}
+        elif kind == "records":
+            self.records[field] = ChunkMetaStore(capacity=16)
+            self.counts[field] = np.zeros(self.capacity, dtype=np.int32)
+
+    def _reserve(self, n):
+        arrays = list(self.columns.values()) + list(self.counts.values())
+        if self.size + n <= self.capacity and all(c.flags.writeable for c in arrays):
+            return
+        new_capacity = max(self.size + n, self.capacity * 2, 16)
+        for field, col in self.columns.items():
+            fill = self.INT_MISSING if self.kinds[field] == "int" else -1
+            grown = np.full(new_capacity, fill, dtype=np.int32)
+            grown[:self.size] = col[:self.size]
+            self.columns[field] = grown
+        for field, counts in self.counts.items():
+            grown = np.zeros(new_capacity, dtype=np.int32)
+            grown[:self.size] = counts[:self.size]
+            self.counts[field] = grown
+        self.capacity = new_capacity
+
+    def intern(self, field, value):
+        lookup = self._lookup[field]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self.vocab[field])
+            self.vocab[field].append(value)
+        return code
+
+    def code_of(self, field, value):
+        """Code of a string value, or -1 if it never occurs."""
+        if self.kinds.get(field) != "str":
+            return -1
+        return self._lookup[field].get(value, -1)
+
+    # --- writes -----------------------------------------------------------
+    def append(self, meta):
+        self.extend([meta])
+
+    def extend(self, metas):
+        if isinstance(metas, ChunkMetaStore):
+            self._extend_store(metas)
+            return
+        metas = list(metas)
+        self._reserve(len(metas))
+        for meta in metas:
+            row = self.size
+            for field, value in meta.items():
+                if value is None:
+                    continue
+                if field not in self.kinds:
+                    self._add_field(field, self._kind_of(value))
+                self._store(row, field, value)
+            self.size += 1
+
+    def _store(self, row, field, value):
+        kind = self.kinds[field]
+        if kind == "int":
+            self.columns[field][row] = value
+        elif kind == "str":
+            self.columns[field][row] = self.intern(field, value)
+        elif value:
+            # records are append-only: rewriting a row leaves its old records unreferenced until take()
+            self.columns[field][row] = len(self.records[field])
+            self.counts[field][row] = len(value)
+            self.records[field].extend(value)
+
+    def set_value(self, row, field, value):
+        assert 0 <= row < self.size, "chunk meta row out of range"
+        if field not in self.kinds:
+            self._add_field(field, self._kind_of(value))
+        self._reserve(0)
+        self._store(row, field, value)
+
+    def _extend_store(self, other):
+        n = len(other)
+        self._reserve(n)
+        for field in other.fields:
+            if field not in self.kinds:
+                self._add_field(field, other.kinds[field])
+            src = np.asarray(other.columns[field][:n])
+            if other.kinds[field] == "int":
+                self.columns[field][self.size:self.size + n] = src
+            elif other.kinds[field] == "records":
+                offset = len(self.records[field])
+                self.records[field].extend(other.records[field])
+                self.columns[field][self.size:self.size + n] = np.where(src >= 0, src + offset, -1)
+                self.counts[field][self.size:self.size + n] = other.counts[field][:n]
+            else:
+                remap = np.array([self.intern(field, v) for v in other.vocab[field]] + [-1], dtype=np.int32)
+                self.columns[field][self.size:self.size + n] = remap[src]
+        self.size += n
+
+    def take(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        out = ChunkMetaStore(capacity=max(len(indices), 1))
+        for field in self.fields:
+            out._add_field(field, self.kinds[field])
+            out.columns[field][:len(indices)] = np.asarray(self.columns[field])[indices]
+            if self.kinds[field] == "str":
+                out.vocab[field] = list(self.vocab[field])
+                out._lookup[field] = dict(self._lookup[field])
+            elif self.kinds[field] == "records":
+                out._take_records(field, self, indices)
+        out.size = len(indices)
+        return out
+
+    def _take_records(self, field, other, indices):
+        """Copy only the records the taken rows reference, renumbered in row order."""
+        starts = np.asarray(other.columns[field])[indices]
+        counts = np.asarray(other.counts[field])[indices]
+        counts = np.where(starts >= 0, counts, 0)
+        ends = np.cumsum(counts)
+        rows = np.repeat(starts - (ends - counts), counts) + np.arange(ends[-1] if len(ends) else 0)
+        self.records[field] = other.records[field].take(rows)
+        self.columns[field][:len(indices)] = np.where(counts > 0, ends - counts, -1)
+        self.counts[field][:len(indices)] = counts
+
+    # --- reads ------------------------------------------------------------
+    def column(self, field):
+        """Int values (or string codes) for every row; INT_MISSING / -1 mark missing values."""
+        if field not in self.columns:
+            fill = self.INT_MISSING if self.kinds.get(field, "int") == "int" else -1
+            return np.full(self.size, fill, dtype=np.int32)
+        return self.columns[field][:self.size]
+
+    def get_value(self, row, field):
+        kind = self.kinds.get(field)
+        if kind is None:
+            return None
+        value = int(self.columns[field][row])
+        if kind == "int":
+            return None if value == self.INT_MISSING else value
+        if value < 0:
+            return None
+        if kind == "records":
+            sub = self.records[field]
+            return [sub[j].to_dict() for j in range(value, value + int(self.counts[field][row]))]
+        return self.vocab[field][value]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.size))]
+        i = int(i)
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError("chunk meta index out of range")
+        return ChunkMeta(self, i)
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield ChunkMeta(self, i)
+
+    def nbytes(self):
+        return (sum(c.nbytes for c in self.columns.values()) + sum(c.nbytes for c in self.counts.values())
+                + sum(sub.nbytes() for sub in self.records.values()))
+
+    # --- persistence ------------------------------------------------------
+    def save(self, dirpath, prefix="meta"):
+        columns = {}
+        for field in self.fields:
+            with atomic_write(os.path.join(dirpath, f"{prefix}_{field}.npy")) as f:
+                np.save(f, self.column(field))
+            columns[field] = {"kind": self.kinds[field]}
+            if self.kinds[field] == "str":
+                columns[field]["vocab"] = self.vocab[field]
+            elif self.kinds[field] == "records":
+                with atomic_write(os.path.join(dirpath, f"{prefix}_{field}.counts.npy")) as f:
+                    np.save(f, self.counts[field][:self.size])
+                self.records[field].save(dirpath, prefix=f"{prefix}_{field}.rec")
+        with atomic_write(os.path.join(dirpath, f"{prefix}_columns.json"), "w", encoding="utf-8") as f:
+            json.dump({"size": self.size, "columns": columns}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, dirpath, mmap=True, prefix="meta"):
+        with open(os.path.join(dirpath, f"{prefix}_columns.json"), "r", encoding="utf-8") as f:
+            spec = json.load(f)
+
+        store = cls(capacity=max(spec["size"], 1))
+        store.size = spec["size"]
+        for field, col in spec["columns"].items():
+            store.fields.append(field)
+            store.kinds[field] = col["kind"]
+            arr = np.load(os.path.join(dirpath, f"{prefix}_{field}.npy"), mmap_mode="r" if mmap else None)
+            # columns saved before the int32 layout were int64
+            store.columns[field] = arr if arr.dtype == np.int32 else arr.astype(np.int32)
+            if col["kind"] == "str":
+                store.vocab[field] = col["vocab"]
+                store._lookup[field] = {v: i for i, v in enumerate(col["vocab"])}
+            elif col["kind"] == "records":
+                store.counts[field] = np.load(os.path.join(dirpath, f"{prefix}_{field}.counts.npy"),
+                                              mmap_mode="r" if mmap else None)
+                store.records[field] = cls.load(dirpath, mmap=mmap, prefix=f"{prefix}_{field}.rec")
+        if store.size == 0:
+            store.capacity = 0
+        return store
@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+
+from .utilities import atomic_write
+
+
+class ChunkTextStore:
+    """Chunk texts stored as one UTF-8 blob plus an offsets array, memory-mapped on load."""
+
+    def __init__(self, blob=b"", offsets=None):
+        self.blob = blob
+        self.offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        # texts appended after load live in memory until the next save
+        self.extra = []
+
+    @staticmethod
+    def save(texts, blob_path, offsets_path):
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        # texts may be a view of the blob being replaced, so it is written beside it and renamed
+        with atomic_write(blob_path) as f:
+            pos = 0
+            for i, text in enumerate(texts):
+                data = text.encode("utf-8")
+                f.write(data)
+                pos += len(data)
+                offsets[i + 1] = pos
+        with atomic_write(offsets_path) as f:
+            np.save(f, offsets)
+
+    @classmethod
+    def load(cls, blob_path, offsets_path, mmap=True):
+        offsets = np.load(offsets_path, mmap_mode="r" if mmap else None)
+        if os.path.getsize(blob_path) == 0:
+            blob = b""
+        elif mmap:
+            blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            with open(blob_path, "rb") as f:
+                blob = f.read()
+        return cls(blob, offsets)
+
+    def _stored(self):
+        return len(self.offsets) - 1
+
+    def __len__(self):
+        return self._stored() + len(self.extra)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if i >= self._stored():
+            return self.extra[i - self._stored()]
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self.blob[start:end]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, text):
+        self.extra.append(text)
+
+    def extend(self, texts):
+        self.extra.extend(texts)
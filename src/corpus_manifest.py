@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+
+
+class CorpusManifest:
+    """Fingerprints of ingested PDFs (size, mtime, sha256) stored next to a saved index."""
+
+    FILENAME = "manifest.json"
+
+    def __init__(self, dirpath):
+        self.dirpath = dirpath
+        self.path = os.path.join(dirpath, self.FILENAME)
+        self.entries = {}
+        self.next_doc_id = 0
+
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.entries = state.get("documents", {})
+            self.next_doc_id = state.get("next_doc_id", 0)
+
+    def _key(self, path):
+        return os.path.abspath(path)
+
+    def _hash_file(self, path, block_size=1 << 20):
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def fingerprint(self, path):
+        st = os.stat(path)
+        old = self.entries.get(self._key(path))
+        if old is not None and old["size"] == st.st_size and old["mtime"] == st.st_mtime:
+            sha = old["sha256"]
+        else:
+            sha = self._hash_file(path)
+        return {"size": st.st_size, "mtime": st.st_mtime, "sha256": sha}
+
+    def diff(self, paths):
+        """Split paths into (added, changed, removed, unchanged) relative to the manifest."""
+        added, changed, unchanged = [], [], []
+        seen = set()
+
+        for path in paths:
+            key = self._key(path)
+            seen.add(key)
+            old = self.entries.get(key)
+            fp = self.fingerprint(path)
+            if old is None:
+                added.append(path)
+            elif old["sha256"] != fp["sha256"]:
+                changed.append(path)
+            else:
+                # content is the same, only refresh size/mtime
+                old.update(fp)
+                unchanged.append(path)
+
+        removed = [key for key in self.entries if key not in seen]
+        return added, changed, removed, unchanged
+
+    def get_ids(self, path):
+        entry = self.entries.get(self._key(path))
+        return list(entry["faiss_ids"]) if entry else []
+
+    def record(self, path, doc_id, faiss_ids):
+        entry = self.fingerprint(path)
+        entry["doc_id"] = doc_id
+        entry["faiss_ids"] = [int(i) for i in faiss_ids]
+        self.entries[self._key(path)] = entry
+        self.next_doc_id = max(self.next_doc_id, doc_id + 1)
+
+    def forget(self, path):
+        self.entries.pop(self._key(path), None)
+
+    def remap_ids(self, remap):
+        """Apply an old->new FAISS id map (as returned by VectorIndexFAISS.compact)."""
+        for entry in self.entries.values():
+            entry["faiss_ids"] = [int(remap[i]) for i in entry["faiss_ids"] if remap[i] >= 0]
+
+    def save(self):
+        os.makedirs(self.dirpath, exist_ok=True)
+        state = {"next_doc_id": self.next_doc_id, "documents": self.entries}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,41 @@
+import os
+import re
+
+from .onnx_sentence_encoder import OnnxSentenceEncoder
+from .utilities import LazyModule
+
+torch = LazyModule("torch")
+
+
+class EmbeddingBackend:
+    """Builds the encoder behind EmbeddingGenerator.model: full-precision PyTorch, int8 PyTorch or ONNX Runtime."""
+
+    NAMES = ("torch", "torch-int8", "onnx")
+
+    @staticmethod
+    def export_dir_for(model_name, root=".onnx_cache"):
+        return os.path.join(root, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+
+    @staticmethod
+    def quantize_int8(model):
+        """Dynamic int8 quantization of every nn.Linear (weights int8, activations quantized on the fly)."""
+        model.eval()
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    @staticmethod
+    def load(name, model_name, use_auth_token=None, onnx_dir=None, num_threads=None):
+        assert name in EmbeddingBackend.NAMES, f"backend must be one of {EmbeddingBackend.NAMES}"
+        from sentence_transformers import SentenceTransformer
+
+        if name == "onnx":
+            export_dir = onnx_dir or EmbeddingBackend.export_dir_for(model_name)
+            if not OnnxSentenceEncoder.exists(export_dir):
+                OnnxSentenceEncoder.export(SentenceTransformer(model_name, use_auth_token=use_auth_token), export_dir)
+            return OnnxSentenceEncoder(export_dir, num_threads=num_threads)
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        model = SentenceTransformer(model_name, use_auth_token=use_auth_token)
+        if name == "torch-int8":
+            model = EmbeddingBackend.quantize_int8(model)
+        return model
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """On-disk, memory-mapped embedding cache keyed by (model name, normalized chunk text hash)."""
+
+    def __init__(self, cache_dir, model_name, max_entries=100000, initial_capacity=1024, dtype="float32"):
+        assert max_entries > 0, "max_entries must be positive"
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.initial_capacity = min(initial_capacity, max_entries)
+        # dtype of a new vectors file; an existing cache keeps the dtype it was created with
+        self.dtype = dtype
+
+        self.dimension = None
+        self.capacity = 0
+        self.vectors = None
+        self.slots = OrderedDict()
+        self.free_slots = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, "index.json")
+
+    def _vectors_path(self):
+        return os.path.join(self.cache_dir, "vectors.npy")
+
+    def _normalize(self, text):
+        return re.sub(r'\s+', ' ', text).strip()
+
+    def make_key(self, text):
+        payload = self.model_name + "\x00" + self._normalize(text)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _load_index(self):
+        idx_path = self._index_path()
+        vec_path = self._vectors_path()
+        if not (os.path.exists(idx_path) and os.path.exists(vec_path)):
+            return
+
+        with open(idx_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+        if state.get("model_name") != self.model_name:
+            print(f"[Cache] Model changed ({state.get('model_name')} → {self.model_name}), starting empty.")
+            return
+
+        self.dimension = state["dimension"]
+        self.capacity = state["capacity"]
+        self.vectors = np.load(vec_path, mmap_mode="r+")
+        self.dtype = self.vectors.dtype
+        # entries are stored least-recently-used first
+        self.slots = OrderedDict((k, s) for k, s in state["entries"])
+        used = set(self.slots.values())
+        self.free_slots = [s for s in range(self.capacity - 1, -1, -1) if s not in used]
+
+        while len(self.slots) > self.max_entries:
+            self._evict_one()
+
+    def _allocate(self, dim):
+        self.dimension = dim
+        self.capacity = self.initial_capacity
+        self.vectors = np.lib.format.open_memmap(
+            self._vectors_path(), mode="w+", dtype=self.dtype, shape=(self.capacity, dim)
+        )
+        self.free_slots = list(range(self.capacity - 1, -1, -1))
+
+    def _grow(self):
+        new_capacity = min(self.capacity * 2, self.max_entries)
+        tmp_path = self._vectors_path() + ".tmp"
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=self.dtype, shape=(new_capacity, self.dimension)
+        )
+        grown[:self.capacity] = self.vectors
+        grown.flush()
+        del grown
+        self.vectors = None
+        os.replace(tmp_path, self._vectors_path())
+        self.vectors = np.load(self._vectors_path(), mmap_mode="r+")
+
+        self.free_slots = list(range(new_capacity - 1, self.capacity - 1, -1)) + self.free_slots
+        self.capacity = new_capacity
+
+    def _evict_one(self):
+        _, slot = self.slots.popitem(last=False)
+        self.free_slots.append(slot)
+        self.evictions += 1
+
+    def _take_slot(self):
+        if not self.free_slots:
+            if self.capacity < self.max_entries:
+                self._grow()
+            else:
+                self._evict_one()
+        return self.free_slots.pop()
+
+    def get_many(self, texts):
+        """Return (keys, found) where found maps position -> cached vector."""
+        keys = [self.make_key(t) for t in texts]
+        found = {}
+        for pos, key in enumerate(keys):
+            slot = self.slots.get(key)
+            if slot is None:
+                self.misses += 1
+                continue
+            self.slots.move_to_end(key)
+            found[pos] = self.vectors[slot]
+            self.hits += 1
+        return keys, found
+
+    def put_many(self, keys, embeddings):
+        if len(keys) == 0:
+            return
+        embeddings = np.asarray(embeddings)
+        if self.vectors is None:
+            self._allocate(embeddings.shape[1])
+        assert embeddings.shape[1] == self.dimension, "Cached embedding dimension mismatch."
+
+        for key, vec in zip(keys, embeddings):
+            slot = self.slots.get(key)
+            if slot is None:
+                slot = self._take_slot()
+            self.vectors[slot] = vec
+            self.slots[key] = slot
+            self.slots.move_to_end(key)
+
+    def flush(self):
+        if self.vectors is None:
+            return
+        self.vectors.flush()
+        state = {
+            "model_name": self.model_name,
+            "dimension": self.dimension,
+            "capacity": self.capacity,
+            "entries": list(self.slots.items()),
+        }
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._index_path())
+
+    def clear(self):
+        self.slots = OrderedDict()
+        self.free_slots = list(range(self.capacity - 1, -1, -1))
+        self.flush()
+
+    def stats(self):
+        return {
+            "entries": len(self.slots),
+            "capacity": self.capacity,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self):
+        return len(self.slots)
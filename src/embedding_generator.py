@@ -0,0 +1,204 @@
+import time
+
+import numpy as np
+
+from .chunk_meta_store import ChunkMetaStore
+from .embedding_backend import EmbeddingBackend
+from .embedding_cache import EmbeddingCache
+from .instrumentation import METRICS
+
+
+class EmbeddingGenerator:
+    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2", batch_size=32, use_auth_token=None,
+                 cache_dir=None, cache_max_entries=100000, max_batch_tokens=None, num_workers=1,
+                 backend="torch", onnx_dir=None, num_threads=None, dtype="float32", verbose=False):
+        assert dtype in ("float32", "float16"), "dtype must be 'float32' or 'float16'"
+
+        self.verbose = verbose
+        if verbose:
+            print(f"Loading embedding model: {model_name} ({backend}) ...")
+        with METRICS.timer("embed.model_load"):
+            self.model = EmbeddingBackend.load(backend, model_name, use_auth_token=use_auth_token,
+                                               onnx_dir=onnx_dir, num_threads=num_threads)
+        if verbose:
+            print("Model loaded successfully!\n")
+
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        # padded tokens per batch (longest chunk x batch length); None keeps fixed-size batches
+        self.max_batch_tokens = max_batch_tokens
+        self.num_workers = num_workers
+        # storage dtype of the chunk matrix and the cache; float16 halves both, the index upcasts per block
+        self.dtype = dtype
+        self._pool = None
+        self.last_encode_seconds = None
+
+        # int8 vectors drift slightly from full precision, so they get their own cache namespace
+        cache_key = model_name if backend == "torch" else f"{model_name}@{backend}"
+        self.cache = EmbeddingCache(cache_dir, cache_key, max_entries=cache_max_entries,
+                                    dtype=dtype) if cache_dir else None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self.embeddings = None
+        self.chunk_texts = None
+        self.chunk_meta = None
+
+    def encode_chunks(self, chunk_texts, chunk_meta, out_path=None, flush_cache=True):
+        """Encode chunks into a preallocated matrix of self.dtype (memory-mapped at out_path if given).
+
+        flush_cache=False leaves new cache entries unpersisted until the caller flushes self.cache.
+        """
+        if self.verbose:
+            print("Encoding chunks into embeddings...")
+
+        num_chunks = len(chunk_texts)
+
+        t0 = time.time()
+
+        if self.cache is not None:
+            keys, cached = self.cache.get_many(chunk_texts)
+        else:
+            keys, cached = None, {}
+        miss_positions = [i for i in range(num_chunks) if i not in cached]
+        self.cache_hits = len(cached)
+        self.cache_misses = len(miss_positions)
+
+        # length-sorted batching: similar-length chunks share a batch, so less padding
+        lengths = self._chunk_lengths(chunk_meta, num_chunks)
+        if lengths is None and miss_positions:
+            lengths = self._estimate_lengths(chunk_texts)
+        miss_positions.sort(key=lambda i: lengths[i])
+
+        dim = self._dimension()
+        self.embeddings = self._allocate(num_chunks, dim, out_path)
+        for pos, vec in cached.items():
+            self.embeddings[pos] = vec
+
+        multi_process = hasattr(self.model, "start_multi_process_pool")
+        if multi_process and self.num_workers > 1 and len(miss_positions) > self.batch_size:
+            texts = [chunk_texts[i] for i in miss_positions]
+            self.embeddings[miss_positions] = self.model.encode_multi_process(
+                texts, self._get_pool(), batch_size=self.batch_size
+            )
+        else:
+            for batch in self._make_batches(miss_positions, lengths):
+                self.embeddings[batch] = self.model.encode(
+                    [chunk_texts[i] for i in batch], batch_size=len(batch), convert_to_numpy=True
+                )
+
+        if self.cache is not None:
+            if miss_positions:
+                self.cache.put_many([keys[i] for i in miss_positions], self.embeddings[miss_positions])
+            if flush_cache:
+                self.cache.flush()
+        if isinstance(self.embeddings, np.memmap):
+            self.embeddings.flush()
+
+        self.chunk_texts = chunk_texts
+        self.chunk_meta = chunk_meta
+
+        elapsed = time.time() - t0
+        self.last_encode_seconds = elapsed
+        METRICS.observe("embed.encode_chunks", elapsed * 1000)
+        METRICS.incr("embed.chunks", num_chunks)
+        METRICS.incr("embed.cache_hits", self.cache_hits)
+        METRICS.incr("embed.cache_misses", self.cache_misses)
+        if self.verbose:
+            print("\nEmbedding generation complete!")
+            print(f"Shape: {self.embeddings.shape}")
+            if self.cache is not None:
+                print(f"Cache hits: {self.cache_hits}, misses: {self.cache_misses}")
+            print(f"Time taken: {elapsed:.2f} seconds "
+                  f"({len(miss_positions) / elapsed if elapsed > 0 else 0.0:.1f} chunks/sec)\n")
+
+        return self.embeddings
+
+    def _dimension(self):
+        dim = self.model.get_sentence_embedding_dimension()
+        if dim is None:
+            dim = self.model.encode(["dimension probe"], convert_to_numpy=True).shape[1]
+        return dim
+
+    def _allocate(self, n, dim, out_path):
+        if out_path is None:
+            return np.empty((n, dim), dtype=self.dtype)
+        return np.lib.format.open_memmap(out_path, mode="w+", dtype=self.dtype, shape=(n, dim))
+
+    def _estimate_lengths(self, chunk_texts):
+        try:
+            return np.asarray(self.count_tokens(chunk_texts))
+        except Exception:
+            return np.asarray([len(t) for t in chunk_texts])
+
+    def _make_batches(self, positions, lengths):
+        """Split length-sorted positions into batches capped by batch_size and max_batch_tokens (padded)."""
+        batches = []
+        batch = []
+        longest = 0
+        for pos in positions:
+            longest_if_added = max(longest, int(lengths[pos]))
+            too_many = len(batch) >= self.batch_size
+            too_big = self.max_batch_tokens is not None and longest_if_added * (len(batch) + 1) > self.max_batch_tokens
+            if batch and (too_many or too_big):
+                batches.append(batch)
+                batch = []
+                longest_if_added = int(lengths[pos])
+            batch.append(pos)
+            longest = longest_if_added
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = self.model.start_multi_process_pool(["cpu"] * self.num_workers)
+        return self._pool
+
+    def close(self):
+        """Stop the multi-process encoding pool, if one was started."""
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def _chunk_lengths(self, chunk_meta, num_chunks):
+        """Token lengths recorded by a token-budgeted TextChunker, if any."""
+        if not isinstance(chunk_meta, ChunkMetaStore) or "n_tokens" not in chunk_meta.kinds:
+            return None
+        lengths = chunk_meta.column("n_tokens")
+        if len(lengths) != num_chunks or (lengths == ChunkMetaStore.INT_MISSING).any():
+            return None
+        return lengths
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    def token_budget(self):
+        """Max word-pieces per chunk before the model truncates, excluding [CLS]/[SEP]."""
+        return self.model.max_seq_length - 2
+
+    def count_tokens(self, texts):
+        if not texts:
+            return []
+        encoded = self.tokenizer(list(texts), add_special_tokens=False, return_attention_mask=False,
+                                 return_token_type_ids=False)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def release(self):
+        """Drop the last encoded matrix and chunk references once an index has taken them over."""
+        self.embeddings = None
+        self.chunk_texts = None
+        self.chunk_meta = None
+
+    def get_embeddings(self):
+        if self.embeddings is None:
+            raise Exception("No embeddings generated yet.")
+        return self.embeddings
+
+    def get_chunk_texts(self):
+        return self.chunk_texts
+
+    def get_chunk_meta(self):
+        return self.chunk_meta
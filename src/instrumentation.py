@@ -0,0 +1,194 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+class LogExporter:
+    """Writes one line per counter and histogram (count, mean, p50/p95/p99 in ms)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def export(self, snapshot):
+        stream = self.stream or sys.stderr
+        for name, value in sorted(snapshot["counters"].items()):
+            print(f"[Metrics] {name} = {value}", file=stream)
+        for name, h in sorted(snapshot["histograms"].items()):
+            print(f"[Metrics] {name} count={h['count']} mean={h['mean_ms']:.2f}ms p50={h['p50_ms']:.2f}ms "
+                  f"p95={h['p95_ms']:.2f}ms p99={h['p99_ms']:.2f}ms", file=stream)
+
+
+class PrometheusTextExporter:
+    """Writes the Prometheus text format to a file (e.g. for node_exporter's textfile collector)."""
+
+    def __init__(self, path, prefix="rag_"):
+        self.path = path
+        self.prefix = prefix
+
+    def _name(self, name):
+        return self.prefix + "".join(c if c.isalnum() else "_" for c in name)
+
+    def export(self, snapshot):
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = self._name(name) + "_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, h in sorted(snapshot["histograms"].items()):
+            metric = self._name(name) + "_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(h["buckets_ms"], h["bucket_counts"]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound / 1000:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {h["count"]}')
+            lines.append(f"{metric}_sum {h['sum_ms'] / 1000:.6f}")
+            lines.append(f"{metric}_count {h['count']}")
+
+        # write-then-rename so a scraper never sees a half-written file
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
+
+
+class Metrics:
+    """Timers, latency histograms and counters shared by the pipeline classes.
+
+    Disabled by default: timer() hands back a shared no-op context and incr()/observe() return at once,
+    so instrumented code pays one attribute check when nobody is listening.
+    """
+
+    BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+    def __init__(self, enabled=False, exporters=None, window=2048):
+        self.enabled = enabled
+        self.exporters = list(exporters or [])
+        self.window = window
+        self.slow_query_ms = None
+        self.profile_dir = None
+        self._lock = threading.Lock()
+        self._null = nullcontext()
+        self.reset()
+
+    def configure(self, enabled=True, exporters=None, slow_query_ms=None, profile_dir=None):
+        """Turn recording on; with slow_query_ms set, queries slower than that are profiled and dumped."""
+        self.enabled = enabled
+        if exporters is not None:
+            self.exporters = list(exporters)
+        self.slow_query_ms = slow_query_ms
+        self.profile_dir = profile_dir
+        return self
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+    # --- recording --------------------------------------------------------
+    def incr(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def observe(self, name, ms):
+        if not self.enabled:
+            return
+        with self._lock:
+            h = self.histograms.get(name)
+            if h is None:
+                h = self.histograms[name] = {
+                    "count": 0, "sum_ms": 0.0, "bucket_counts": [0] * len(self.BUCKETS_MS),
+                    "recent": deque(maxlen=self.window),
+                }
+            h["count"] += 1
+            h["sum_ms"] += ms
+            h["recent"].append(ms)
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if ms <= bound:
+                    h["bucket_counts"][i] += 1
+                    break
+
+    @contextmanager
+    def _timer(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - t0) * 1000)
+
+    def timer(self, name):
+        """Context manager recording the block's wall time into histogram `name` (ms)."""
+        if not self.enabled:
+            return self._null
+        return self._timer(name)
+
+    @contextmanager
+    def _profiled(self, name, label):
+        profiler = cProfile.Profile()
+        t0 = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            self.observe(name, elapsed_ms)
+            if elapsed_ms >= self.slow_query_ms:
+                self._dump_profile(profiler, name, label, elapsed_ms)
+
+    def profile_if_slow(self, name, label=""):
+        """Like timer(), but runs cProfile and dumps the stats when the block exceeds slow_query_ms."""
+        if not self.enabled:
+            return self._null
+        if self.slow_query_ms is None:
+            return self._timer(name)
+        return self._profiled(name, label)
+
+    def _dump_profile(self, profiler, name, label, elapsed_ms):
+        self.incr(f"{name}.slow")
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f"slow_{name}_{int(time.time() * 1000)}.prof")
+            profiler.dump_stats(path)
+            print(f"[Metrics] Slow {name} ({elapsed_ms:.1f}ms) {label!r}: profile saved to {path}", file=sys.stderr)
+        else:
+            print(f"[Metrics] Slow {name} ({elapsed_ms:.1f}ms) {label!r}\n{out.getvalue()}", file=sys.stderr)
+
+    # --- reading / export -------------------------------------------------
+    def snapshot(self):
+        with self._lock:
+            histograms = {}
+            for name, h in self.histograms.items():
+                recent = np.asarray(h["recent"]) if h["recent"] else np.zeros(1)
+                histograms[name] = {
+                    "count": h["count"],
+                    "sum_ms": h["sum_ms"],
+                    "mean_ms": h["sum_ms"] / h["count"] if h["count"] else 0.0,
+                    "p50_ms": float(np.percentile(recent, 50)),
+                    "p95_ms": float(np.percentile(recent, 95)),
+                    "p99_ms": float(np.percentile(recent, 99)),
+                    "buckets_ms": list(self.BUCKETS_MS),
+                    "bucket_counts": list(h["bucket_counts"]),
+                }
+            return {"counters": dict(self.counters), "histograms": histograms}
+
+    def export(self):
+        snapshot = self.snapshot()
+        for exporter in self.exporters:
+            exporter.export(snapshot)
+        return snapshot
+
+
+# process-wide registry the pipeline classes record into
+METRICS = Metrics()
@@ -0,0 +1,82 @@
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class LRUCache:
+    """Bounded in-memory LRU cache with optional TTL and hit/memory accounting."""
+
+    def __init__(self, max_entries=1024, ttl_seconds=None):
+        assert max_entries > 0, "max_entries must be positive"
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._data = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _sizeof(self, value):
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(self._sizeof(v) for v in value.values())
+        if isinstance(value, (list, tuple)):
+            return sys.getsizeof(value) + sum(self._sizeof(v) for v in value)
+        return sys.getsizeof(value)
+
+    def _drop(self, key):
+        _, _, size = self._data.pop(key)
+        self.memory_bytes -= size
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, stored_at, _ = entry
+        if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+            self._drop(key)
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if key in self._data:
+            self._drop(key)
+        size = self._sizeof(key) + self._sizeof(value)
+        self._data[key] = (value, time.monotonic(), size)
+        self.memory_bytes += size
+
+        while len(self._data) > self.max_entries:
+            self._drop(next(iter(self._data)))
+            self.evictions += 1
+
+    def clear(self):
+        self._data = OrderedDict()
+        self.memory_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_bytes": self.memory_bytes,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
@@ -0,0 +1,122 @@
+import json
+import os
+
+import numpy as np
+
+from .utilities import LazyModule
+
+torch = LazyModule("torch")
+
+
+class OnnxSentenceEncoder:
+    """SentenceTransformer-compatible encoder that runs the exported transformer on ONNX Runtime."""
+
+    CONFIG_FILE = "encoder_config.json"
+    MODEL_FILE = "model.onnx"
+
+    def __init__(self, export_dir, num_threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("onnxruntime is not installed. pip install onnxruntime")
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(export_dir, self.CONFIG_FILE), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.export_dir = export_dir
+        self.max_seq_length = config["max_seq_length"]
+        self.pooling = config["pooling"]
+        self.normalize = config["normalize"]
+        self.dimension = config["dimension"]
+
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(export_dir, self.MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    @classmethod
+    def exists(cls, export_dir):
+        return all(os.path.exists(os.path.join(export_dir, f)) for f in (cls.MODEL_FILE, cls.CONFIG_FILE))
+
+    @classmethod
+    def export(cls, st_model, export_dir, opset_version=14):
+        """Export the transformer of a SentenceTransformer plus its pooling/normalize settings."""
+        transformer = st_model[0]
+        auto_model = transformer.auto_model.eval()
+        tokenizer = transformer.tokenizer
+
+        pooling = "mean"
+        normalize = False
+        for module in st_model:
+            name = type(module).__name__
+            if name == "Pooling" and getattr(module, "pooling_mode_cls_token", False):
+                pooling = "cls"
+            elif name == "Normalize":
+                normalize = True
+
+        os.makedirs(export_dir, exist_ok=True)
+        dummy = tokenizer(["an example sentence to trace the graph"], return_tensors="pt")
+        input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in dummy]
+        dynamic_axes = {k: {0: "batch", 1: "sequence"} for k in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                auto_model,
+                tuple(dummy[k] for k in input_names),
+                os.path.join(export_dir, cls.MODEL_FILE),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=opset_version,
+            )
+        tokenizer.save_pretrained(export_dir)
+
+        with open(os.path.join(export_dir, cls.CONFIG_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "max_seq_length": st_model.max_seq_length,
+                "pooling": pooling,
+                "normalize": normalize,
+                "dimension": st_model.get_sentence_embedding_dimension(),
+            }, f, indent=2)
+        print(f"[ONNX] Exported encoder to {export_dir}")
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _encode_batch(self, batch):
+        enc = self.tokenizer(
+            batch, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        feeds = {name: enc[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        if len(sentences) == 0:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        out = np.empty((len(sentences), self.dimension), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            out[start:start + batch_size] = self._encode_batch(list(sentences[start:start + batch_size]))
+
+        if normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out[0] if single else out
@@ -0,0 +1,171 @@
+import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .utilities import colab_upload
+
+
+class PDFLoader:
+    _DEHYPHEN_RE = re.compile(r'-\s*\n\s*')
+    _NOISE_RE = re.compile(r'\[\d+\]|[^\x00-\x7F]+')
+    _SPACE_DOTS_RE = re.compile(r'\s+|(?<!\.)\.\.(?!\.)')
+
+    def __init__(self, workers=None, pages_per_task=8, verbose=True):
+        self.workers = workers
+        self.verbose = verbose
+        self.pages_per_task = pages_per_task
+        self.file_names = []
+        self.documents = []
+        self.doc_map = {}
+
+    def upload_pdfs(self):
+        uploaded = colab_upload()
+        self.file_names = sorted(uploaded.keys())
+
+        print("\nUploaded files (sorted):")
+        for fn in self.file_names:
+            print(" -", fn)
+        return self.file_names
+
+    def set_files(self, inputs):
+        """Use local PDFs instead of an upload: file paths, directories (every *.pdf inside) or glob patterns."""
+        found = []
+        for item in [inputs] if isinstance(inputs, str) else inputs:
+            if os.path.isdir(item):
+                found.extend(glob.glob(os.path.join(item, "*.pdf")))
+            elif any(c in item for c in "*?["):
+                found.extend(p for p in glob.glob(item, recursive=True) if p.lower().endswith(".pdf"))
+            else:
+                found.append(item)
+        if not found:
+            raise Exception(f"No PDFs found for {inputs}")
+        self.file_names = sorted(dict.fromkeys(os.path.abspath(p) for p in found))
+        return self.file_names
+
+    @staticmethod
+    def clean_text(text):
+        text = PDFLoader._DEHYPHEN_RE.sub('', text)
+
+        text = PDFLoader._NOISE_RE.sub(' ', text)
+
+        text = PDFLoader._SPACE_DOTS_RE.sub(PDFLoader._space_or_dot, text)
+
+        return text.strip()
+
+    @staticmethod
+    def _space_or_dot(m):
+        return '.' if m.group(0)[0] == '.' else ' '
+
+    @staticmethod
+    def _iter_page_range(pdf_path, start, end):
+        """Yield (page_no, cleaned_text) for pages start..end-1, each as soon as it is extracted."""
+        from pypdf import PdfReader
+
+        reader = PdfReader(pdf_path)
+        end = len(reader.pages) if end is None else end
+        for i in range(start, end):
+            try:
+                extracted = reader.pages[i].extract_text() or ""
+            except Exception as e:
+                print(f"[Warning] Page {i} failed: {e}")
+                continue
+            yield i, PDFLoader.clean_text(extracted)
+
+    @staticmethod
+    def _extract_page_range(pdf_path, start, end):
+        return pdf_path, list(PDFLoader._iter_page_range(pdf_path, start, end))
+
+    def extract_text(self, pdf_path):
+        _, pages = self._extract_page_range(pdf_path, 0, None)
+        return " ".join(text for _, text in pages).strip()
+
+    def _page_tasks(self, file_names):
+        from pypdf import PdfReader
+
+        tasks = []
+        for fn in file_names:
+            num_pages = len(PdfReader(fn).pages)
+            for start in range(0, num_pages, self.pages_per_task):
+                tasks.append((fn, start, min(start + self.pages_per_task, num_pages)))
+        return tasks
+
+    def iter_pages(self, file_names=None, workers=None):
+        """Yield (file, page_no, cleaned_text) as pages finish; order is only guaranteed with workers <= 1."""
+        file_names = self.file_names if file_names is None else file_names
+        workers = self.workers if workers is None else workers
+
+        if not workers or workers <= 1:
+            for fn in file_names:
+                for page_no, text in self._iter_page_range(fn, 0, None):
+                    yield fn, page_no, text
+            return
+
+        tasks = self._page_tasks(file_names)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(PDFLoader._extract_page_range, *t) for t in tasks]
+            for fut in as_completed(futures):
+                fn, pages = fut.result()
+                for page_no, text in pages:
+                    yield fn, page_no, text
+
+    def iter_documents(self, file_names=None, workers=None):
+        """Yield (file, fulltext) as soon as every page of a file has been extracted."""
+        file_names = self.file_names if file_names is None else file_names
+        workers = self.workers if workers is None else workers
+
+        if not workers or workers <= 1:
+            for fn in file_names:
+                yield fn, self.extract_text(fn)
+            return
+
+        tasks = self._page_tasks(file_names)
+        pending = {}
+        for fn, _, _ in tasks:
+            pending[fn] = pending.get(fn, 0) + 1
+        pages = {fn: [] for fn in file_names}
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(PDFLoader._extract_page_range, *t) for t in tasks]
+            for fut in as_completed(futures):
+                fn, done = fut.result()
+                pages[fn].extend(done)
+                pending[fn] -= 1
+                if pending[fn] == 0:
+                    ordered = sorted(pages.pop(fn))
+                    yield fn, " ".join(text for _, text in ordered).strip()
+
+        # files without any page never produce a task
+        for fn in pages:
+            yield fn, ""
+
+    # ----------------------------------------------------------
+    def load_documents(self, workers=None):
+        if not self.file_names:
+            raise Exception("No PDF selected. Run upload_pdfs() or set_files() first.")
+
+        if self.verbose:
+            print("\nExtracting & deep-cleaning documents...\n")
+
+        self.documents = []
+        self.doc_map = {}
+
+        for fn, fulltext in self.iter_documents(workers=workers):
+            self.doc_map[fn] = fulltext
+            if self.verbose:
+                print(f"Processing: {fn}")
+                print(f" → Cleaned length: {len(fulltext)} characters.\n")
+
+        # keep upload order regardless of completion order
+        self.doc_map = {fn: self.doc_map[fn] for fn in self.file_names}
+        self.documents = list(self.doc_map.values())
+
+        if self.verbose:
+            print("All documents loaded + cleaned successfully.")
+        return self.documents
+
+    def get_documents(self):
+        return self.documents
+
+    def get_doc_map(self):
+        return self.doc_map
@@ -0,0 +1,310 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from .instrumentation import METRICS, PrometheusTextExporter
+from .versioned_store import VersionedStore
+
+
+class QueryService:
+    """Asyncio HTTP/JSON front-end for RAGPipeline that micro-batches concurrent queries.
+
+    POST /query  {"query": str, "top_k": int, "pretty": bool}  -> AnswerFormatter.format_json
+    GET  /health                                              -> service counters
+    GET  /metrics                                             -> Metrics snapshot (timers, counters)
+
+    Several services (one per process) can share a port with reuse_port=True; each then memory-maps the
+    same saved index, and with watch_interval_s set re-attaches whenever a new store version is published.
+    """
+
+    def __init__(self, pipeline, host="127.0.0.1", port=8000, max_batch_size=32, max_wait_ms=5.0,
+                 default_top_k=5, metrics_interval_s=10.0, reuse_port=False, watch_interval_s=None):
+        self.pipeline = pipeline
+        self.host = host
+        self.port = port
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.default_top_k = default_top_k
+        # configured METRICS exporters run at most this often, after a batch completes
+        self.metrics_interval_s = metrics_interval_s
+        self._last_export = time.monotonic()
+        # SO_REUSEPORT: the kernel spreads incoming connections over every process bound to the port
+        self.reuse_port = reuse_port
+        # how often to poll the pipeline's VersionedStore for a newly published index (None: never)
+        self.watch_interval_s = watch_interval_s
+        self._failed_version = None
+
+        # one worker thread owns the pipeline (model, index, caches); batching provides the parallelism
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-query")
+        self.queue = None
+        self.server = None
+
+        self.requests_served = 0
+        self.batches_run = 0
+        self.errors = 0
+        self.index_swaps = 0
+
+    # --- batching ---------------------------------------------------------
+    async def submit(self, query, top_k=None, pretty=False):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        await self.queue.put((query, top_k or self.default_top_k, bool(pretty), fut))
+        return await fut
+
+    async def _collect_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def index_mmapped(self):
+        """Whether the served index is memory-mapped, i.e. shared through the page cache with other workers."""
+        return bool(getattr(self.pipeline.index, "read_only", False))
+
+    def _run_batch(self, queries, top_k, pretty):
+        return self.pipeline.ask_batch(queries, top_k=top_k, pretty=pretty)
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+
+            groups = {}
+            for query, top_k, pretty, fut in batch:
+                groups.setdefault((top_k, pretty), []).append((query, fut))
+
+            for (top_k, pretty), items in groups.items():
+                queries = [q for q, _ in items]
+                try:
+                    answers = await loop.run_in_executor(self.executor, self._run_batch, queries, top_k, pretty)
+                except Exception as e:
+                    self.errors += len(items)
+                    for _, fut in items:
+                        if not fut.done():
+                            fut.set_exception(e)
+                    continue
+
+                self.batches_run += 1
+                self.requests_served += len(items)
+                METRICS.incr("service.batches")
+                METRICS.incr("service.requests", len(items))
+                for (_, fut), answer in zip(items, answers):
+                    if not fut.done():
+                        fut.set_result(answer)
+
+            if METRICS.exporters and time.monotonic() - self._last_export >= self.metrics_interval_s:
+                self._last_export = time.monotonic()
+                await loop.run_in_executor(self.executor, METRICS.export)
+
+    # --- index hot-swap ---------------------------------------------------
+    async def _watch_store(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.watch_interval_s)
+            version = self.pipeline.pending_version()
+            if version is None or version == self._failed_version:
+                continue
+            # the new version is mapped off the query thread; only the reference swap waits for a batch gap
+            path = VersionedStore(self.pipeline.store_dir).path(version)
+            try:
+                vindex = await loop.run_in_executor(None, self.pipeline.load_index, path)
+            except Exception as e:
+                self._failed_version = version
+                print(f"[Service] Could not load store version {version}, still serving "
+                      f"{self.pipeline.store_version}. Error: {e}")
+                continue
+            await loop.run_in_executor(self.executor, self.pipeline.swap_index, vindex, version)
+            self.index_swaps += 1
+            METRICS.incr("service.index_swaps")
+            print(f"[Service] pid {os.getpid()} now serving store version {version} "
+                  f"({'memory-mapped' if self.index_mmapped() else 'in RAM'})")
+
+    # --- HTTP -------------------------------------------------------------
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            return None, None, None
+        parts = request_line.split(" ")
+        if len(parts) != 3:
+            raise ValueError(f"malformed request line {request_line[:80]!r}")
+        method, path, _ = parts
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length < 0:
+            raise ValueError(f"bad content-length {length}")
+        body = await reader.readexactly(length) if length else b""
+        return method, path, body
+
+    def _write_response(self, writer, status, payload):
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {reasons.get(status, 'OK')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+    @staticmethod
+    def _parse_query(body):
+        """(query, top_k or None, pretty) from a /query body; raises on anything malformed (a 400)."""
+        req = json.loads(body or b"{}")
+        if not isinstance(req, dict):
+            raise TypeError("body must be a JSON object")
+        query = req["query"]
+        assert isinstance(query, str) and query.strip(), "query must be a non-empty string"
+        top_k = req.get("top_k")
+        # bool is an int subclass; true/false would otherwise mean top_k=1/0
+        assert top_k is None or (isinstance(top_k, int) and not isinstance(top_k, bool) and top_k > 0), \
+            "top_k must be a positive integer"
+        return query, top_k, req.get("pretty", False)
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                method, path, body = await self._read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                self._write_response(writer, 400, {"error": f"bad request: {e}"})
+                await writer.drain()
+                return
+            if method is None:
+                return
+
+            if method == "GET" and path == "/health":
+                self._write_response(writer, 200, {"status": "ok", **self.stats()})
+            elif method == "GET" and path == "/metrics":
+                self._write_response(writer, 200, METRICS.snapshot())
+            elif method == "POST" and path == "/query":
+                try:
+                    query, top_k, pretty = self._parse_query(body)
+                except (ValueError, TypeError, KeyError, AssertionError) as e:
+                    self._write_response(writer, 400, {"error": f"bad request: {e}"})
+                else:
+                    try:
+                        answer = await self.submit(query, top_k, pretty)
+                        if isinstance(answer, str):
+                            answer = {"query": query, "pretty": answer}
+                        self._write_response(writer, 200, answer)
+                    except Exception as e:
+                        self._write_response(writer, 500, {"error": str(e)})
+            else:
+                self._write_response(writer, 404, {"error": f"no route for {method} {path}"})
+
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        self.queue = asyncio.Queue()
+        tasks = [asyncio.create_task(self._batcher())]
+        if self.watch_interval_s and self.pipeline.store_dir is not None:
+            tasks.append(asyncio.create_task(self._watch_store()))
+        self.server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                 reuse_port=self.reuse_port or None)
+        print(f"[Service] pid {os.getpid()} listening on http://{self.host}:{self.port} "
+              f"(max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait_ms}, "
+              f"store version={self.pipeline.store_version}, "
+              f"index {'memory-mapped' if self.index_mmapped() else 'in RAM'})")
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def run(self):
+        asyncio.run(self.serve_forever())
+
+    # --- multi-process ----------------------------------------------------
+    @classmethod
+    def _worker_main(cls, worker, processes, store_dir, pipeline_kw, metrics_kw, service_kw):
+        from .rag_pipeline import RAGPipeline
+
+        if metrics_kw:
+            # one Prometheus file per worker, otherwise they overwrite each other's counters
+            for exporter in metrics_kw.get("exporters") or []:
+                if isinstance(exporter, PrometheusTextExporter):
+                    stem, ext = os.path.splitext(exporter.path)
+                    exporter.path = f"{stem}-{worker}{ext}"
+            METRICS.configure(**metrics_kw)
+        pipeline_kw = {"num_threads": max(1, (os.cpu_count() or 1) // processes), **pipeline_kw}
+        pipeline = RAGPipeline.from_store(store_dir, **pipeline_kw)
+        service = cls(pipeline, reuse_port=True, **service_kw)
+        if not service.index_mmapped():
+            print(f"[Service] Warning: worker {worker} (pid {os.getpid()}) could not memory-map the index; "
+                  f"it holds a private copy in RAM.", file=sys.stderr)
+        service.run()
+
+    @classmethod
+    def run_processes(cls, store_dir, processes, pipeline_kw=None, metrics_kw=None, **service_kw):
+        """Serve store_dir from `processes` workers on one port; each holds only its query encoder.
+
+        The index files are memory-mapped read-only, so the workers share one copy in the page cache,
+        and the connections are spread over them by the kernel (SO_REUSEPORT).
+        """
+        # spawn, not fork: every worker loads its own torch runtime in a clean interpreter
+        ctx = multiprocessing.get_context("spawn")
+        workers = [
+            ctx.Process(target=cls._worker_main, name=f"rag-worker-{i}",
+                        args=(i, processes, store_dir, pipeline_kw or {}, metrics_kw, service_kw))
+            for i in range(processes)
+        ]
+        for w in workers:
+            w.start()
+        print(f"[Service] Started {processes} workers on port {service_kw.get('port', 8000)}: "
+              f"pids {', '.join(str(w.pid) for w in workers)}")
+        try:
+            for w in workers:
+                w.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for w in workers:
+                if w.is_alive():
+                    w.terminate()
+                w.join()
+
+    def stats(self):
+        return {
+            "requests_served": self.requests_served,
+            "batches_run": self.batches_run,
+            "mean_batch_size": self.requests_served / self.batches_run if self.batches_run else 0.0,
+            "errors": self.errors,
+            "pid": os.getpid(),
+            "store_version": getattr(self.pipeline, "store_version", None),
+            "index_swaps": self.index_swaps,
+            "index_mmapped": self.index_mmapped(),
+        }
+
+    # --- client -----------------------------------------------------------
+    @staticmethod
+    def query_remote(url, query, top_k=5, pretty=False, timeout=30):
+        payload = json.dumps({"query": query, "top_k": top_k, "pretty": pretty}).encode("utf-8")
+        req = urllib.request.Request(
+            url.rstrip("/") + "/query", data=payload, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            answer = json.loads(resp.read().decode("utf-8"))
+        return answer["pretty"] if pretty else answer
@@ -0,0 +1,478 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from .answer_formatter import AnswerFormatter
+from .chunk_meta_store import ChunkMetaStore
+from .corpus_manifest import CorpusManifest
+from .embedding_generator import EmbeddingGenerator
+from .instrumentation import METRICS
+from .retriever import Retriever
+from .sharded_vector_index import ShardedVectorIndex
+from .vector_index_faiss import VectorIndexFAISS
+from .versioned_store import VersionedStore
+
+# end-of-stream marker passed between streaming build stages
+_DONE = object()
+
+
+class RAGPipeline:
+    STORE_INFO = "pipeline.json"
+    # a cache flush rewrites the whole cache index, so streamed batches flush on this timer, not each
+    CACHE_FLUSH_INTERVAL_S = 30.0
+
+    def __init__(self,
+                 loader,
+                 chunker,
+                 embedder,
+                 vector_index,
+                 retriever,
+                 formatter,
+                 verbose=True,
+                 deduplicator=None):
+
+        self.loader = loader
+        self.chunker = chunker
+        self.embedder = embedder
+        self.index = vector_index
+        self.retriever = retriever
+        self.formatter = formatter
+        self.verbose = verbose
+        # optional ChunkDeduplicator run between chunking and embedding
+        self.deduplicator = deduplicator
+        self.docs_loaded = False
+        self.chunks_ready = False
+        self.embeddings_ready = False
+        self.index_ready = False
+        # set by from_store: the store served and, for a VersionedStore root, the version loaded from it
+        self.store_dir = None
+        self.store_version = None
+
+    def load_pdfs(self, file_names=None):
+        if self.verbose:
+            print("\n[1] LOADING PDFs...")
+        if file_names is not None:
+            self.loader.set_files(file_names)
+        elif not self.loader.file_names:
+            self.loader.upload_pdfs()
+        with METRICS.timer("build.load"):
+            self.loader.load_documents()
+        METRICS.incr("build.documents", len(self.loader.get_doc_map()))
+        self.docs_loaded = True
+        if self.verbose:
+            print("[✓] PDFs loaded.\n")
+        return self.loader.get_doc_map()
+
+    def make_chunks(self):
+        if not self.docs_loaded:
+            raise Exception("Run load_pdfs() first.")
+        if self.verbose:
+            print("\n[2] CHUNKING...")
+        with METRICS.timer("build.chunk"):
+            self.chunker.process_documents(self.loader.get_doc_map())
+        self._dedup_chunks()
+        METRICS.incr("build.chunks", len(self.chunker.get_chunks()))
+        self.chunks_ready = True
+        if self.verbose:
+            print("[✓] Chunks created.\n")
+        return self.chunker.get_chunk_meta()
+
+    def _dedup_chunks(self):
+        if self.deduplicator is None:
+            return
+        self.chunker.chunks, self.chunker.chunk_meta = self.deduplicator.dedup(
+            self.chunker.get_chunks(), self.chunker.get_chunk_meta()
+        )
+
+    def _handoff(self):
+        """The index now owns vectors, texts and metadata: drop the embedder's and chunker's references."""
+        self.embedder.release()
+        self.chunker.chunks = []
+        self.chunker.chunk_meta = ChunkMetaStore()
+        self.embeddings_ready = False
+
+    def embed(self):
+        if not self.chunks_ready:
+            raise Exception("Run make_chunks() first.")
+        if self.verbose:
+            print("\n[3] ENCODING EMBEDDINGS...")
+        chunks = self.chunker.get_chunks()
+        meta = self.chunker.get_chunk_meta()
+        with METRICS.timer("build.embed"):
+            self.embedder.encode_chunks(chunks, meta)
+        self.embeddings_ready = True
+        if self.verbose:
+            print("[✓] Embeddings done.\n")
+        return self.embedder.embeddings
+
+    def build_faiss(self):
+        if not self.embeddings_ready:
+            raise Exception("Run embed() first.")
+        if self.verbose:
+            print("\n[4] BUILDING FAISS INDEX...")
+        with METRICS.timer("build.index"):
+            self.index.build(
+                embeddings=self.embedder.embeddings,
+                chunk_texts=self.embedder.chunk_texts,
+                chunk_meta=self.embedder.chunk_meta
+            )
+        self._handoff()
+        self.index_ready = True
+        if self.verbose:
+            print("[✓] FAISS index ready.\n")
+
+    def ask(self, query, top_k=5, pretty=False):
+        if not self.index_ready:
+            raise Exception("Run build_faiss() first.")
+
+        if self.verbose:
+            print(f"\n[5] QUERY → {query}")
+
+        with METRICS.profile_if_slow("query", query):
+            retrieved_results = self.retriever.search(query, top_k=top_k)
+
+            with METRICS.timer("format"):
+                if pretty:
+                    return self.formatter.format_pretty(query, retrieved_results)
+                return self.formatter.format_json(query, retrieved_results)
+
+    def ask_batch(self, queries, top_k=5, pretty=False):
+        if not self.index_ready:
+            raise Exception("Run build_faiss() first.")
+
+        if self.verbose:
+            print(f"\n[5] BATCH QUERY → {len(queries)} queries")
+
+        with METRICS.profile_if_slow("query_batch", f"{len(queries)} queries"):
+            batch_results = self.retriever.search_batch(queries, top_k=top_k)
+
+            with METRICS.timer("format"):
+                if pretty:
+                    return [self.formatter.format_pretty(q, r) for q, r in zip(queries, batch_results)]
+                return [self.formatter.format_json(q, r) for q, r in zip(queries, batch_results)]
+
+    # --- streaming build ------------------------------------------------
+    @staticmethod
+    def _put(outbox, item, cancel):
+        while not cancel.is_set():
+            try:
+                outbox.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @classmethod
+    def _finish(cls, outbox, cancel):
+        """Deliver _DONE even after a cancel, dropping queued items (nobody will use them) to make room."""
+        if cls._put(outbox, _DONE, cancel):
+            return
+        while True:
+            try:
+                outbox.put_nowait(_DONE)
+                return
+            except queue.Full:
+                try:
+                    outbox.get_nowait()
+                except queue.Empty:
+                    pass
+
+    @staticmethod
+    def _drain(inbox, cancel):
+        """Items of inbox up to _DONE; stops early once cancel is set (another stage failed)."""
+        while True:
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                if cancel.is_set():
+                    return
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def _stage(self, name, produce, outbox, cancel, errors):
+        """Thread body: put every item of produce() on outbox (blocking while it is full), then _DONE."""
+        items = produce()
+        try:
+            for item in items:
+                if not self._put(outbox, item, cancel):
+                    return
+        except BaseException as e:
+            errors.append(e)
+            cancel.set()
+            if self.verbose:
+                print(f"[STREAM] {name} stage failed: {e}")
+        finally:
+            self._finish(outbox, cancel)
+            # runs the generator's own cleanup now (worker pools, cache flush), not whenever it is collected;
+            # stream_build joins this thread before it reads errors
+            try:
+                items.close()
+            except Exception as e:
+                errors.append(e)
+
+    def _stream_chunks(self, docs, doc_ids, batch_size, cancel):
+        for fn, text in self._drain(docs, cancel):
+            with METRICS.timer("build.chunk"):
+                self.chunker.process_documents({fn: text}, doc_id_start=doc_ids[fn])
+                self._dedup_chunks()
+            del text
+            chunks, meta = self.chunker.get_chunks(), self.chunker.get_chunk_meta()
+            METRICS.incr("build.documents")
+            METRICS.incr("build.chunks", len(chunks))
+            for start in range(0, len(chunks), batch_size):
+                end = min(start + batch_size, len(chunks))
+                yield fn, chunks[start:end], meta.take(np.arange(start, end))
+
+    def _stream_embeddings(self, batches, cancel):
+        cache = self.embedder.cache
+        last_flush = time.monotonic()
+        try:
+            for fn, chunks, meta in self._drain(batches, cancel):
+                with METRICS.timer("build.embed"):
+                    vectors = self.embedder.encode_chunks(chunks, meta, flush_cache=False)
+                if cache is not None and time.monotonic() - last_flush >= self.CACHE_FLUSH_INTERVAL_S:
+                    cache.flush()
+                    last_flush = time.monotonic()
+                yield fn, vectors, chunks, meta
+        finally:
+            # also on failure: vectors already computed stay reusable for the retry
+            if cache is not None:
+                cache.flush()
+
+    def _index_pending(self, pending, ids_by_file):
+        first_id = self.index.ntotal if self.index.index is not None else 0
+        with METRICS.timer("build.index"):
+            if self.index.index is None:
+                meta = ChunkMetaStore()
+                texts = []
+                for _, _, chunks, batch_meta in pending:
+                    texts.extend(chunks)
+                    meta.extend(batch_meta)
+                self.index.build(np.vstack([p[1] for p in pending]), texts, meta)
+            else:
+                for _, vectors, chunks, meta in pending:
+                    self.index.add(vectors, chunks, meta)
+        for fn, vectors, _, _ in pending:
+            ids_by_file.setdefault(fn, []).extend(range(first_id, first_id + len(vectors)))
+            first_id += len(vectors)
+        pending.clear()
+
+    def stream_build(self, file_names, doc_id_start=0, queue_size=4, batch_size=256, train_size=None):
+        """Extract → chunk → embed → index add as concurrent stages joined by bounded queues.
+
+        Each stage drops its input once handed on, so memory holds at most queue_size items per stage
+        plus the index itself. A deduplicator only sees one document at a time here. IVF indexes wait
+        for train_size vectors (default 4096) before the first build. Returns {file: [faiss ids]}.
+        """
+        file_names = list(file_names)
+        doc_ids = {fn: doc_id_start + i for i, fn in enumerate(file_names)}
+        if train_size is None:
+            train_size = 4096 if getattr(self.index, "index_type", "flat").startswith("ivf") else 0
+        if self.verbose:
+            print(f"\n[STREAM] {len(file_names)} PDFs: extract → chunk → embed → index (queue={queue_size})")
+
+        docs, batches, vectors = (queue.Queue(maxsize=queue_size) for _ in range(3))
+        cancel = threading.Event()
+        errors = []
+        stages = [
+            ("extract", lambda: self.loader.iter_documents(file_names), docs),
+            ("chunk", lambda: self._stream_chunks(docs, doc_ids, batch_size, cancel), batches),
+            ("embed", lambda: self._stream_embeddings(batches, cancel), vectors),
+        ]
+        threads = [threading.Thread(target=self._stage, args=(name, produce, outbox, cancel, errors),
+                                    name=f"build-{name}", daemon=True)
+                   for name, produce, outbox in stages]
+        for t in threads:
+            t.start()
+
+        ids_by_file = {}
+        pending = []
+        try:
+            for item in self._drain(vectors, cancel):
+                pending.append(item)
+                if self.index.index is None and sum(len(p[1]) for p in pending) < train_size:
+                    continue
+                self._index_pending(pending, ids_by_file)
+            if pending and not errors:
+                self._index_pending(pending, ids_by_file)
+        finally:
+            # on success every stage has finished; on failure this unblocks the others so they exit
+            cancel.set()
+            for t in threads:
+                t.join()
+        if errors:
+            raise errors[0]
+
+        self._handoff()
+        self.docs_loaded = True
+        self.index_ready = self.index.index is not None and self.index.num_live() > 0
+        if self.verbose:
+            print(f"[✓] Streaming build done. Vectors: {self.index.ntotal}\n")
+        return ids_by_file
+
+    def incremental_build(self, store_dir, file_names=None, compact_ratio=0.3, streaming=False, **stream_kw):
+        """Re-process only new or changed PDFs against the index saved in store_dir (see stream_build)."""
+        if file_names is not None:
+            self.loader.file_names = list(file_names)
+        all_files = list(self.loader.file_names)
+
+        manifest = CorpusManifest(store_dir)
+        # an index saved without a manifest cannot be diffed, so it is rebuilt from scratch
+        if self.index.index is None and manifest.entries:
+            if self.index.exists(store_dir):
+                self.index.load(store_dir, mmap=False)
+            else:
+                # e.g. switching between a single and a sharded index: nothing to diff against
+                manifest.entries = {}
+
+        added, changed, removed, unchanged = manifest.diff(all_files)
+        if self.verbose:
+            print(f"\n[INCREMENTAL] added={len(added)} changed={len(changed)} "
+                  f"removed={len(removed)} unchanged={len(unchanged)}")
+
+        stale_ids = []
+        for path in changed + removed:
+            stale_ids.extend(manifest.get_ids(path))
+            manifest.forget(path)
+        if stale_ids:
+            self.index.tombstone(stale_ids)
+
+        todo = added + changed
+        if todo and streaming:
+            doc_id_start = manifest.next_doc_id
+            ids_by_file = self.stream_build(todo, doc_id_start=doc_id_start, **stream_kw)
+            for offset, path in enumerate(todo):
+                manifest.record(path, doc_id_start + offset, ids_by_file.get(path, []))
+        elif todo:
+            self.loader.file_names = todo
+            with METRICS.timer("build.load"):
+                self.loader.load_documents()
+            self.loader.file_names = all_files
+            self.docs_loaded = True
+            METRICS.incr("build.documents", len(todo))
+
+            doc_id_start = manifest.next_doc_id
+            with METRICS.timer("build.chunk"):
+                self.chunker.process_documents(self.loader.get_doc_map(), doc_id_start=doc_id_start)
+            self._dedup_chunks()
+            self.chunks_ready = True
+
+            chunks = self.chunker.get_chunks()
+            meta = self.chunker.get_chunk_meta()
+            METRICS.incr("build.chunks", len(chunks))
+            if chunks:
+                with METRICS.timer("build.embed"):
+                    self.embedder.encode_chunks(chunks, meta)
+                self.embeddings_ready = True
+
+                doc_ids = meta.column("doc_id").copy()
+                with METRICS.timer("build.index"):
+                    if self.index.index is None:
+                        first_id = 0
+                        self.index.build(self.embedder.embeddings, chunks, meta)
+                    else:
+                        first_id = self.index.ntotal
+                        self.index.add(self.embedder.embeddings, chunks, meta)
+                self._handoff()
+            else:
+                first_id = self.index.ntotal if self.index.index is not None else 0
+                doc_ids = np.empty(0, dtype=np.int32)
+
+            for offset, path in enumerate(self.loader.get_doc_map()):
+                doc_id = doc_id_start + offset
+                manifest.record(path, doc_id, first_id + np.flatnonzero(doc_ids == doc_id))
+
+        if self.index.index is not None:
+            if self.index.tombstones and len(self.index.tombstones) > compact_ratio * self.index.ntotal:
+                manifest.remap_ids(self.index.compact())
+            self.save(store_dir)
+        manifest.save()
+
+        self.index_ready = self.index.index is not None and self.index.num_live() > 0
+        if self.verbose:
+            print(f"[✓] Incremental build done. Live vectors: {self.index.num_live()}\n")
+        return added, changed, removed
+
+    def save(self, store_dir):
+        """Persist the index plus the embedder settings a query worker needs to encode compatible queries."""
+        self.index.save(store_dir)
+        with open(os.path.join(store_dir, self.STORE_INFO), "w", encoding="utf-8") as f:
+            json.dump({
+                "model_name": self.embedder.model_name,
+                "backend": getattr(self.embedder, "backend", "torch"),
+            }, f, indent=2)
+
+    @staticmethod
+    def load_index(store_dir, mmap=True, verbose=False):
+        """Open the index saved in store_dir (a plain store or one version of a VersionedStore)."""
+        index_cls = ShardedVectorIndex if ShardedVectorIndex.exists(store_dir) else VectorIndexFAISS
+        vindex = index_cls(verbose=verbose)
+        vindex.load(store_dir, mmap=mmap)
+        return vindex
+
+    @classmethod
+    def from_store(cls, store_dir, model_name=None, backend=None, mmap=True, top_k=5, verbose=False, **embedder_kw):
+        """Query-only pipeline over a saved index: no PDFs are loaded and nothing is re-embedded.
+
+        store_dir may be a VersionedStore root; the published version is served and refresh_index()
+        re-attaches to newer ones.
+        """
+        version = VersionedStore(store_dir).current()
+        index_dir = VersionedStore(store_dir).path(version) if version is not None else store_dir
+        info = {}
+        info_path = os.path.join(index_dir, cls.STORE_INFO)
+        if os.path.exists(info_path):
+            with open(info_path, "r", encoding="utf-8") as f:
+                info = json.load(f)
+        model_name = model_name or info.get("model_name", "sentence-transformers/all-MiniLM-L6-v2")
+        backend = backend or info.get("backend", "torch")
+
+        vindex = cls.load_index(index_dir, mmap=mmap, verbose=verbose)
+        embedder = EmbeddingGenerator(model_name, backend=backend, verbose=verbose, **embedder_kw)
+        retriever = Retriever(embedding_model=embedder.model, vector_index=vindex, top_k=top_k)
+
+        pipeline = cls(loader=None, chunker=None, embedder=embedder, vector_index=vindex,
+                       retriever=retriever, formatter=AnswerFormatter(), verbose=verbose)
+        pipeline.index_ready = True
+        pipeline.store_dir = store_dir
+        pipeline.store_version = version
+        return pipeline
+
+    def pending_version(self):
+        """Version published under store_dir that differs from the one being served, or None."""
+        if self.store_dir is None:
+            return None
+        current = VersionedStore(self.store_dir).current()
+        return current if current is not None and current != self.store_version else None
+
+    def swap_index(self, vector_index, version=None):
+        """Serve queries from vector_index; the query encoder and its caches are kept."""
+        self.index = vector_index
+        self.retriever.set_index(vector_index)
+        self.store_version = version
+        self.index_ready = vector_index.index is not None
+
+    def refresh_index(self, mmap=True):
+        """Hot-swap to the newest published store version; True if the index changed."""
+        version = self.pending_version()
+        if version is None:
+            return False
+        vindex = self.load_index(VersionedStore(self.store_dir).path(version), mmap=mmap, verbose=self.verbose)
+        self.swap_index(vindex, version)
+        if self.verbose:
+            print(f"[STORE] Now serving {self.store_dir} version {version}")
+        return True
+
+    def full_build(self):
+        self.load_pdfs()
+        self.make_chunks()
+        self.embed()
+        self.build_faiss()
+        if self.verbose:
+            print("\n[✓] PIPELINE READY.\n")
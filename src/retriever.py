@@ -0,0 +1,256 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .instrumentation import METRICS
+from .lru_cache import LRUCache
+
+
+class Retriever:
+    def __init__(
+        self,
+        embedding_model,
+        vector_index,
+        top_k=5,
+        rewrite_query=False,
+        cache_size=1024,
+        cache_ttl=None,
+        candidate_factor=3,
+        hybrid=True,
+        rrf_k=60,
+        lexical_weight=1.0
+    ):
+        self.model = embedding_model
+        self.index = vector_index
+        self.top_k = top_k
+        self.rewrite_query = rewrite_query
+        self.candidate_factor = candidate_factor
+        # fuse BM25 hits (when the index carries posting lists) with dense hits by reciprocal rank
+        self.hybrid = hybrid
+        self.rrf_k = rrf_k
+        self.lexical_weight = lexical_weight
+        self._lexical_pool = None
+
+        self.section_priority = {
+            "abstract": 3.0,
+            "introduction": 2.5,
+            "method": 2.2,
+            "methods": 2.2,
+            "approach": 2.0,
+            "model": 1.8,
+            "analysis": 1.8,
+            "results": 1.6,
+            "experiments": 1.4,
+            "evaluation": 1.3,
+            "conclusion": 1.3,
+            "discussion": 1.2,
+        }
+
+        self.skip_sections = {"references", "acknowledgments", "appendix"}
+        self._section_tables_key = None
+        self._section_tables_cache = None
+        self._vector_tables_version = None
+        self._vector_tables = None
+
+        # normalized query -> embedding, and (query, top_k, index version) -> reranked hits
+        self.embedding_cache = LRUCache(cache_size, cache_ttl) if cache_size else None
+        self.result_cache = LRUCache(cache_size, cache_ttl) if cache_size else None
+        self._cached_version = getattr(vector_index, "version", 0)
+
+    def normalize_query(self, query):
+        query = query.strip()
+        query = re.sub(r"\s+", " ", query)
+        return query.lower()
+
+    def rewrite(self, query):
+        return query
+    def search(self, query, top_k=None):
+        return self.search_batch([query], top_k=top_k)[0]
+
+    def search_batch(self, queries, top_k=None):
+        if top_k is None:
+            top_k = self.top_k
+        if not queries:
+            return []
+
+        METRICS.incr("retriever.queries", len(queries))
+        with METRICS.timer("retriever.normalize"):
+            clean_qs = [self.normalize_query(q) for q in queries]
+            if self.rewrite_query:
+                clean_qs = [self.rewrite(q) for q in clean_qs]
+
+        version = getattr(self.index, "version", 0)
+        if version != self._cached_version:
+            if self.result_cache is not None:
+                self.result_cache.clear()
+            self._cached_version = version
+
+        results = [None] * len(clean_qs)
+        pending = []
+        for i, q in enumerate(clean_qs):
+            if self.result_cache is not None:
+                hit = self.result_cache.get((q, top_k, version))
+                if hit is not None:
+                    results[i] = list(hit)
+                    continue
+            pending.append(i)
+
+        METRICS.incr("retriever.result_cache_hits", len(clean_qs) - len(pending))
+        if pending:
+            num_candidates = top_k * self.candidate_factor
+            bonus, selector, allowed = self._vector_tables_for_index()
+
+            # lexical search needs no query embedding, so it runs while the queries are encoded
+            lexical = getattr(self.index, "bm25", None) if self.hybrid else None
+            lexical_future = None
+            if lexical is not None:
+                if self._lexical_pool is None:
+                    self._lexical_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bm25")
+                lexical_future = self._lexical_pool.submit(
+                    self._timed_lexical_search, lexical, [clean_qs[i] for i in pending], num_candidates, allowed
+                )
+
+            with METRICS.timer("retriever.encode"):
+                q_embs = self._encode_queries([clean_qs[i] for i in pending])
+            with METRICS.timer("retriever.search"):
+                distances, indices = self.index.search_ids(q_embs, num_candidates, selector)
+            if lexical_future is not None:
+                lex_scores, lex_ids = lexical_future.result()
+
+            with METRICS.timer("retriever.rerank"):
+                for row, i in enumerate(pending):
+                    if lexical_future is not None:
+                        reranked = self._fuse_ids(distances[row], indices[row], lex_scores[row], lex_ids[row],
+                                                  bonus, top_k)
+                    else:
+                        reranked = self._rerank_ids(distances[row], indices[row], bonus, top_k)
+                    if self.result_cache is not None:
+                        self.result_cache.put((clean_qs[i], top_k, version), reranked)
+                    results[i] = list(reranked)
+
+        return results
+
+    def _encode_queries(self, clean_qs):
+        if self.embedding_cache is None:
+            return self.model.encode(clean_qs, convert_to_numpy=True).astype("float32")
+
+        vectors = [self.embedding_cache.get(q) for q in clean_qs]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        METRICS.incr("retriever.embedding_cache_hits", len(clean_qs) - len(missing))
+        if missing:
+            encoded = self.model.encode(
+                [clean_qs[i] for i in missing],
+                convert_to_numpy=True
+            ).astype("float32")
+            for i, vec in zip(missing, encoded):
+                self.embedding_cache.put(clean_qs[i], vec)
+                vectors[i] = vec
+        return np.vstack(vectors)
+
+    def set_index(self, vector_index):
+        """Serve from another index (e.g. a newly published store version); cached hits and tables are reset."""
+        self.index = vector_index
+        if self.result_cache is not None:
+            self.result_cache.clear()
+        self._cached_version = getattr(vector_index, "version", 0)
+        self._section_tables_key = None
+        self._vector_tables_version = None
+        self._vector_tables = None
+
+    def cache_stats(self):
+        return {
+            "embedding": self.embedding_cache.stats() if self.embedding_cache is not None else None,
+            "result": self.result_cache.stats() if self.result_cache is not None else None,
+        }
+
+    def _section_tables(self, store):
+        """Bonus and skip flag per interned section code; code -1 (missing) maps to the last slot."""
+        vocab = store.vocab.get("section", [])
+        key = (id(store), len(vocab))
+        if self._section_tables_key != key:
+            names = [v.lower() for v in vocab]
+            bonus = np.array([self.section_priority.get(n, 1.0) for n in names] + [1.0])
+            skip = np.array([n in self.skip_sections for n in names] + [False])
+            self._section_tables_cache = (bonus, skip)
+            self._section_tables_key = key
+        return self._section_tables_cache
+
+    def _timed_lexical_search(self, lexical, queries, top_k, allowed):
+        with METRICS.timer("retriever.lexical"):
+            return lexical.search(queries, top_k, allowed)
+
+    def _vector_tables_for_index(self):
+        """Per-vector section bonus, the allowed mask (no skipped sections or tombstones) and its selector."""
+        version = getattr(self.index, "version", 0)
+        if self._vector_tables_version != version:
+            store = self.index.chunk_meta
+            bonus_by_code, skip_by_code = self._section_tables(store)
+            codes = store.column("section")
+            bonus = bonus_by_code[codes]
+            allowed = ~skip_by_code[codes] & self.index.live_mask()
+            selector = None if allowed.all() else self.index.make_selector(allowed)
+            self._vector_tables = (bonus, selector, allowed)
+            self._vector_tables_version = version
+        return self._vector_tables
+
+    def _rerank_ids(self, distances, ids, bonus, top_k):
+        valid = ids >= 0
+        ids = ids[valid]
+        distances = distances[valid]
+        if len(ids) < top_k:
+            # fewer live, non-skipped candidates than requested (filtered sections / tombstones)
+            METRICS.incr("retriever.short_results")
+        METRICS.incr("retriever.dropped_results", len(valid) - len(ids))
+
+        sims = 1 / (1 + distances)
+        final = sims * bonus[ids]
+        order = np.argsort(-final, kind="stable")[:top_k]
+
+        return [{
+            "chunk": self.index.chunk_texts[ids[j]],
+            "metadata": self.index.chunk_meta[ids[j]],
+            "distance": float(distances[j]),
+            "similarity": float(sims[j]),
+            "final_score": float(final[j])
+        } for j in order]
+
+    def _fuse_ids(self, distances, ids, lex_scores, lex_ids, bonus, top_k):
+        """Reciprocal rank fusion of the dense and BM25 candidate lists, then the section bonus."""
+        dense_ok = ids >= 0
+        dense_ids, distances = ids[dense_ok], distances[dense_ok]
+        METRICS.incr("retriever.dropped_results", len(ids) - len(dense_ids))
+        lex_ok = lex_ids >= 0
+        lex_ids, lex_scores = lex_ids[lex_ok], lex_scores[lex_ok]
+
+        candidates = np.unique(np.concatenate([dense_ids, lex_ids]))
+        dense_pos = np.searchsorted(candidates, dense_ids)
+        lex_pos = np.searchsorted(candidates, lex_ids)
+
+        fused = np.zeros(len(candidates))
+        fused[dense_pos] += 1.0 / (self.rrf_k + 1 + np.arange(len(dense_ids)))
+        fused[lex_pos] += self.lexical_weight / (self.rrf_k + 1 + np.arange(len(lex_ids)))
+        final = fused * bonus[candidates]
+        order = np.argsort(-final, kind="stable")[:top_k]
+        if len(order) < top_k:
+            METRICS.incr("retriever.short_results")
+
+        cand_distance = np.full(len(candidates), np.nan)
+        cand_distance[dense_pos] = distances
+        cand_bm25 = np.zeros(len(candidates), dtype=np.float32)
+        cand_bm25[lex_pos] = lex_scores
+
+        results = []
+        for j in order:
+            idx = candidates[j]
+            # lexical-only hits have no dense distance
+            dense_hit = not np.isnan(cand_distance[j])
+            results.append({
+                "chunk": self.index.chunk_texts[idx],
+                "metadata": self.index.chunk_meta[idx],
+                "distance": float(cand_distance[j]) if dense_hit else None,
+                "similarity": float(1 / (1 + cand_distance[j])) if dense_hit else 0.0,
+                "bm25": float(cand_bm25[j]),
+                "final_score": float(final[j])
+            })
+        return results
@@ -0,0 +1,436 @@
+import heapq
+import json
+import os
+import shutil
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from .bm25_index import BM25Index
+from .chunk_meta_store import ChunkMetaStore
+from .instrumentation import METRICS
+from .vector_index_faiss import VectorIndexFAISS
+
+
+class _ShardedTexts:
+    """Read-only sequence over the shards' chunk texts, addressed by global id."""
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def _part(self, shard):
+        return shard.chunk_texts
+
+    def __len__(self):
+        return self.owner.ntotal
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk index out of range")
+        s = bisect_right(self.owner.starts, i) - 1
+        return self._part(self.owner.shards[s])[i - self.owner.starts[s]]
+
+    def __iter__(self):
+        for shard in self.owner.shards:
+            yield from self._part(shard)
+
+
+class _ShardedMeta(_ShardedTexts):
+    """Read-only ChunkMetaStore view over the shards; string codes are re-interned into one vocab."""
+
+    def __init__(self, owner):
+        super().__init__(owner)
+        # append-only, so a code keeps its meaning when shards are added or dropped
+        self._vocab = {}
+
+    def _part(self, shard):
+        return shard.chunk_meta
+
+    def _stores(self):
+        return [shard.chunk_meta for shard in self.owner.shards]
+
+    def _merged_vocab(self, field):
+        values, lookup = self._vocab.setdefault(field, ([], {}))
+        for store in self._stores():
+            for v in store.vocab.get(field, []):
+                if v not in lookup:
+                    lookup[v] = len(values)
+                    values.append(v)
+        return values, lookup
+
+    @property
+    def vocab(self):
+        fields = {f for store in self._stores() for f, kind in store.kinds.items() if kind == "str"}
+        return {f: self._merged_vocab(f)[0] for f in fields}
+
+    def column(self, field):
+        stores = self._stores()
+        kind = next((store.kinds[field] for store in stores if field in store.kinds), "int")
+        if kind == "int":
+            parts = [store.column(field) for store in stores]
+        else:
+            _, lookup = self._merged_vocab(field)
+            parts = []
+            for store in stores:
+                if field not in store.kinds:
+                    parts.append(np.full(len(store), -1, dtype=np.int32))
+                    continue
+                remap = np.array([lookup[v] for v in store.vocab[field]] + [-1], dtype=np.int32)
+                parts.append(remap[store.column(field)])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+
+
+class _ShardedBM25:
+    """BM25 over every shard's posting lists, scored with corpus-wide idf and average length."""
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def search(self, queries, top_k=10, allowed_mask=None):
+        parts = [shard.bm25 for shard in self.owner.shards]
+        n = sum(len(p) for p in parts)
+        avg_len = sum(p.total_len for p in parts) / n if n else 0.0
+
+        out_s = np.zeros((len(queries), top_k), dtype=np.float32)
+        out_i = np.full((len(queries), top_k), -1, dtype=np.int64)
+        for qi, query in enumerate(queries):
+            idf = {}
+            for tok in set(BM25Index.tokenize(query)):
+                df = sum(p.doc_freq(tok) for p in parts)
+                if df:
+                    idf[tok] = float(BM25Index.idf_of(n, df))
+            scores = np.concatenate([p.scores(query, idf=idf, avg_len=avg_len) for p in parts])
+            hits = BM25Index.top_hits(scores, top_k, allowed_mask)
+            out_s[qi, :len(hits)] = scores[hits]
+            out_i[qi, :len(hits)] = hits
+        return out_s, out_i
+
+
+class ShardedVectorIndex:
+    """Several VectorIndexFAISS shards behind the VectorIndexFAISS interface.
+
+    Global ids run through the shards in order. Appends go to the last (active) shard only and a new
+    shard is opened once it holds shard_size vectors, so adding papers never rewrites the others.
+    Searches fan out over a thread pool (FAISS releases the GIL) and the per-shard top-k lists are
+    merged with a heap. Each shard is saved to and loaded from its own subdirectory.
+    """
+
+    MANIFEST = "shards.json"
+
+    def __init__(self, shard_size=50000, workers=None, metric='l2', index_type='flat', lexical=True,
+                 verbose=True, **index_kw):
+        assert shard_size > 0, "shard_size must be positive"
+        self.shard_size = shard_size
+        self.workers = workers
+        self.verbose = verbose
+        self.index_kw = dict(index_kw, metric=metric, index_type=index_type, lexical=lexical)
+
+        self.shards = []
+        self.names = []
+        self.starts = [0]
+        self.next_shard = 0
+        self.version = 0
+        self._pool = None
+        self._saved_dir = None
+        self._saved_versions = {}
+
+        self.chunk_texts = _ShardedTexts(self)
+        self.chunk_meta = _ShardedMeta(self)
+        self._bm25 = _ShardedBM25(self)
+
+    # --- VectorIndexFAISS-compatible attributes ----------------------------
+    @property
+    def metric(self):
+        return self.index_kw["metric"]
+
+    @property
+    def index_type(self):
+        return self.index_kw["index_type"]
+
+    @property
+    def lexical(self):
+        return self.index_kw["lexical"]
+
+    @property
+    def dimension(self):
+        return self.shards[0].dimension if self.shards else None
+
+    @property
+    def index(self):
+        """FAISS index of the active shard, None before build() (callers test it like VectorIndexFAISS.index)."""
+        return self.shards[-1].index if self.shards else None
+
+    @property
+    def ntotal(self):
+        return self.starts[-1]
+
+    @property
+    def read_only(self):
+        """True when every shard was loaded memory-mapped (add() then opens a new in-RAM shard)."""
+        return bool(self.shards) and all(shard.read_only for shard in self.shards)
+
+    @property
+    def bm25(self):
+        if not self.shards or any(shard.bm25 is None for shard in self.shards):
+            return None
+        return self._bm25
+
+    @property
+    def tombstones(self):
+        return {start + i for shard, start in zip(self.shards, self.starts) for i in shard.tombstones}
+
+    def num_live(self):
+        return sum(shard.num_live() for shard in self.shards)
+
+    def set_search_params(self, nprobe=None, ef_search=None):
+        if nprobe is not None:
+            self.index_kw["nprobe"] = nprobe
+        if ef_search is not None:
+            self.index_kw["ef_search"] = ef_search
+        for shard in self.shards:
+            shard.set_search_params(nprobe=nprobe, ef_search=ef_search)
+
+    # --- shard bookkeeping ------------------------------------------------
+    def _executor(self):
+        if self._pool is None:
+            workers = self.workers or min(32, os.cpu_count() or 1)
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard")
+        return self._pool
+
+    def _new_shard(self):
+        self.names.append(f"shard_{self.next_shard:04d}")
+        self.next_shard += 1
+        shard = VectorIndexFAISS(verbose=False, **self.index_kw)
+        self.shards.append(shard)
+        return shard
+
+    def _reindex(self):
+        self.starts = [0]
+        for shard in self.shards:
+            self.starts.append(self.starts[-1] + shard.ntotal)
+        self.version += 1
+
+    def _locate(self, i):
+        s = bisect_right(self.starts, i) - 1
+        return s, i - self.starts[s]
+
+    @staticmethod
+    def _rows(seq, start, end):
+        if isinstance(seq, ChunkMetaStore):
+            return seq.take(np.arange(start, end))
+        return list(seq[start:end])
+
+    # --- writes -----------------------------------------------------------
+    def build(self, embeddings, chunk_texts, chunk_meta, normalize=False):
+        assert isinstance(embeddings, np.ndarray), "embeddings must be numpy array"
+        assert embeddings.ndim == 2, "embeddings must be 2D array (n, dim)"
+        n = len(embeddings)
+        assert len(chunk_texts) == n and len(chunk_meta) == n, "chunk_texts and chunk_meta must align with embeddings"
+        t0 = time.perf_counter()
+
+        self.shards, self.names, self.next_shard = [], [], 0
+        for start in range(0, max(n, 1), self.shard_size):
+            end = min(start + self.shard_size, n)
+            self._new_shard().build(embeddings[start:end], self._rows(chunk_texts, start, end),
+                                    self._rows(chunk_meta, start, end), normalize=normalize)
+        self._reindex()
+
+        METRICS.observe("index.build", (time.perf_counter() - t0) * 1000)
+        if self.verbose:
+            print(f"[Shards] Built {len(self.shards)} shards: vectors={self.ntotal}, dim={self.dimension}")
+
+    def add(self, new_embeddings, new_texts, new_meta, normalize=False, new_shard=False):
+        """Append to the active shard; opens a new one when it is full, read-only (mmap) or new_shard is set."""
+        assert self.shards, "Index not built. Call build() first."
+        active = self.shards[-1]
+        if new_shard or active.read_only or active.ntotal >= self.shard_size:
+            self._new_shard().build(new_embeddings, new_texts, new_meta, normalize=normalize)
+        else:
+            active.add(new_embeddings, new_texts, new_meta, normalize=normalize)
+        self._reindex()
+
+        if self.verbose:
+            print(f"[Shards] Added {len(new_texts)} vectors to {self.names[-1]}. Total now: {self.ntotal}")
+        return self.ntotal
+
+    def tombstone(self, ids):
+        """Mark global ids as deleted in their shards; they stay searchable-excluded until compact()."""
+        by_shard = {}
+        for idx in ids:
+            idx = int(idx)
+            if 0 <= idx < self.ntotal:
+                s, local = self._locate(idx)
+                by_shard.setdefault(s, []).append(local)
+        # checked up front so a refused call leaves no shard half-updated
+        mapped = [self.names[s] for s in by_shard if self.shards[s].read_only]
+        assert not mapped, (f"Shards {', '.join(mapped)} were loaded memory-mapped (read-only); "
+                            f"load(..., mmap=False) to delete from them.")
+        for s, local_ids in by_shard.items():
+            self.shards[s].tombstone(local_ids)
+        self.version += 1
+        if self.verbose:
+            print(f"[Shards] Tombstoned vectors in {len(by_shard)} shards. Live now: {self.num_live()}")
+
+    def compact(self):
+        """Compact every shard with tombstones and drop emptied shards. Returns an old->new global id map."""
+        remap = np.full(self.ntotal, -1, dtype=np.int64)
+        shards, names, new_start = [], [], 0
+        for shard, name, start in zip(self.shards, self.names, self.starts):
+            n = shard.ntotal
+            if len(shard.tombstones) >= n:
+                continue
+            local = shard.compact()
+            kept = local >= 0
+            remap[start:start + n][kept] = local[kept] + new_start
+            new_start += shard.ntotal
+            shards.append(shard)
+            names.append(name)
+        self.shards, self.names = shards, names
+        self._reindex()
+
+        if self.verbose:
+            print(f"[Shards] Compacted to {len(self.shards)} shards: vectors={self.ntotal}")
+        return remap
+
+    # --- reads ------------------------------------------------------------
+    def live_mask(self):
+        if not self.shards:
+            return np.zeros(0, dtype=bool)
+        return np.concatenate([shard.live_mask() for shard in self.shards])
+
+    def make_selector(self, allowed_mask):
+        """Split a global mask of searchable vectors into per-shard selectors (None = shard is skipped)."""
+        allowed_mask = np.asarray(allowed_mask, dtype=bool)
+        per_shard = []
+        for shard, start, end in zip(self.shards, self.starts, self.starts[1:]):
+            part = allowed_mask[start:end]
+            if not part.any():
+                per_shard.append(None)
+            elif part.all() and not shard.tombstones:
+                per_shard.append("all")
+            else:
+                per_shard.append(shard.make_selector(part))
+        return {"mask": allowed_mask, "shards": per_shard, "excluded": int((~allowed_mask).sum())}
+
+    def _search_shard(self, s, q_emb, top_k, selector):
+        shard_sel = None if selector is None else selector["shards"][s]
+        return self.shards[s].search_ids(q_emb, top_k, None if shard_sel == "all" else shard_sel)
+
+    def search_ids(self, query_embeddings, top_k=5, selector=None):
+        """Raw (distances, global ids) over all shards; ids are -1 where fewer than top_k vectors qualify."""
+        assert self.shards, "Index not built."
+        q_emb = np.asarray(query_embeddings, dtype='float32')
+        if q_emb.ndim == 1:
+            q_emb = q_emb.reshape(1, -1)
+
+        todo = [s for s in range(len(self.shards))
+                if self.shards[s].ntotal and (selector is None or selector["shards"][s] is not None)]
+        if len(todo) > 1:
+            hits = list(self._executor().map(lambda s: self._search_shard(s, q_emb, top_k, selector), todo))
+        else:
+            hits = [self._search_shard(s, q_emb, top_k, selector) for s in todo]
+        METRICS.incr("index.shard_searches", len(todo))
+        if len(todo) == 1:
+            distances, ids = hits[0]
+            return distances, np.where(ids >= 0, ids + self.starts[todo[0]], -1)
+
+        # inner product ranks high scores first, L2 low distances; each shard's row is already sorted
+        higher_first = self.metric == 'cosine'
+        out_d = np.full((len(q_emb), top_k), -np.inf if higher_first else np.inf, dtype=np.float32)
+        out_i = np.full((len(q_emb), top_k), -1, dtype=np.int64)
+        for qi in range(len(q_emb)):
+            rows = []
+            for s, (distances, ids) in zip(todo, hits):
+                ok = ids[qi] >= 0
+                rows.append(zip(distances[qi][ok].tolist(), (ids[qi][ok] + self.starts[s]).tolist()))
+            merged = heapq.merge(*rows, key=lambda hit: -hit[0] if higher_first else hit[0])
+            for pos, (dist, idx) in enumerate(islice(merged, top_k)):
+                out_d[qi, pos] = dist
+                out_i[qi, pos] = idx
+        return out_d, out_i
+
+    def search(self, query_embeddings, top_k=5, return_distance=True):
+        distances, indices = self.search_ids(query_embeddings, top_k)
+        return [[{
+            "faiss_index": int(idx),
+            "score": float(distances[qi, pos]),
+            "chunk": self.chunk_texts[idx],
+            "metadata": self.chunk_meta[idx]
+        } for pos, idx in enumerate(indices[qi]) if idx >= 0] for qi in range(len(indices))]
+
+    # --- persistence ------------------------------------------------------
+    @classmethod
+    def exists(cls, dirpath):
+        return os.path.exists(os.path.join(dirpath, cls.MANIFEST))
+
+    def save(self, dirpath):
+        """Write shards changed since the last save (all of them for a new dirpath), then the manifest."""
+        os.makedirs(dirpath, exist_ok=True)
+        t0 = time.perf_counter()
+        if dirpath != self._saved_dir:
+            self._saved_versions = {}
+
+        written = 0
+        for name, shard in zip(self.names, self.shards):
+            shard_dir = os.path.join(dirpath, name)
+            if self._saved_versions.get(name) != shard.version or not shard.exists(shard_dir):
+                shard.save(shard_dir)
+                written += 1
+            self._saved_versions[name] = shard.version
+
+        spec = {
+            "shard_size": self.shard_size,
+            "next_shard": self.next_shard,
+            "config": self.index_kw,
+            "shards": [{"name": name, "vectors": shard.ntotal} for name, shard in zip(self.names, self.shards)],
+        }
+        tmp_path = os.path.join(dirpath, self.MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(spec, f, indent=2)
+        os.replace(tmp_path, os.path.join(dirpath, self.MANIFEST))
+
+        # shards dropped by compact()
+        for entry in os.listdir(dirpath):
+            if entry.startswith("shard_") and entry not in self.names:
+                shutil.rmtree(os.path.join(dirpath, entry), ignore_errors=True)
+        self._saved_dir = dirpath
+
+        METRICS.observe("index.save", (time.perf_counter() - t0) * 1000)
+        if self.verbose:
+            print(f"[Shards] Saved {written}/{len(self.shards)} changed shards to {dirpath}")
+
+    def _load_shard(self, dirpath, name, mmap):
+        shard = VectorIndexFAISS(verbose=False, **self.index_kw)
+        shard.load(os.path.join(dirpath, name), mmap=mmap)
+        return shard
+
+    def load(self, dirpath, mmap=True):
+        """Load every shard listed in the manifest, in parallel."""
+        manifest_path = os.path.join(dirpath, self.MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No {self.MANIFEST} found at {manifest_path}")
+        t0 = time.perf_counter()
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        self.shard_size = spec["shard_size"]
+        self.next_shard = spec["next_shard"]
+        self.index_kw.update(spec["config"])
+        self.names = [entry["name"] for entry in spec["shards"]]
+        self.shards = list(self._executor().map(lambda name: self._load_shard(dirpath, name, mmap), self.names))
+        self._reindex()
+
+        self._saved_dir = dirpath
+        self._saved_versions = {name: shard.version for name, shard in zip(self.names, self.shards)}
+
+        METRICS.observe("index.load", (time.perf_counter() - t0) * 1000)
+        if self.verbose:
+            print(f"[Shards] Loaded {len(self.shards)} shards from {dirpath}. Vectors={self.ntotal}, dim={self.dimension}")
@@ -0,0 +1,282 @@
+import re
+
+from .chunk_meta_store import ChunkMetaStore
+from .utilities import ensure_nltk_data
+
+
+class TextChunker:
+
+    DEFAULT_SECTION_HEADINGS = [
+        "abstract", "introduction", "related work", "background",
+        "method", "methods", "methodology", "approach", "model",
+        "experiments", "experimental setup", "setup", "evaluation",
+        "results", "analysis", "discussion", "conclusion", "conclusions",
+        "future work", "limitations", "references", "acknowledgements",
+        "acknowledgments", "appendix"
+    ]
+
+    # headings that papers print without a section number
+    UNNUMBERED_HEADINGS = {"abstract", "references", "acknowledgements", "acknowledgments", "appendix"}
+    # "Table 3 Results" / "in Appendix B" are references to a heading, not the heading itself
+    REFERENCE_WORDS = {"figure", "fig", "table", "section", "sec", "appendix", "eq", "equation",
+                       "algorithm", "alg", "step", "line", "chapter", "part", "theorem", "lemma"}
+    CONNECTIVES = {"on", "of", "and", "for", "in", "the", "with", "to", "&"}
+
+    _WS_RE = re.compile(r'\s+')
+    _PREV_TOKEN_RE = re.compile(r'(\S+)\s*$')
+    _NEXT_TOKEN_RE = re.compile(r'\s+(\S)(\S*)')
+
+    def __init__(self, sentences_per_chunk=4, overlap_sentences=1, headings=None, verbose=True,
+                 max_tokens=None, overlap_tokens=0, token_counter=None):
+        assert max_tokens is None or token_counter is not None, "max_tokens needs a token_counter"
+        self.sentences_per_chunk = sentences_per_chunk
+        self.overlap_sentences = overlap_sentences
+        # token mode: pack sentences up to max_tokens (e.g. EmbeddingGenerator.token_budget())
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.token_counter = token_counter
+        self.headings = headings or self.DEFAULT_SECTION_HEADINGS
+        self.verbose = verbose
+
+        alternation = "|".join(
+            re.escape(h).replace(r"\ ", r"\s+")
+            for h in sorted(self.headings, key=len, reverse=True)
+        )
+        # optional section number ("4", "4.2", "2.", or an appendix letter "D.") then the heading word
+        self._heading_re = re.compile(
+            r'(?:(?<=\s)|^)(?:(?P<num>\d{1,2}(?:\.\d{1,2})*\.?|[A-Z]\.)\s+)?'
+            r'(?P<label>(?i:' + alternation + r'))\b'
+        )
+        self._sentence_tokenizer = self._make_sentence_tokenizer()
+
+        self.chunks = []
+        self.chunk_meta = ChunkMetaStore()
+
+    def _make_sentence_tokenizer(self):
+        from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+        if ensure_nltk_data("punkt_tab"):
+            try:
+                from nltk.tokenize.punkt import PunktTokenizer
+                return PunktTokenizer("english")
+            except Exception:
+                pass
+        # without the punkt_tab data fall back to an untrained Punkt model
+        return PunktSentenceTokenizer()
+
+    def _is_heading(self, text, m, seen_unnumbered, in_appendix):
+        label = m.group("label")
+        num = m.group("num")
+        key = self._WS_RE.sub(" ", label).lower()
+
+        # real headings are Title Case or UPPER CASE and stand alone ("Results.Table 3" is not one)
+        if not label[0].isupper():
+            return False
+        if m.end() < len(text) and not text[m.end()].isspace():
+            return False
+
+        prev = self._PREV_TOKEN_RE.search(text, 0, m.start())
+        prev_word = prev.group(1).lower().strip("([") if prev else ""
+        nxt = self._NEXT_TOKEN_RE.match(text, m.end())
+
+        if num:
+            if num[0].isalpha() and not in_appendix:
+                return False
+            if prev_word in self.REFERENCE_WORDS:
+                return False
+            if nxt and nxt.group(1).islower() and (nxt.group(1) + nxt.group(2)).lower() not in self.CONNECTIVES:
+                return False
+            return True
+
+        if key not in self.UNNUMBERED_HEADINGS or key in seen_unnumbered:
+            return False
+        # "see the Appendix" / "in References"
+        if prev_word.isalpha() and prev_word.islower() and prev.group(1).islower():
+            return False
+        return nxt is not None and (nxt.group(1).isupper() or nxt.group(1).isdigit())
+
+    def _find_headings(self, text):
+        matches = []
+        seen_unnumbered = set()
+        in_appendix = False
+        for m in self._heading_re.finditer(text):
+            if not self._is_heading(text, m, seen_unnumbered, in_appendix):
+                continue
+            label = self._WS_RE.sub(" ", m.group("label")).lower()
+            if not m.group("num"):
+                seen_unnumbered.add(label)
+            if label == "appendix":
+                in_appendix = True
+            matches.append((m.start(), m.end(), label))
+        return matches
+
+    def _section_boundaries(self, text):
+        matches = self._find_headings(text)
+
+        if not matches:
+            return [("body", 0, len(text))]
+
+        spans = []
+        for i, (s, e, label) in enumerate(matches):
+            start = s
+            end = matches[i + 1][0] if i + 1 < len(matches) else len(text)
+            spans.append((label, start, end))
+        first_start = spans[0][1]
+        if first_start > 0:
+            spans.insert(0, ("preface", 0, first_start))
+        return spans
+
+    def _sentences_by_section(self, text, spans):
+        """Segment the whole document once and cut sentences at section starts."""
+        sections = [[] for _ in spans]
+        sec = 0
+        for s, e in self._sentence_tokenizer.span_tokenize(text):
+            while s < e:
+                while sec + 1 < len(spans) and spans[sec + 1][1] <= s:
+                    sec += 1
+                cut = min(e, spans[sec + 1][1]) if sec + 1 < len(spans) else e
+                piece = text[s:cut].strip()
+                if piece:
+                    sections[sec].append(piece)
+                s = cut
+        return sections
+
+    @classmethod
+    def for_embedder(cls, embedder, overlap_tokens=32, **kwargs):
+        """Token-budgeted chunker matched to the embedder's tokenizer and max sequence length."""
+        return cls(max_tokens=embedder.token_budget(), overlap_tokens=overlap_tokens,
+                   token_counter=embedder.count_tokens, **kwargs)
+
+    def _split_long_sentence(self, sentence, n_tokens):
+        """Cut a sentence that alone exceeds max_tokens into word windows that fit."""
+        words = sentence.split(" ")
+        n_pieces = -(-n_tokens // self.max_tokens)
+        size = max(1, -(-len(words) // n_pieces))
+        pieces = [" ".join(words[i:i + size]) for i in range(0, len(words), size)]
+        counts = self.token_counter(pieces)
+
+        out = []
+        for piece, count in zip(pieces, counts):
+            if count > self.max_tokens and len(piece.split(" ")) > 1:
+                out.extend(self._split_long_sentence(piece, count))
+            else:
+                out.append((piece, count))
+        return out
+
+    def _chunk_tokens_in_section(self, sentences, counts, doc_name, doc_id, section_name, base_chunk_id):
+        units = []
+        for sent_idx, (sent, n) in enumerate(zip(sentences, counts)):
+            pieces = self._split_long_sentence(sent, n) if n > self.max_tokens else [(sent, n)]
+            units.extend((piece, count, sent_idx) for piece, count in pieces)
+
+        chunks = []
+        meta = []
+        chunk_id = base_chunk_id
+        start = 0
+        while start < len(units):
+            end = start
+            total = 0
+            while end < len(units) and (end == start or total + units[end][1] <= self.max_tokens):
+                total += units[end][1]
+                end += 1
+
+            chunks.append(" ".join(u[0] for u in units[start:end]))
+            meta.append({
+                "doc_id": doc_id,
+                "chunk_id": chunk_id,
+                "source": doc_name,
+                "section": section_name,
+                "sentence_start": units[start][2],
+                "sentence_end": units[end - 1][2] + 1,
+                "n_tokens": total,
+            })
+            chunk_id += 1
+
+            if end >= len(units):
+                break
+            # step back over trailing units that fit in the overlap budget, always moving forward
+            next_start = end
+            overlap = 0
+            while next_start - 1 > start and overlap + units[next_start - 1][1] <= self.overlap_tokens:
+                next_start -= 1
+                overlap += units[next_start][1]
+            start = next_start
+
+        return chunks, meta, chunk_id
+
+    def _chunk_sentences_in_section(self, sentences, doc_name, doc_id, section_name, base_chunk_id):
+        chunks = []
+        meta = []
+        start = 0
+        end = self.sentences_per_chunk
+        chunk_id = base_chunk_id
+
+        while start < len(sentences):
+            chunk_sents = sentences[start:end]
+            chunk_text = " ".join(chunk_sents).strip()
+            if chunk_text:
+                chunks.append(chunk_text)
+                meta.append({
+                    "doc_id": doc_id,
+                    "chunk_id": chunk_id,
+                    "source": doc_name,
+                    "section": section_name,
+                    "sentence_start": start,
+                    "sentence_end": min(end, len(sentences)),
+                })
+                chunk_id += 1
+
+            start = end - self.overlap_sentences
+            end = start + self.sentences_per_chunk
+
+        return chunks, meta, chunk_id
+
+    def process_documents(self, doc_map, doc_id_start=0):
+        self.chunks = []
+        self.chunk_meta = ChunkMetaStore()
+
+        for doc_id, (doc_name, full_text) in enumerate(doc_map.items(), start=doc_id_start):
+            if self.verbose:
+                print(f"[Doc {doc_id}] Section-aware chunking: {doc_name}")
+
+            text = self._WS_RE.sub(" ", full_text).strip() if full_text else ""
+            spans = self._section_boundaries(text)
+            section_sents = self._sentences_by_section(text, spans)
+
+            if self.verbose:
+                print(f" → Detected {len(spans)} sections")
+
+            doc_chunks = 0
+            next_chunk_id = 0
+            for (sec_name, _, _), sents in zip(spans, section_sents):
+                if not sents:
+                    continue
+
+                if self.max_tokens:
+                    sec_chunks, sec_meta, next_chunk_id = self._chunk_tokens_in_section(
+                        sents, self.token_counter(sents), doc_name, doc_id, sec_name, next_chunk_id
+                    )
+                else:
+                    sec_chunks, sec_meta, next_chunk_id = self._chunk_sentences_in_section(
+                        sents, doc_name, doc_id, sec_name, next_chunk_id
+                    )
+
+                self.chunks.extend(sec_chunks)
+                self.chunk_meta.extend(sec_meta)
+                doc_chunks += len(sec_chunks)
+
+                if self.verbose:
+                    print(f"   - Section '{sec_name}': {len(sec_chunks)} chunks")
+
+            if self.verbose:
+                print(f" → Total chunks for doc: {doc_chunks}\n")
+
+        if self.verbose:
+            print(f"All documents processed. Total chunks: {len(self.chunks)}")
+        return self.chunks
+
+    def get_chunks(self):
+        return self.chunks
+
+    def get_chunk_meta(self):
+        return self.chunk_meta
@@ -0,0 +1,70 @@
+import contextlib
+import importlib
+import os
+
+
+class LazyModule:
+    """Stands in for a heavy module (faiss, torch) and imports it on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="wb", encoding=None):
+    """Write to path + ".tmp", then rename it over path.
+
+    A process that memory-mapped the old file keeps reading the old inode; truncating it in place
+    instead would SIGBUS every reader (including this process, when it saves the store it loaded).
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+_NLTK_RESOURCES = {}
+
+
+def ensure_nltk_data(resource="punkt_tab", download=True):
+    """True if tokenizers/<resource> is available; checks local NLTK data first and downloads at most once."""
+    if resource in _NLTK_RESOURCES:
+        return _NLTK_RESOURCES[resource]
+
+    import nltk
+
+    path = f"tokenizers/{resource}"
+    try:
+        nltk.data.find(path)
+        found = True
+    except LookupError:
+        found = False
+        if download and not os.environ.get("RAG_OFFLINE"):
+            try:
+                nltk.download(resource, quiet=True)
+                nltk.data.find(path)
+                found = True
+            except Exception:
+                found = False
+    _NLTK_RESOURCES[resource] = found
+    return found
+
+
+def colab_upload():
+    """Interactive file upload; only available inside Google Colab."""
+    try:
+        from google.colab import files
+    except ImportError:
+        raise Exception("File upload needs Google Colab. Set PDFLoader.file_names to local PDF paths instead.")
+    return files.upload()
@@ -0,0 +1,581 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from .bm25_index import BM25Index
+from .chunk_meta_store import ChunkMetaStore
+from .chunk_text_store import ChunkTextStore
+from .instrumentation import METRICS
+from .utilities import LazyModule, atomic_write
+
+faiss = LazyModule("faiss")
+
+READ_ONLY_MSG = "Index was loaded memory-mapped (read-only); load(..., mmap=False) to modify it."
+
+
+class VectorIndexFAISS:
+    INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_pq', 'hnsw', 'sq8', 'sqfp16')
+    # index types whose stored codes only approximate the vectors
+    LOSSY_TYPES = ('ivf_pq', 'sq8', 'sqfp16')
+
+    def __init__(self, metric='l2', use_gpu=False, gpu_device=0, index_type='flat',
+                 nlist=None, pq_m=None, pq_nbits=8, hnsw_m=32, ef_construction=40,
+                 nprobe=8, ef_search=64, lexical=True, rerank=False, rerank_factor=2,
+                 vector_dtype='float32', exact_compaction=False, verbose=True):
+        assert metric in ('l2', 'cosine'), "metric must be 'l2' or 'cosine'"
+        assert index_type in self.INDEX_TYPES, f"index_type must be one of {self.INDEX_TYPES}"
+        assert vector_dtype in ('float32', 'float16'), "vector_dtype must be 'float32' or 'float16'"
+        self.metric = metric
+        self.use_gpu = use_gpu
+        self.gpu_device = gpu_device
+
+        self.index_type = index_type
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.pq_nbits = pq_nbits
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        # BM25 posting lists over the same chunk ids, for hybrid retrieval
+        self.lexical = lexical
+        self.bm25 = None
+        # lossy indexes can keep the raw vectors (memory-mapped once saved) to re-score their final
+        # candidates exactly: top_k * rerank_factor hits are fetched from the codes, top_k returned
+        self.rerank = rerank
+        self.rerank_factor = rerank_factor
+        # dtype of that raw copy; float16 halves it at ~1e-3 relative error
+        self.vector_dtype = vector_dtype
+        # keep the raw copy even without rerank, so compact() retrains a lossy index on the exact vectors
+        # instead of on vectors decoded from its codes
+        self.exact_compaction = exact_compaction
+        self.verbose = verbose
+
+        self.index = None
+        self.dimension = None
+        # raw vectors are kept outside FAISS only for lossy indexes that need them (see owns_vectors)
+        self._vectors = None
+        # add() appends into spare rows here, so repeated adds copy O(new rows) amortized
+        self._emb_buffer = None
+        self.chunk_texts = None
+        self.chunk_meta = None
+        self.tombstones = set()
+        # True when load() memory-mapped the index: the vectors stay in the file's shared pages
+        self.read_only = False
+        # bumped on every change so query/result caches can tell stale entries apart
+        self.version = 0
+
+    def _faiss_metric(self):
+        return faiss.METRIC_L2 if self.metric == 'l2' else faiss.METRIC_INNER_PRODUCT
+
+    def _make_index(self, dim, n_train=None):
+        if self.index_type == 'flat':
+            if self.metric == 'l2':
+                return faiss.IndexFlatL2(dim)
+            return faiss.IndexFlatIP(dim)
+
+        if self.index_type == 'hnsw':
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m, self._faiss_metric())
+            index.hnsw.efConstruction = self.ef_construction
+            return index
+
+        if self.index_type in ('sq8', 'sqfp16'):
+            # 1 or 2 bytes per dimension instead of 4; SQ8 learns per-dimension ranges when trained
+            qtype = faiss.ScalarQuantizer.QT_8bit if self.index_type == 'sq8' else faiss.ScalarQuantizer.QT_fp16
+            return faiss.IndexScalarQuantizer(dim, qtype, self._faiss_metric())
+
+        # IVF: default to ~4*sqrt(n) lists, keeping >= 39 training points per list
+        nlist = self.nlist
+        if nlist is None:
+            n = n_train or 1
+            nlist = max(1, min(int(4 * np.sqrt(n)), n // 39))
+        quantizer = faiss.IndexFlatL2(dim) if self.metric == 'l2' else faiss.IndexFlatIP(dim)
+
+        if self.index_type == 'ivf_flat':
+            return faiss.IndexIVFFlat(quantizer, dim, nlist, self._faiss_metric())
+
+        pq_m = self.pq_m
+        if pq_m is None:
+            pq_m = max(m for m in range(1, dim // 4 + 1) if dim % m == 0) if dim >= 4 else 1
+        assert dim % pq_m == 0, "pq_m must divide the embedding dimension"
+        # k-means on the PQ codebooks needs at least 2**nbits training points
+        nbits = self.pq_nbits
+        while n_train is not None and nbits > 1 and 2 ** nbits > n_train:
+            nbits -= 1
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, nbits, self._faiss_metric())
+
+    ADD_BLOCK = 65536
+
+    def _blocks(self, vectors, normalize):
+        """float32 row blocks; only a normalized block is copied, so a float32 input is never duplicated whole."""
+        for start in range(0, len(vectors), self.ADD_BLOCK):
+            block = vectors[start:start + self.ADD_BLOCK]
+            if normalize:
+                block = block.astype('float32')
+                faiss.normalize_L2(block)
+            else:
+                block = np.ascontiguousarray(block, dtype='float32')
+            yield block
+
+    def _fill(self, vectors, normalize):
+        for block in self._blocks(vectors, normalize):
+            self.index.add(block)
+            if self.owns_vectors():
+                self._append_vectors(block)
+
+    def _train_and_fill(self, vectors, normalize=False):
+        index = self._make_index(self.dimension, n_train=len(vectors))
+        if not index.is_trained:
+            train = vectors.astype('float32') if normalize else np.ascontiguousarray(vectors, dtype='float32')
+            if normalize:
+                faiss.normalize_L2(train)
+            index.train(train)
+            del train
+        self.index = self._maybe_move_to_gpu(index)
+        self._vectors = None
+        self._emb_buffer = None
+        self._fill(vectors, normalize)
+        self.set_search_params()
+        return self.index
+
+    def set_search_params(self, nprobe=None, ef_search=None):
+        """Query-time knobs: nprobe for IVF indexes, efSearch for HNSW."""
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        if self.index is None:
+            return
+
+        if self.index_type in ('ivf_flat', 'ivf_pq'):
+            try:
+                faiss.extract_index_ivf(self.index).nprobe = self.nprobe
+            except Exception:
+                faiss.GpuParameterSpace().set_index_parameter(self.index, "nprobe", self.nprobe)
+        elif self.index_type == 'hnsw':
+            self.index.hnsw.efSearch = self.ef_search
+
+    def _config(self):
+        return {
+            "metric": self.metric,
+            "index_type": self.index_type,
+            "nlist": self.nlist,
+            "pq_m": self.pq_m,
+            "pq_nbits": self.pq_nbits,
+            "hnsw_m": self.hnsw_m,
+            "ef_construction": self.ef_construction,
+            "nprobe": self.nprobe,
+            "ef_search": self.ef_search,
+            "lexical": self.lexical,
+            "rerank": self.rerank,
+            "rerank_factor": self.rerank_factor,
+            "vector_dtype": self.vector_dtype,
+            "exact_compaction": self.exact_compaction,
+        }
+
+    def _maybe_move_to_gpu(self, index):
+        """Move index to GPU if requested and available."""
+        if self.use_gpu:
+            try:
+                res = faiss.StandardGpuResources()
+                index = faiss.index_cpu_to_gpu(res, self.gpu_device, index)
+                print(f"[FAISS] Index moved to GPU:{self.gpu_device}")
+            except Exception as e:
+                print(f"[FAISS] GPU move failed, falling back to CPU. Error: {e}")
+        return index
+
+    def build(self, embeddings, chunk_texts, chunk_meta, normalize=False):
+        assert isinstance(embeddings, np.ndarray), "embeddings must be numpy array"
+        assert embeddings.ndim == 2, "embeddings must be 2D array (n, dim)"
+        n, dim = embeddings.shape
+        assert len(chunk_texts) == n and len(chunk_meta) == n, "chunk_texts and chunk_meta must align with embeddings"
+        t0 = time.perf_counter()
+
+        self.dimension = dim
+        # add() extends both, so they are copied: a list of shared str references and a few int32 columns
+        self.chunk_texts = list(chunk_texts)
+        self.chunk_meta = ChunkMetaStore.from_dicts(chunk_meta)
+        self.tombstones = set()
+
+        self._train_and_fill(embeddings, normalize=normalize or self.metric == 'cosine')
+        self.bm25 = BM25Index.build(self.chunk_texts) if self.lexical else None
+        self.read_only = False
+        self.version += 1
+
+        METRICS.observe("index.build", (time.perf_counter() - t0) * 1000)
+        METRICS.incr("index.vectors_added", n)
+        if self.verbose:
+            print(f"[FAISS] Built index: vectors={self.index.ntotal}, dim={self.dimension}")
+        return self.index
+
+    def add(self, new_embeddings, new_texts, new_meta, normalize=False):
+        assert self.index is not None, "Index not built. Call build() first."
+        assert not self.read_only, READ_ONLY_MSG
+        assert new_embeddings.shape[1] == self.dimension, "Dimension mismatch."
+        t0 = time.perf_counter()
+
+        self._fill(new_embeddings, normalize or self.metric == 'cosine')
+
+        self.chunk_texts.extend(new_texts)
+        self.chunk_meta.extend(new_meta)
+        if self.bm25 is not None:
+            self.bm25.add(new_texts)
+        self.version += 1
+
+        METRICS.observe("index.add", (time.perf_counter() - t0) * 1000)
+        METRICS.incr("index.vectors_added", len(new_embeddings))
+        if self.verbose:
+            print(f"[FAISS] Added {len(new_texts)} vectors. Total now: {self.index.ntotal}")
+        return self.index.ntotal
+
+    def _append_vectors(self, emb):
+        n = 0 if self._vectors is None else len(self._vectors)
+        if self._emb_buffer is None or n + len(emb) > len(self._emb_buffer):
+            buffer = np.empty((max(n + len(emb), 2 * n, 16), self.dimension), dtype=self.vector_dtype)
+            if n:
+                buffer[:n] = self._vectors
+            self._emb_buffer = buffer
+        self._emb_buffer[n:n + len(emb)] = emb
+        self._vectors = self._emb_buffer[:n + len(emb)]
+
+    def owns_vectors(self):
+        # exact types store the vectors themselves and hand them back; lossy ones keep a raw copy only
+        # when asked to, since it costs more memory than the codes the index type was chosen for
+        return self.index_type in self.LOSSY_TYPES and (self.rerank or self.exact_compaction)
+
+    @property
+    def embeddings(self):
+        """(ntotal, dim) vectors as indexed (normalized for cosine); vector_dtype if the index owns a raw copy.
+
+        For flat and HNSW indexes this is a read-only view of FAISS's own storage, valid until the next
+        add() / compact(); IVF-Flat vectors are reconstructed from the inverted lists and scalar-quantized
+        ones decoded. Copy it to keep it.
+        """
+        if self._vectors is not None or self.index is None:
+            return self._vectors
+        index = faiss.index_gpu_to_cpu(self.index) if self.use_gpu else self.index
+        storage = faiss.downcast_index(index.storage) if self.index_type == 'hnsw' else index
+        if not index.ntotal:
+            return np.zeros((0, index.d), dtype=np.float32)
+        if hasattr(storage, "get_xb"):
+            view = faiss.rev_swig_ptr(storage.get_xb(), storage.ntotal * storage.d).reshape(storage.ntotal, storage.d)
+            view.flags.writeable = False
+            return view
+        if self.index_type in ('ivf_flat', 'ivf_pq'):
+            faiss.extract_index_ivf(index).make_direct_map()
+        return index.reconstruct_n(0, index.ntotal)
+
+    def tombstone(self, ids):
+        """Mark vectors as deleted; they stay in the FAISS index until compact()."""
+        assert self.index is not None, "Index not built."
+        assert not self.read_only, READ_ONLY_MSG
+        before = len(self.tombstones)
+        for idx in ids:
+            idx = int(idx)
+            if 0 <= idx < self.index.ntotal:
+                self.tombstones.add(idx)
+        self.version += 1
+        METRICS.incr("index.tombstoned", len(self.tombstones) - before)
+        if self.verbose:
+            print(f"[FAISS] Tombstoned {len(self.tombstones) - before} vectors. Live now: {self.num_live()}")
+
+    @property
+    def ntotal(self):
+        return 0 if self.index is None else self.index.ntotal
+
+    def num_live(self):
+        if self.index is None:
+            return 0
+        return self.index.ntotal - len(self.tombstones)
+
+    def compact(self):
+        """Drop tombstoned vectors and rebuild the index. Returns an old->new id map (-1 = removed).
+
+        Lossy indexes without a raw copy (rerank / exact_compaction off) are retrained on the vectors
+        decoded from their codes, so every compaction adds the quantization error once more.
+        """
+        assert self.index is not None, "Index not built."
+        n = self.index.ntotal
+        remap = np.full(n, -1, dtype=np.int64)
+        if not self.tombstones:
+            remap[:] = np.arange(n)
+            return remap
+        assert not self.read_only, READ_ONLY_MSG
+        t0 = time.perf_counter()
+
+        keep = np.array([i for i in range(n) if i not in self.tombstones], dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+
+        # gathered before the old index (which the embeddings view may point into) is replaced
+        kept_vectors = self.embeddings[keep]
+        self.chunk_texts = [self.chunk_texts[i] for i in keep]
+        self.chunk_meta = self.chunk_meta.take(keep)
+        if self.bm25 is not None:
+            self.bm25 = self.bm25.take(keep)
+
+        self._train_and_fill(kept_vectors)
+        del kept_vectors
+        self.read_only = False
+        self.tombstones = set()
+        self.version += 1
+
+        METRICS.observe("index.compact", (time.perf_counter() - t0) * 1000)
+        if self.verbose:
+            print(f"[FAISS] Compacted index: vectors={self.index.ntotal}")
+        return remap
+
+    def live_mask(self):
+        """Boolean mask over all vectors, False for tombstoned ones."""
+        mask = np.ones(self.index.ntotal, dtype=bool)
+        if self.tombstones:
+            mask[np.fromiter(self.tombstones, dtype=np.int64)] = False
+        return mask
+
+    def make_selector(self, allowed_mask):
+        """Wrap a boolean mask of searchable vectors into a FAISS ID selector."""
+        allowed_mask = np.asarray(allowed_mask, dtype=bool)
+        bitmap = np.packbits(allowed_mask, bitorder='little')
+        sel = faiss.IDSelectorBitmap(len(allowed_mask), faiss.swig_ptr(bitmap))
+        # the selector only points into bitmap, so both travel together
+        return {"mask": allowed_mask, "bitmap": bitmap, "sel": sel, "excluded": int((~allowed_mask).sum())}
+
+    def _live_selector(self):
+        if not self.tombstones:
+            return None
+        if getattr(self, "_live_selector_version", None) != self.version:
+            self._live_selector_cache = self.make_selector(self.live_mask())
+            self._live_selector_version = self.version
+        return self._live_selector_cache
+
+    def _search_params(self, sel):
+        if self.index_type in ('ivf_flat', 'ivf_pq'):
+            return faiss.SearchParametersIVF(sel=sel, nprobe=self.nprobe)
+        if self.index_type == 'hnsw':
+            return faiss.SearchParametersHNSW(sel=sel, efSearch=self.ef_search)
+        return faiss.SearchParameters(sel=sel)
+
+    def search_ids(self, query_embeddings, top_k=5, selector=None):
+        """Raw (distances, ids) search; ids are -1 where fewer than top_k vectors pass the selector."""
+        assert self.index is not None, "Index not built."
+        q_emb = query_embeddings.astype('float32')
+        if q_emb.ndim == 1:
+            q_emb = q_emb.reshape(1, -1)
+        assert q_emb.shape[1] == self.dimension, "Query embedding dimension mismatch."
+
+        if self.metric == 'cosine':
+            faiss.normalize_L2(q_emb)
+
+        if selector is None:
+            selector = self._live_selector()
+        if self.rerank and self._vectors is not None:
+            distances, indices = self._search(q_emb, top_k * self.rerank_factor, selector)
+            with METRICS.timer("index.rerank"):
+                return self._rerank_exact(q_emb, distances, indices, top_k)
+        return self._search(q_emb, top_k, selector)
+
+    def _rerank_exact(self, q_emb, distances, indices, top_k):
+        """Re-score the fetched candidates against the raw vectors and keep the best top_k."""
+        valid = indices >= 0
+        vectors = np.asarray(self._vectors[np.where(valid, indices, 0)], dtype=np.float32)
+        if self.metric == 'l2':
+            exact = ((vectors - q_emb[:, None, :]) ** 2).sum(axis=2)
+            exact[~valid] = np.inf
+            order = np.argsort(exact, axis=1, kind="stable")[:, :top_k]
+        else:
+            exact = np.einsum("qkd,qd->qk", vectors, q_emb)
+            exact[~valid] = -np.inf
+            order = np.argsort(-exact, axis=1, kind="stable")[:, :top_k]
+        return np.take_along_axis(exact, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+    def _search(self, q_emb, top_k, selector):
+        if selector is None:
+            return self.index.search(q_emb, top_k)
+
+        try:
+            return self.index.search(q_emb, top_k, params=self._search_params(selector["sel"]))
+        except Exception:
+            # e.g. GPU indexes without selector support: over-fetch and filter afterwards
+            fetch_k = min(top_k + selector["excluded"], self.index.ntotal)
+            distances, indices = self.index.search(q_emb, fetch_k)
+            out_d = np.full((len(q_emb), top_k), np.inf, dtype=np.float32)
+            out_i = np.full((len(q_emb), top_k), -1, dtype=np.int64)
+            for qi in range(len(q_emb)):
+                ok = indices[qi] >= 0
+                ok[ok] = selector["mask"][indices[qi][ok]]
+                keep = np.flatnonzero(ok)[:top_k]
+                out_d[qi, :len(keep)] = distances[qi, keep]
+                out_i[qi, :len(keep)] = indices[qi, keep]
+            return out_d, out_i
+
+    def search(self, query_embeddings, top_k=5, return_distance=True):
+        distances, indices = self.search_ids(query_embeddings, top_k)
+
+        results_all = []
+        for qi in range(distances.shape[0]):
+            row = []
+            for pos, idx in enumerate(indices[qi]):
+                idx = int(idx)
+                if idx < 0 or idx >= len(self.chunk_texts):
+                    continue
+                score = float(distances[qi, pos])
+                row.append({
+                    "faiss_index": int(idx),
+                    "score": score,
+                    "chunk": self.chunk_texts[idx],
+                    "metadata": self.chunk_meta[idx]
+                })
+            results_all.append(row)
+        return results_all
+
+    LEGACY_FILES = ("meta.json", "chunks.txt")
+
+    def save(self, dirpath):
+        """Write the store into dirpath; every file is replaced by rename, never rewritten in place.
+
+        dirpath may be the directory this index was memory-mapped from: the mapped files stay valid
+        (for this process and any query worker) until they are closed.
+        """
+        os.makedirs(dirpath, exist_ok=True)
+        t0 = time.perf_counter()
+        idx_path = os.path.join(dirpath, "index.faiss")
+        try:
+            cpu_index_for_write = faiss.index_gpu_to_cpu(self.index) if self.use_gpu else self.index
+        except Exception:
+            cpu_index_for_write = self.index
+
+        faiss.write_index(cpu_index_for_write, idx_path + ".tmp")
+        os.replace(idx_path + ".tmp", idx_path)
+        emb_path = os.path.join(dirpath, "embeddings.npy")
+        if self._vectors is not None:
+            with atomic_write(emb_path) as f:
+                np.save(f, self._vectors)
+        elif os.path.exists(emb_path):
+            # the index file already holds these vectors
+            os.remove(emb_path)
+        if self.chunk_meta is not None:
+            self.chunk_meta.save(dirpath)
+        if self.chunk_texts is not None:
+            ChunkTextStore.save(
+                self.chunk_texts,
+                os.path.join(dirpath, "chunks.bin"),
+                os.path.join(dirpath, "chunk_offsets.npy"),
+            )
+        if self.bm25 is not None:
+            self.bm25.save(dirpath)
+        for name in self.LEGACY_FILES:
+            legacy_path = os.path.join(dirpath, name)
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+        with atomic_write(os.path.join(dirpath, "tombstones.json"), "w", encoding="utf-8") as f:
+            json.dump(sorted(self.tombstones), f)
+        with atomic_write(os.path.join(dirpath, "index_config.json"), "w", encoding="utf-8") as f:
+            json.dump(self._config(), f)
+
+        METRICS.observe("index.save", (time.perf_counter() - t0) * 1000)
+        if self.verbose:
+            print(f"[FAISS] Saved index+metadata to {dirpath}")
+
+    @classmethod
+    def exists(cls, dirpath):
+        return os.path.exists(os.path.join(dirpath, "index.faiss"))
+
+    def _mmap_flags(self):
+        """read_index flags that serve this index type from the file's pages, or None if faiss cannot."""
+        if self.index_type in ('ivf_flat', 'ivf_pq'):
+            # MMAP maps the inverted lists; combined with MMAP_IFC faiss rejects IVF files outright,
+            # and MMAP_IFC alone reads the lists into RAM
+            return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        # flat-code storage (flat, HNSW, SQ) is only mapped by MMAP_IFC (faiss >= 1.8)
+        return getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+
+    def _read_index(self, idx_path, mmap):
+        """(index, mapped): mapped is True only when the vectors/codes stay in the file's shared pages."""
+        flags = self._mmap_flags() if mmap else None
+        if flags is not None:
+            try:
+                return faiss.read_index(idx_path, flags), True
+            except Exception as e:
+                reason = str(e).strip().splitlines()[-1]
+        else:
+            reason = "not supported by this faiss version"
+        if mmap and self.verbose:
+            print(f"[FAISS] {self.index_type} index cannot be memory-mapped ({reason}); reading into RAM.",
+                  file=sys.stderr)
+        return faiss.read_index(idx_path), False
+
+    def load(self, dirpath, mmap=True):
+        """Load a saved index. With mmap=True the index and embeddings are shared read-only pages."""
+        idx_path = os.path.join(dirpath, "index.faiss")
+        if not os.path.exists(idx_path):
+            raise FileNotFoundError(f"No index.faiss found at {idx_path}")
+        t0 = time.perf_counter()
+
+        config_path = os.path.join(dirpath, "index_config.json")
+        if os.path.exists(config_path):
+            with open(config_path, "r", encoding="utf-8") as f:
+                for key, value in json.load(f).items():
+                    setattr(self, key, value)
+
+        index, self.read_only = self._read_index(idx_path, mmap)
+        self.index = index
+        self.dimension = index.d
+        self.set_search_params()
+
+        emb_path = os.path.join(dirpath, "embeddings.npy")
+        self._vectors = None
+        self._emb_buffer = None
+        if self.owns_vectors() and os.path.exists(emb_path):
+            self._vectors = np.load(emb_path, mmap_mode="r" if mmap else None)
+        elif self.owns_vectors():
+            # best effort for stores saved without raw vectors: decode the codes
+            self._vectors = self.embeddings
+
+        if os.path.exists(os.path.join(dirpath, "meta_columns.json")):
+            self.chunk_meta = ChunkMetaStore.load(dirpath, mmap=mmap)
+        elif os.path.exists(os.path.join(dirpath, "meta.json")):
+            with open(os.path.join(dirpath, "meta.json"), "r", encoding="utf-8") as f:
+                self.chunk_meta = ChunkMetaStore.from_dicts(json.load(f))
+
+        if os.path.exists(os.path.join(dirpath, "chunks.bin")):
+            self.chunk_texts = ChunkTextStore.load(
+                os.path.join(dirpath, "chunks.bin"),
+                os.path.join(dirpath, "chunk_offsets.npy"),
+                mmap=mmap,
+            )
+        elif os.path.exists(os.path.join(dirpath, "chunks.txt")):
+            with open(os.path.join(dirpath, "chunks.txt"), "r", encoding="utf-8") as f:
+                self.chunk_texts = [line.strip() for line in f]
+
+        self.bm25 = None
+        if self.lexical and BM25Index.exists(dirpath):
+            self.bm25 = BM25Index.load(dirpath, mmap=mmap)
+        elif self.lexical and self.chunk_texts is not None:
+            # stores saved before hybrid retrieval: index the texts once, persisted on the next save
+            self.bm25 = BM25Index.build(self.chunk_texts)
+
+        self.tombstones = set()
+        tomb_path = os.path.join(dirpath, "tombstones.json")
+        if os.path.exists(tomb_path):
+            with open(tomb_path, "r", encoding="utf-8") as f:
+                self.tombstones = set(json.load(f))
+        self.version += 1
+
+        METRICS.observe("index.load", (time.perf_counter() - t0) * 1000)
+        if self.verbose:
+            print(f"[FAISS] Loaded index from {dirpath}. Vectors={self.index.ntotal}, dim={self.dimension}, "
+                  f"{'memory-mapped' if self.read_only else 'in RAM'}")
+
+    def move_to_gpu(self, gpu_device=0):
+        if self.index is None:
+            raise Exception("No index to move. Build or load index first.")
+        try:
+            res = faiss.StandardGpuResources()
+            self.index = faiss.index_cpu_to_gpu(res, gpu_device, self.index)
+            self.use_gpu = True
+            self.gpu_device = gpu_device
+            print(f"[FAISS] Index moved to GPU:{gpu_device}")
+        except Exception as e:
+            raise RuntimeError(f"Failed to move FAISS index to GPU: {e}")
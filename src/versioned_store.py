@@ -0,0 +1,103 @@
+import os
+import re
+import shutil
+
+
+class VersionedStore:
+    """Immutable index versions under <root>/versions/, published by atomically replacing <root>/CURRENT.
+
+    A builder stages a copy of the live version, updates the copy and publishes it; query workers
+    memory-map whichever version CURRENT names and re-attach when it changes, so no reader ever sees a
+    half-written index and N workers share one set of page-cache pages instead of N private copies.
+    """
+
+    POINTER = "CURRENT"
+    VERSIONS = "versions"
+    _NAME_RE = re.compile(r"^v(\d{6})$")
+
+    def __init__(self, root, keep=3):
+        self.root = root
+        self.versions_dir = os.path.join(root, self.VERSIONS)
+        # published versions kept on disk; older ones are deleted (workers still mapping them keep their pages)
+        self.keep = keep
+
+    @classmethod
+    def is_versioned(cls, root):
+        return os.path.exists(os.path.join(root, cls.POINTER))
+
+    @classmethod
+    def resolve(cls, store_dir):
+        """Directory holding the index files: the current version of a versioned root, else store_dir itself."""
+        if not cls.is_versioned(store_dir):
+            return store_dir
+        store = cls(store_dir)
+        return store.path(store.current())
+
+    def current(self):
+        """Name of the published version, or None before the first publish."""
+        try:
+            with open(os.path.join(self.root, self.POINTER), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def path(self, name):
+        return os.path.join(self.versions_dir, name)
+
+    def versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir) if self._NAME_RE.match(name))
+
+    def stage(self):
+        """Create the next version directory as a copy of the current one (or of a legacy unversioned root).
+
+        Files are copied rather than hard-linked: index writers truncate files in place, which would
+        corrupt the version the workers are serving.
+        """
+        names = self.versions()
+        name = f"v{int(self._NAME_RE.match(names[-1]).group(1)) + 1 if names else 1:06d}"
+        target = self.path(name)
+
+        current = self.current()
+        if current is not None:
+            shutil.copytree(self.path(current), target)
+        else:
+            os.makedirs(target)
+            if os.path.isdir(self.root):
+                for entry in os.listdir(self.root):
+                    src = os.path.join(self.root, entry)
+                    if entry == self.VERSIONS:
+                        continue
+                    if os.path.isdir(src):
+                        shutil.copytree(src, os.path.join(target, entry))
+                    else:
+                        shutil.copy2(src, target)
+        return target
+
+    def publish(self, version_dir):
+        """Point CURRENT at a staged version (atomic rename), then prune old versions."""
+        name = os.path.basename(os.path.normpath(version_dir))
+        assert self._NAME_RE.match(name) and os.path.isdir(self.path(name)), f"not a staged version: {version_dir}"
+        tmp_path = os.path.join(self.root, self.POINTER + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(name + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.root, self.POINTER))
+        self.prune()
+        return name
+
+    def discard(self, version_dir):
+        """Drop a staged version that will not be published."""
+        shutil.rmtree(version_dir, ignore_errors=True)
+
+    def prune(self):
+        current = self.current()
+        names = self.versions()
+        if current not in names:
+            return
+        # versions newer than CURRENT are builds in progress; abandoned ones age out once a later one is published
+        published = names[:names.index(current) + 1]
+        for name in published[:-max(self.keep, 1)]:
+            shutil.rmtree(self.path(name), ignore_errors=True)
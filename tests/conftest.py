@@ -0,0 +1,105 @@
+import os
+import re
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# never reach for NLTK downloads or the HuggingFace hub from the tests
+os.environ.setdefault("RAG_OFFLINE", "1")
+
+from src import (  # noqa: E402
+    AnswerFormatter,
+    EmbeddingBackend,
+    EmbeddingGenerator,
+    PDFLoader,
+    RAGPipeline,
+    Retriever,
+    TextChunker,
+    VectorIndexFAISS,
+)
+
+DIM = 32
+
+
+class HashEncoder:
+    """Stub SentenceTransformer: normalized bag of hashed words, so texts sharing words land close."""
+
+    max_seq_length = 256
+
+    def __init__(self, fail_on=None):
+        # raise from encode() when a text contains this word (failure-path tests)
+        self.fail_on = fail_on
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, **kwargs):
+        out = np.zeros((len(texts), DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r"\w+", text.lower())
+            if self.fail_on is not None and self.fail_on in words:
+                raise RuntimeError(f"encoder failed on {self.fail_on!r}")
+            for word in words:
+                out[row, zlib.crc32(word.encode("utf-8")) % DIM] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms > 0, norms, 1.0)
+
+
+class TextLoader(PDFLoader):
+    """PDFLoader over plain-text files named *.pdf: same iteration and bookkeeping, no PDF parsing."""
+
+    def extract_text(self, pdf_path):
+        with open(pdf_path, "r", encoding="utf-8") as f:
+            return self.clean_text(f.read())
+
+
+def paper(topic, n_sentences=12):
+    """A small document whose sentences all mention topic."""
+    return " ".join(f"Sentence {i} explains how {topic} works in experiment {topic}{i}." for i in range(n_sentences))
+
+
+@pytest.fixture
+def stub_encoder(monkeypatch):
+    """Every EmbeddingGenerator (including the one RAGPipeline.from_store makes) gets a HashEncoder."""
+    encoder = HashEncoder()
+    monkeypatch.setattr(EmbeddingBackend, "load", staticmethod(lambda *args, **kwargs: encoder))
+    return encoder
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Write {name: text} as <tmp>/docs/<name>.pdf and return the paths in the same order."""
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+
+    def write(docs):
+        paths = []
+        for name, text in docs.items():
+            path = docs_dir / f"{name}.pdf"
+            path.write_text(text, encoding="utf-8")
+            paths.append(str(path))
+        return paths
+
+    return write
+
+
+@pytest.fixture
+def make_pipeline(stub_encoder):
+    def make(index=None, **pipeline_kw):
+        embedder = EmbeddingGenerator("stub-model", verbose=False)
+        index = index if index is not None else VectorIndexFAISS(verbose=False)
+        return RAGPipeline(
+            TextLoader(workers=1, verbose=False),
+            TextChunker(sentences_per_chunk=3, overlap_sentences=0, verbose=False),
+            embedder,
+            index,
+            Retriever(embedding_model=embedder.model, vector_index=index),
+            AnswerFormatter(),
+            verbose=False,
+            **pipeline_kw,
+        )
+
+    return make
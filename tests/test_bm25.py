@@ -0,0 +1,101 @@
+import numpy as np
+
+from src import BM25Index, Retriever, VectorIndexFAISS
+
+from test_vector_index import random_corpus
+
+WORDS = "policy reward critic actor buffer gradient entropy horizon rollout value".split()
+
+
+def random_texts(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(WORDS, size=rng.integers(1, 12))) for _ in range(n)]
+
+
+def test_incremental_adds_match_a_one_shot_build():
+    texts = random_texts(120)
+    once = BM25Index.build(texts)
+
+    index = BM25Index()
+    index.add(texts[:50])
+    assert len(index) == 50
+    index.scores("reward")  # merges the first batch
+    for start in range(50, 120, 10):
+        index.add(texts[start:start + 10])
+    assert len(index) == 120 and index.avg_len == once.avg_len
+
+    for query in ("reward critic", "entropy", "unknown words"):
+        np.testing.assert_array_equal(index.scores(query), once.scores(query))
+    for name in ("indptr", "doc_ids", "tf", "doc_len"):
+        np.testing.assert_array_equal(getattr(index, name), getattr(once, name))
+
+
+def test_add_defers_the_merge_to_the_next_read(tmp_path):
+    index = BM25Index.build(random_texts(20))
+    index.scores("policy")
+    doc_ids = index.doc_ids
+
+    index.add(["policy gradient"])
+    index.add(["value horizon"])
+    assert index.doc_ids is doc_ids
+    assert index.doc_freq("horizon") == BM25Index.build(random_texts(20) + ["value horizon"]).doc_freq("horizon")
+
+    index.add(["lagrangian actor"])
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+    assert len(loaded) == 23 and list(loaded.search(["lagrangian"], top_k=2)[1][0]) == [22, -1]
+
+
+def test_bm25_ranking():
+    index = BM25Index.build([
+        "policy gradient policy gradient with a learned critic",
+        "the critic estimates the value",
+        "a long survey " + "of reinforcement learning methods " * 10 + "mentioning the critic once",
+        "nothing relevant here",
+    ])
+    scores, ids = index.search(["critic"], top_k=4)
+    # shorter documents win for a single occurrence; stopwords and misses score nothing
+    assert list(ids[0]) == [1, 0, 2, -1]
+    assert scores[0, 3] == 0.0
+
+    _, ids = index.search(["policy critic"], top_k=2)
+    assert ids[0, 0] == 0
+
+    # a rare term outweighs a common one
+    assert index.scores("survey")[2] > index.scores("critic")[2]
+
+    allowed = np.array([True, False, True, True])
+    _, ids = index.search(["critic"], top_k=4, allowed_mask=allowed)
+    assert list(ids[0]) == [0, 2, -1, -1]
+
+
+class FixedEncoder:
+    """Query encoder that always returns one vector."""
+
+    def __init__(self, vector):
+        self.vector = vector
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        return np.repeat(self.vector[None, :], len(texts), axis=0)
+
+
+def test_hybrid_fusion_ranks_hits_from_both_lists_first():
+    vectors, texts, meta = random_corpus()
+    texts[0] = "chunk 0 zebra"
+    texts[7] = "zebra zebra"
+    vindex = VectorIndexFAISS(verbose=False)
+    vindex.build(vectors, texts, meta)
+    dense_order = np.argsort(((vectors - vectors[0]) ** 2).sum(axis=1))
+    assert 7 not in dense_order[:9]
+
+    def search(hybrid):
+        return Retriever(FixedEncoder(vectors[0]), vindex, top_k=3, hybrid=hybrid).search("zebra")
+
+    # chunk 0 leads both lists; the BM25-only hit (7) beats the second dense hit by rank
+    hits = search(hybrid=True)
+    assert [hit["metadata"]["chunk_id"] for hit in hits] == [0, 7, dense_order[1]]
+    assert hits[1]["distance"] is None and hits[1]["bm25"] > hits[0]["bm25"] > 0
+    assert hits[2]["bm25"] == 0.0
+
+    hits = search(hybrid=False)
+    assert [hit["metadata"]["chunk_id"] for hit in hits] == list(dense_order[:3])
@@ -0,0 +1,95 @@
+import zlib
+
+import numpy as np
+
+from src import AnswerFormatter, ChunkDeduplicator, ChunkMetaStore
+
+from conftest import paper
+
+BASE = ("the agent receives a sparse reward when the episode ends and the critic estimates the value of "
+        "each state from the replay buffer using temporal difference targets")
+
+
+def metas(*docs):
+    return [{"doc_id": d, "source": f"doc{d}.pdf", "section": "method", "chunk_id": i} for i, d in enumerate(docs)]
+
+
+def test_exact_and_near_duplicates_fold_into_the_first_copy():
+    chunks = [BASE, "Completely different text about transformers and attention heads in vision.",
+              BASE.upper() + "!", BASE.replace("sparse", "dense")]
+    dedup = ChunkDeduplicator(threshold=0.7, verbose=False)
+    kept, kept_meta = dedup.dedup(chunks, metas(0, 0, 0, 0))
+
+    assert kept == chunks[:2]
+    assert list(dedup.duplicate_of) == [-1, -1, 0, 0]
+    assert dedup.stats == {"chunks_in": 4, "exact_duplicates": 1, "near_duplicates": 1, "chunks_out": 2}
+    assert kept_meta[0]["also_in"] == [
+        {"source": "doc0.pdf", "section": "method", "chunk_id": 2},
+        {"source": "doc0.pdf", "section": "method", "chunk_id": 3},
+    ]
+    assert "also_in" not in kept_meta[1]
+
+
+def test_copies_in_other_documents_are_kept_per_document():
+    chunks = [BASE, BASE]
+    kept, _ = ChunkDeduplicator(verbose=False).dedup(chunks, metas(0, 1))
+    assert len(kept) == 2
+
+    kept, kept_meta = ChunkDeduplicator(per_document=False, verbose=False).dedup(chunks, metas(0, 1))
+    assert len(kept) == 1
+    assert kept_meta[0]["also_in"] == [{"source": "doc1.pdf", "section": "method", "chunk_id": 1}]
+
+
+def test_checksum_collisions_are_not_duplicates():
+    # same word count and the same crc32, but different texts
+    a, b = "nu xi eta xi theta alpha eps kappa", "eps delta delta iota gamma mu sigma delta"
+    assert zlib.crc32(a.encode()) == zlib.crc32(b.encode())
+
+    kept, _ = ChunkDeduplicator(verbose=False).dedup([a, b], metas(0, 0))
+    assert kept == [a, b]
+
+
+def test_back_references_are_records_not_strings(tmp_path):
+    chunks = [f"{paper(f'topic{i}', 3)}" for i in range(6)]
+    chunks += chunks  # every chunk duplicated once
+    dedup = ChunkDeduplicator(verbose=False)
+    _, meta = dedup.dedup(chunks, metas(*([0] * 12)))
+
+    assert meta.kinds["also_in"] == "records"
+    assert "also_in" not in meta.vocab
+    assert len(meta.records["also_in"]) == 6
+    assert meta.records["also_in"].vocab["source"] == ["doc0.pdf"]
+
+    meta.save(str(tmp_path))
+    loaded = ChunkMetaStore.load(str(tmp_path))
+    assert [m["also_in"] for m in loaded] == [m["also_in"] for m in meta]
+    assert loaded[4]["also_in"] == [{"source": "doc0.pdf", "section": "method", "chunk_id": 10}]
+
+    # compaction keeps only the records of surviving rows
+    taken = loaded.take(np.array([5, 1]))
+    assert len(taken.records["also_in"]) == 2
+    assert taken[0]["also_in"][0]["chunk_id"] == 11 and taken[1]["also_in"][0]["chunk_id"] == 7
+
+    # appending a store (a later batch) shifts its record offsets
+    taken.extend(loaded.take(np.array([2])))
+    assert taken[2]["also_in"][0]["chunk_id"] == 8
+
+
+def test_formatter_lists_every_copy():
+    meta = ChunkMetaStore.from_dicts([{"source": "a.pdf", "section": "intro", "chunk_id": 0,
+                                       "also_in": [{"source": "a.pdf", "section": "intro", "chunk_id": 4}]}])
+    results = [{"final_score": 1.0, "chunk": "text", "metadata": meta[0]}]
+    answer = AnswerFormatter().format_json("q", results)["answers"][0]
+    assert answer["also_in"] == [{"source": "a.pdf", "section": "intro", "chunk_id": 4}]
+    assert "Also in: a.pdf (section=intro, chunk=4)" in AnswerFormatter().format_pretty("q", results)
+
+
+def test_pipeline_drops_duplicate_chunks_before_embedding(make_pipeline, corpus):
+    text = paper("alpha", 6)
+    files = corpus({"a": text + " " + text})
+    pipeline = make_pipeline(deduplicator=ChunkDeduplicator(verbose=False))
+    pipeline.stream_build(files, batch_size=4)
+
+    assert pipeline.index.ntotal == 2
+    hit = pipeline.ask("how alpha works", top_k=1)["answers"][0]
+    assert hit["also_in"] and all(ref["source"] == files[0] for ref in hit["also_in"])
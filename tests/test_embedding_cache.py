@@ -0,0 +1,28 @@
+import numpy as np
+
+from src import EmbeddingGenerator
+
+
+def encode(cache_dir, texts, **kw):
+    embedder = EmbeddingGenerator("stub-model", cache_dir=str(cache_dir), verbose=False, **kw)
+    embedder.encode_chunks(texts, None)
+    return embedder
+
+
+def test_second_run_is_served_from_the_cache(stub_encoder, tmp_path):
+    texts = [f"chunk about topic {i}" for i in range(20)]
+    first = encode(tmp_path, texts)
+    assert (first.cache_hits, first.cache_misses) == (0, 20)
+
+    # a new generator (new process) reuses the persisted vectors; only the new text is encoded
+    second = encode(tmp_path, texts + ["a brand new chunk"])
+    assert (second.cache_hits, second.cache_misses) == (20, 1)
+    np.testing.assert_array_equal(second.embeddings[:20], first.embeddings)
+
+
+def test_cache_is_namespaced_by_model(stub_encoder, tmp_path):
+    texts = ["same text", "other text"]
+    encode(tmp_path, texts)
+    other = EmbeddingGenerator("another-model", cache_dir=str(tmp_path), verbose=False)
+    other.encode_chunks(texts, None)
+    assert other.cache_hits == 0
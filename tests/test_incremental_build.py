@@ -0,0 +1,94 @@
+import numpy as np
+
+from src import CorpusManifest, VectorIndexFAISS
+
+from conftest import paper
+
+
+def sources(vindex):
+    """Source file of every live chunk."""
+    return {vindex.chunk_meta[i]["source"] for i in range(vindex.ntotal) if i not in vindex.tombstones}
+
+
+def build(make_pipeline, store, files, **kw):
+    pipeline = make_pipeline()
+    result = pipeline.incremental_build(str(store), file_names=files, **kw)
+    return pipeline, result
+
+
+def test_first_build_then_nothing_to_do(make_pipeline, corpus, tmp_path):
+    store = tmp_path / "store"
+    files = corpus({"a": paper("alpha"), "b": paper("beta")})
+
+    pipeline, (added, changed, removed) = build(make_pipeline, store, files)
+    assert (sorted(added), changed, removed) == (sorted(files), [], [])
+    ntotal = pipeline.index.ntotal
+
+    pipeline, (added, changed, removed) = build(make_pipeline, store, files)
+    assert (added, changed, removed) == ([], [], [])
+    assert pipeline.index.ntotal == ntotal
+
+
+def test_add_change_and_remove_files(make_pipeline, corpus, tmp_path):
+    store = tmp_path / "store"
+    a, b, c = corpus({"a": paper("alpha"), "b": paper("beta"), "c": paper("gamma")})
+    build(make_pipeline, store, [a, b, c])
+
+    # b changes, c is removed, d is new
+    (d,) = corpus({"b": paper("delta"), "d": paper("epsilon")})[1:]
+    pipeline, (added, changed, removed) = build(make_pipeline, store, [a, b, d], compact_ratio=1.0)
+    assert (added, changed, removed) == ([d], [b], [c])
+
+    vindex = pipeline.index
+    assert sources(vindex) == {a, b, d}
+    assert vindex.tombstones
+    assert pipeline.ask("how delta works", top_k=1)["answers"][0]["source"] == b
+    answers = pipeline.ask("how gamma works", top_k=5)["answers"]
+    assert all(answer["source"] != c for answer in answers)
+
+    # the manifest points at exactly the live chunks of each file
+    manifest = CorpusManifest(str(store))
+    for path in (a, b, d):
+        ids = manifest.get_ids(path)
+        assert ids and all(vindex.chunk_meta[i]["source"] == path for i in ids)
+        assert not set(ids) & vindex.tombstones
+
+
+def test_compaction_drops_tombstones_and_remaps_the_manifest(make_pipeline, corpus, tmp_path):
+    store = tmp_path / "store"
+    files = corpus({f"doc{i}": paper(f"topic{i}") for i in range(4)})
+    build(make_pipeline, store, files)
+
+    # removing half the corpus crosses compact_ratio, so the saved index has no tombstones left
+    pipeline, (_, _, removed) = build(make_pipeline, store, files[2:], compact_ratio=0.3)
+    assert removed == files[:2]
+
+    vindex = pipeline.index
+    assert not vindex.tombstones
+    assert vindex.ntotal == vindex.num_live()
+    assert sources(vindex) == set(files[2:])
+
+    manifest = CorpusManifest(str(store))
+    ids = sorted(i for path in files[2:] for i in manifest.get_ids(path))
+    assert ids == list(range(vindex.ntotal))
+    for path in files[2:]:
+        assert {vindex.chunk_meta[i]["source"] for i in manifest.get_ids(path)} == {path}
+
+
+def test_compact_remap_and_search_skip_removed_rows():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype("float32")
+    meta = [{"doc_id": i // 10, "chunk_id": i} for i in range(50)]
+    vindex = VectorIndexFAISS(verbose=False)
+    vindex.build(vectors, [f"chunk {i}" for i in range(50)], meta)
+
+    vindex.tombstone(range(10, 20))
+    _, ids = vindex.search_ids(vectors[10:20], 3)
+    assert not set(ids.ravel()) & set(range(10, 20))
+
+    remap = vindex.compact()
+    assert list(remap[10:20]) == [-1] * 10
+    assert list(remap[20:25]) == [10, 11, 12, 13, 14]
+    assert vindex.ntotal == 40 and not vindex.tombstones
+    assert vindex.chunk_texts[10] == "chunk 20"
+    np.testing.assert_array_equal(vindex.embeddings[10], vectors[20])
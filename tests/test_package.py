@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+import types
+from unittest import mock
+
+import src
+from src import EmbeddingGenerator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_loads_no_heavy_modules():
+    script = (
+        "import json, sys; import src; "
+        "print(json.dumps([m for m in ('faiss', 'torch', 'sentence_transformers', 'pypdf', 'nltk') if m in sys.modules]))"
+    )
+    out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout) == []
+    assert out.stderr == ""
+
+
+def test_exports_stay_classes_after_their_modules_load():
+    import src.rag_pipeline  # noqa: F401  (imports retriever, vector_index_faiss, ... as submodules)
+    from src import Retriever, VectorIndexFAISS
+
+    assert isinstance(Retriever, type) and Retriever.__module__ == "src.retriever"
+    assert isinstance(VectorIndexFAISS, type)
+    assert src.Retriever is Retriever
+
+
+def test_submodules_are_modules():
+    import src.retriever as retriever
+
+    assert isinstance(retriever, types.ModuleType)
+    with mock.patch("src.retriever.METRICS") as metrics:
+        assert retriever.METRICS is metrics
+
+
+def test_embedding_generator_is_quiet_by_default(stub_encoder, capsys):
+    EmbeddingGenerator("stub-model")
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,64 @@
+import sys
+import types
+
+import pytest
+
+from src import PDFLoader
+
+
+class FakePage:
+    def __init__(self, log, path, i, text):
+        self.log, self.path, self.i, self.text = log, path, i, text
+
+    def extract_text(self):
+        self.log.append((self.path, self.i))
+        if self.text is None:
+            raise ValueError("broken page")
+        return self.text
+
+
+@pytest.fixture
+def fake_pdfs(monkeypatch):
+    """pypdf stand-in: {path: [page text or None for a broken page]}; returns the extraction log."""
+    docs, log = {}, []
+
+    class PdfReader:
+        def __init__(self, path):
+            self.pages = [FakePage(log, path, i, text) for i, text in enumerate(docs[path])]
+
+    monkeypatch.setitem(sys.modules, "pypdf", types.SimpleNamespace(PdfReader=PdfReader))
+    return docs, log
+
+
+def test_iter_pages_yields_each_page_before_extracting_the_next(fake_pdfs):
+    docs, log = fake_pdfs
+    docs["a.pdf"] = ["first page", "second page", "third page"]
+    docs["b.pdf"] = ["other"]
+
+    pages = PDFLoader(workers=1, verbose=False).iter_pages(["a.pdf", "b.pdf"])
+    assert next(pages) == ("a.pdf", 0, "first page")
+    assert log == [("a.pdf", 0)]
+    assert next(pages) == ("a.pdf", 1, "second page")
+    assert log == [("a.pdf", 0), ("a.pdf", 1)]
+    assert list(pages) == [("a.pdf", 2, "third page"), ("b.pdf", 0, "other")]
+
+
+def test_broken_pages_are_skipped(fake_pdfs, capsys):
+    docs, _ = fake_pdfs
+    docs["a.pdf"] = ["intro-\nduction text [12]", None, "results"]
+
+    loader = PDFLoader(workers=1, verbose=False)
+    assert [p for _, p, _ in loader.iter_pages(["a.pdf"])] == [0, 2]
+    assert loader.extract_text("a.pdf") == "introduction text results"
+    assert "Page 1 failed" in capsys.readouterr().out
+
+
+def test_load_documents_keeps_file_order(fake_pdfs):
+    docs, _ = fake_pdfs
+    docs["b.pdf"] = ["beta"]
+    docs["a.pdf"] = ["alpha", "more alpha"]
+
+    loader = PDFLoader(workers=1, verbose=False)
+    loader.file_names = ["b.pdf", "a.pdf"]
+    assert loader.load_documents() == ["beta", "alpha more alpha"]
+    assert list(loader.get_doc_map()) == ["b.pdf", "a.pdf"]
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from src import VectorIndexFAISS
+
+from test_vector_index import random_corpus
+
+INDEX_KW = {
+    "flat": {},
+    "hnsw": {},
+    "ivf_flat": {"nlist": 8, "nprobe": 8},
+    "ivf_pq": {"nlist": 8, "nprobe": 8, "pq_m": 4, "pq_nbits": 6},
+}
+
+
+@pytest.mark.parametrize("index_type", sorted(INDEX_KW))
+def test_save_then_mmap_load_keeps_results(index_type, tmp_path):
+    vectors, texts, meta = random_corpus(n=1000)
+    vindex = VectorIndexFAISS(index_type=index_type, verbose=False, **INDEX_KW[index_type])
+    vindex.build(vectors, texts, meta)
+    vindex.tombstone([0, 1, 2])
+    before = vindex.search_ids(vectors[:20], 5)
+    vindex.save(str(tmp_path))
+
+    loaded = VectorIndexFAISS(verbose=False)
+    loaded.load(str(tmp_path), mmap=True)
+    assert loaded.index_type == index_type
+    assert loaded.read_only, f"{index_type} index was read into RAM instead of memory-mapped"
+    assert loaded.tombstones == {0, 1, 2}
+    after = loaded.search_ids(vectors[:20], 5)
+    np.testing.assert_array_equal(before[1], after[1])
+    assert loaded.chunk_texts[7] == "chunk 7"
+    assert loaded.chunk_meta[7]["chunk_id"] == 7
+
+
+def test_mmap_loaded_index_is_read_only_and_ram_load_is_not(tmp_path):
+    vectors, texts, meta = random_corpus()
+    vindex = VectorIndexFAISS(verbose=False)
+    vindex.build(vectors, texts, meta)
+    vindex.save(str(tmp_path))
+
+    mapped = VectorIndexFAISS(verbose=False)
+    mapped.load(str(tmp_path))
+    with pytest.raises(AssertionError):
+        mapped.add(vectors[:1], ["x"], meta[:1])
+
+    in_ram = VectorIndexFAISS(verbose=False)
+    in_ram.load(str(tmp_path), mmap=False)
+    assert not in_ram.read_only
+    in_ram.add(vectors[:1], ["x"], meta[:1])
+    assert in_ram.ntotal == 201
+
+
+def test_mapped_ivf_vectors_can_be_reconstructed(tmp_path):
+    vectors, texts, meta = random_corpus(n=1000)
+    vindex = VectorIndexFAISS(index_type="ivf_flat", nlist=8, verbose=False)
+    vindex.build(vectors, texts, meta)
+    vindex.save(str(tmp_path))
+
+    loaded = VectorIndexFAISS(verbose=False)
+    loaded.load(str(tmp_path))
+    np.testing.assert_allclose(loaded.embeddings, vectors, rtol=1e-6)
+
+
+def test_mmapped_index_refuses_tombstones(tmp_path):
+    vectors, texts, meta = random_corpus()
+    vindex = VectorIndexFAISS(verbose=False)
+    vindex.build(vectors, texts, meta)
+    vindex.save(str(tmp_path))
+
+    mapped = VectorIndexFAISS(verbose=False)
+    mapped.load(str(tmp_path))
+    with pytest.raises(AssertionError, match="read-only"):
+        mapped.tombstone([1, 2])
+    assert not mapped.tombstones
+
+
+def test_save_over_the_store_a_reader_has_mapped(tmp_path):
+    vectors, texts, meta = random_corpus()
+    vindex = VectorIndexFAISS(verbose=False)
+    vindex.build(vectors, texts, meta)
+    vindex.save(str(tmp_path))
+
+    # a query worker keeps serving the mapped files while a writer updates the same directory
+    reader = VectorIndexFAISS(verbose=False)
+    reader.load(str(tmp_path))
+    writer = VectorIndexFAISS(verbose=False)
+    writer.load(str(tmp_path), mmap=False)
+    writer.tombstone([1, 2])
+    writer.add(vectors[:3] + 1.0, ["new 0", "new 1", "new 2"], meta[:3])
+    writer.compact()
+    writer.save(str(tmp_path))
+    # the mapped reader may also save its (unchanged) copy back over its own files
+    reader.save(str(tmp_path / "copy"))
+    reader.save(str(tmp_path))
+
+    assert reader.chunk_texts[1] == "chunk 1" and reader.chunk_meta[2]["chunk_id"] == 2
+    np.testing.assert_array_equal(reader.embeddings, vectors)
+    assert reader.search_ids(vectors[1:2], 1)[1][0, 0] == 1
+    assert not list(tmp_path.glob("*.tmp"))
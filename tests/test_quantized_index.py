@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from src import VectorIndexFAISS
+
+from test_vector_index import random_corpus
+
+
+def exact_top_k(vectors, queries, k):
+    d = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(-1)
+    return np.argsort(d, axis=1)[:, :k]
+
+
+@pytest.mark.parametrize("index_type", ["sq8", "sqfp16"])
+def test_rerank_restores_exact_order(index_type):
+    vectors, texts, meta = random_corpus(n=500, dim=16)
+    queries = vectors[:30] + 0.05
+    vindex = VectorIndexFAISS(index_type=index_type, rerank=True, rerank_factor=4, verbose=False)
+    vindex.build(vectors, texts, meta)
+
+    _, ids = vindex.search_ids(queries, 5)
+    np.testing.assert_array_equal(ids, exact_top_k(vectors, queries, 5))
+
+
+@pytest.mark.parametrize("index_type", ["sq8", "sqfp16"])
+def test_quantized_index_round_trip_is_mmapped(index_type, tmp_path):
+    vectors, texts, meta = random_corpus(n=500, dim=16)
+    vindex = VectorIndexFAISS(index_type=index_type, rerank=True, verbose=False)
+    vindex.build(vectors, texts, meta)
+    before = vindex.search_ids(vectors[:10], 5)
+    vindex.save(str(tmp_path))
+
+    loaded = VectorIndexFAISS(verbose=False)
+    loaded.load(str(tmp_path))
+    assert loaded.read_only and loaded.rerank
+    np.testing.assert_array_equal(loaded.search_ids(vectors[:10], 5)[1], before[1])
+
+
+def test_float16_storage_keeps_vectors_close():
+    vectors, texts, meta = random_corpus(n=100, dim=16)
+    vindex = VectorIndexFAISS(index_type="sq8", rerank=True, vector_dtype="float16", verbose=False)
+    vindex.build(vectors, texts, meta)
+
+    assert vindex.embeddings.dtype == np.float16
+    np.testing.assert_allclose(vindex.embeddings.astype(np.float32), vectors, atol=1e-2)
@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+import pytest
+
+from src import QueryService, RAGPipeline, ShardedVectorIndex, VersionedStore
+
+from conftest import paper
+
+
+def publish_build(make_pipeline, root, files, index=None):
+    """One `build --versioned` run: update a staged copy of the live version, then publish it."""
+    versions = VersionedStore(str(root))
+    staged = versions.stage()
+    make_pipeline(index).incremental_build(staged, file_names=files)
+    return versions.publish(staged)
+
+
+def test_publish_keeps_the_newest_versions(make_pipeline, corpus, tmp_path):
+    root = tmp_path / "store"
+    names = [publish_build(make_pipeline, root, corpus({f"doc{i}": paper(f"topic{i}")})) for i in range(4)]
+
+    versions = VersionedStore(str(root))
+    assert names == ["v000001", "v000002", "v000003", "v000004"]
+    assert versions.current() == "v000004"
+    assert versions.versions() == ["v000002", "v000003", "v000004"]
+    assert VersionedStore.resolve(str(root)) == versions.path("v000004")
+
+
+def test_refresh_index_swaps_to_the_published_version(make_pipeline, corpus, stub_encoder, tmp_path):
+    root = tmp_path / "store"
+    files = corpus({"alpha": paper("alpha")})
+    publish_build(make_pipeline, root, files)
+
+    pipeline = RAGPipeline.from_store(str(root))
+    assert pipeline.store_version == "v000001"
+    assert pipeline.index.read_only
+    assert not pipeline.refresh_index()
+
+    publish_build(make_pipeline, root, files + corpus({"beta": paper("beta")}))
+    assert pipeline.pending_version() == "v000002"
+    assert pipeline.refresh_index()
+    assert pipeline.store_version == "v000002"
+    assert pipeline.index.read_only
+    assert pipeline.ask("how beta works", top_k=1)["answers"][0]["source"].endswith("beta.pdf")
+
+
+def test_service_reports_whether_the_index_is_mmapped(make_pipeline, corpus, stub_encoder, tmp_path):
+    root = tmp_path / "store"
+    publish_build(make_pipeline, root, corpus({"alpha": paper("alpha")}))
+
+    mapped = QueryService(RAGPipeline.from_store(str(root)))
+    assert mapped.stats()["index_mmapped"] is True
+    in_ram = QueryService(RAGPipeline.from_store(str(root), mmap=False))
+    assert in_ram.stats()["index_mmapped"] is False
+
+
+def test_sharded_index_is_mmapped_only_when_every_shard_is(make_pipeline, corpus, stub_encoder, tmp_path):
+    root = tmp_path / "store"
+    files = corpus({f"doc{i}": paper(f"topic{i}") for i in range(3)})
+    publish_build(make_pipeline, root, files, index=ShardedVectorIndex(shard_size=5, verbose=False))
+
+    pipeline = RAGPipeline.from_store(str(root))
+    assert isinstance(pipeline.index, ShardedVectorIndex) and len(pipeline.index.shards) > 1
+    assert pipeline.index.read_only
+    assert not RAGPipeline.load_index(VersionedStore.resolve(str(root)), mmap=False).read_only
+
+
+async def _exchange(service, raw_requests):
+    """Send each raw HTTP request on its own connection; [(status, payload)] in order."""
+    service.queue = asyncio.Queue()
+    batcher = asyncio.create_task(service._batcher())
+    server = await asyncio.start_server(service._handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    replies = []
+    try:
+        async with server:
+            for raw in raw_requests:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(raw)
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+                head, _, body = response.partition(b"\r\n\r\n")
+                replies.append((int(head.split()[1]), json.loads(body)))
+    finally:
+        batcher.cancel()
+    return replies
+
+
+def exchange(service, *raw_requests):
+    return asyncio.run(_exchange(service, raw_requests))
+
+
+def post_query(payload):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+    return b"POST /query HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+
+
+@pytest.fixture
+def service(make_pipeline, corpus, stub_encoder, tmp_path):
+    root = tmp_path / "store"
+    publish_build(make_pipeline, root, corpus({"alpha": paper("alpha"), "beta": paper("beta")}))
+    return QueryService(RAGPipeline.from_store(str(root)), max_wait_ms=1.0)
+
+
+def test_health_route_includes_mmap_state(service):
+    ((status, health),) = exchange(service, b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n")
+    assert status == 200 and health["status"] == "ok"
+    assert health["index_mmapped"] is True
+    assert health["store_version"] == "v000001"
+
+
+def test_query_route_answers(service):
+    ((status, answer),) = exchange(service, post_query({"query": "how beta works", "top_k": 2}))
+    assert status == 200
+    assert len(answer["answers"]) == 2
+    assert answer["answers"][0]["source"].endswith("beta.pdf")
+
+
+@pytest.mark.parametrize("raw", [
+    b"GARBAGE\r\n\r\n",
+    b"GET /health\r\n\r\n",
+    b"POST /query HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+    post_query(b"not json"),
+    post_query([1]),
+    post_query("just a string"),
+    post_query({"top_k": 3}),
+    post_query({"query": "   "}),
+    post_query({"query": "alpha", "top_k": "abc"}),
+    post_query({"query": "alpha", "top_k": 0}),
+    post_query({"query": "alpha", "top_k": -1}),
+    post_query({"query": "alpha", "top_k": 2.5}),
+    post_query({"query": "alpha", "top_k": True}),
+])
+def test_malformed_requests_get_400(service, raw):
+    ((status, payload),) = exchange(service, raw)
+    assert status == 400
+    assert payload["error"].startswith("bad request")
+
+
+def test_bad_request_does_not_fail_its_batch(service):
+    replies = exchange(service, post_query({"query": "alpha", "top_k": -1}),
+                       post_query({"query": "how alpha works"}))
+    assert [status for status, _ in replies] == [400, 200]
+    assert service.errors == 0
@@ -0,0 +1,108 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from src import Retriever, VectorIndexFAISS
+
+from conftest import paper
+from test_bm25 import FixedEncoder
+from test_vector_index import random_corpus
+
+
+def nearest_corpus(n_hidden):
+    """Random corpus, its ids by distance to the query vector (vector 0) and the n_hidden nearest."""
+    vectors, texts, meta = random_corpus()
+    order = np.argsort(((vectors - vectors[0]) ** 2).sum(axis=1))
+    return vectors, texts, meta, order, set(order[:n_hidden].tolist())
+
+
+def chunk_ids(hits):
+    return [hit["metadata"]["chunk_id"] for hit in hits]
+
+
+def test_skipped_sections_are_filtered_before_the_search():
+    # more hidden neighbours than the candidate pool (top_k * candidate_factor = 15)
+    vectors, texts, meta, order, hidden = nearest_corpus(40)
+    for i in hidden:
+        meta[i]["section"] = "references"
+    vindex = VectorIndexFAISS(verbose=False)
+    vindex.build(vectors, texts, meta)
+
+    hits = Retriever(FixedEncoder(vectors[0]), vindex, top_k=5, hybrid=False).search("query")
+    assert chunk_ids(hits) == order[40:45].tolist()
+
+
+def test_tombstoned_chunks_are_never_returned():
+    vectors, texts, meta, order, hidden = nearest_corpus(30)
+    for i in hidden:
+        texts[i] = "zebra zebra zebra"
+    vindex = VectorIndexFAISS(verbose=False)
+    vindex.build(vectors, texts, meta)
+    retriever = Retriever(FixedEncoder(vectors[0]), vindex, top_k=5)
+    assert set(chunk_ids(retriever.search("zebra"))) <= hidden
+
+    vindex.tombstone(hidden)
+    # neither the dense nor the BM25 list brings them back, and the cached answer is dropped
+    hits = retriever.search("zebra")
+    assert len(hits) == 5 and not set(chunk_ids(hits)) & hidden
+    assert all(hit["bm25"] == 0.0 for hit in hits)
+
+    retriever.hybrid = False
+    assert chunk_ids(retriever.search("zebra", top_k=4)) == order[30:34].tolist()
+
+
+QUERIES = ["how alpha works", "experiment beta3", "How  ALPHA works", "gamma delta", "experiment gamma7"]
+
+
+def built_pipeline(make_pipeline, corpus):
+    files = corpus({"a": paper("alpha"), "b": paper("beta"), "c": paper("gamma")})
+    pipeline = make_pipeline()
+    pipeline.stream_build(files, batch_size=4)
+    return pipeline
+
+
+@pytest.mark.parametrize("hybrid", [True, False])
+def test_batched_search_matches_single_queries(make_pipeline, corpus, stub_encoder, hybrid):
+    pipeline = built_pipeline(make_pipeline, corpus)
+    retriever = Retriever(stub_encoder, pipeline.index, hybrid=hybrid, cache_size=0)
+
+    singles = [retriever.search(q, top_k=4) for q in QUERIES]
+    with mock.patch.object(stub_encoder, "encode", wraps=stub_encoder.encode) as encode:
+        batched = retriever.search_batch(QUERIES, top_k=4)
+    # one encoder call for the whole batch
+    assert encode.call_count == 1
+    assert batched == singles
+    assert batched[0] == batched[2]  # the same query after normalization
+
+    assert pipeline.ask_batch(QUERIES, top_k=2) == [pipeline.ask(q, top_k=2) for q in QUERIES]
+    assert retriever.search_batch([]) == []
+
+
+def test_cached_results_are_dropped_when_the_index_changes(make_pipeline, corpus, stub_encoder):
+    pipeline = built_pipeline(make_pipeline, corpus)
+    retriever = pipeline.retriever
+    first = retriever.search("how alpha works", top_k=3)
+
+    with mock.patch.object(stub_encoder, "encode", wraps=stub_encoder.encode) as encode:
+        assert retriever.search("How alpha  works", top_k=3) == first
+        assert retriever.cache_stats()["result"]["hits"] == 1
+
+        # a new index version misses the result cache but still reuses the query embedding
+        top_id = pipeline.index.chunk_texts[:].index(first[0]["chunk"])
+        pipeline.index.tombstone([top_id])
+        second = retriever.search("how alpha works", top_k=3)
+        assert encode.call_count == 0
+    assert retriever.cache_stats()["result"]["hits"] == 1
+    assert [hit["chunk"] for hit in second[:2]] == [hit["chunk"] for hit in first[1:]]
+
+    # a different top_k is a different entry
+    assert len(retriever.search("how alpha works", top_k=2)) == 2
+    assert retriever.cache_stats()["result"]["hits"] == 1
+
+    other = VectorIndexFAISS(verbose=False)
+    index = pipeline.index
+    other.build(index.embeddings[:3].copy(), index.chunk_texts[:3], index.chunk_meta.take(range(3)))
+    retriever.set_index(other)
+    assert {hit["chunk"] for hit in retriever.search("how alpha works", top_k=3)} <= set(index.chunk_texts[:3])
+    assert retriever.cache_stats()["result"]["entries"] == 1
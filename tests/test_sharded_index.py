@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src import ShardedVectorIndex, VectorIndexFAISS
+
+from test_vector_index import random_corpus
+
+
+def sharded(vectors, texts, meta, shard_size=64):
+    vindex = ShardedVectorIndex(shard_size=shard_size, workers=2, verbose=False)
+    vindex.build(vectors, texts, meta)
+    return vindex
+
+
+def test_fan_out_search_matches_a_single_index():
+    vectors, texts, meta = random_corpus()
+    flat = VectorIndexFAISS(verbose=False)
+    flat.build(vectors, texts, meta)
+    shards = sharded(vectors, texts, meta)
+    assert len(shards.shards) == 4
+
+    queries = vectors[::7] + 0.01
+    np.testing.assert_array_equal(shards.search_ids(queries, 5)[1], flat.search_ids(queries, 5)[1])
+    assert shards.chunk_texts[130] == "chunk 130" and shards.chunk_meta[130]["chunk_id"] == 130
+
+
+def test_mapped_shards_refuse_tombstones(tmp_path):
+    vectors, texts, meta = random_corpus()
+    sharded(vectors, texts, meta).save(str(tmp_path))
+
+    mapped = ShardedVectorIndex(verbose=False)
+    mapped.load(str(tmp_path))
+    assert mapped.read_only
+    with pytest.raises(AssertionError, match="read-only"):
+        mapped.tombstone([1, 70, 150])
+    assert not mapped.tombstones
+
+    # new rows go to an in-RAM shard, but a delete that also touches a mapped shard is refused whole
+    mapped.add(vectors[:2], ["new 0", "new 1"], meta[:2])
+    assert not mapped.shards[-1].read_only
+    with pytest.raises(AssertionError, match="read-only"):
+        mapped.tombstone([mapped.ntotal - 1, 1])
+    assert not mapped.tombstones
+    mapped.tombstone([mapped.ntotal - 1])
+    assert mapped.tombstones == {mapped.ntotal - 1}
+
+
+def test_save_over_shards_a_reader_has_mapped(tmp_path):
+    vectors, texts, meta = random_corpus()
+    sharded(vectors, texts, meta).save(str(tmp_path))
+
+    reader = ShardedVectorIndex(verbose=False)
+    reader.load(str(tmp_path))
+    writer = ShardedVectorIndex(verbose=False)
+    writer.load(str(tmp_path), mmap=False)
+    writer.tombstone([1, 70, 150])
+    writer.save(str(tmp_path))
+    remap = writer.compact()
+    writer.save(str(tmp_path))
+
+    assert remap[70] == -1 and writer.ntotal == 197
+    assert reader.chunk_texts[70] == "chunk 70"
+    assert reader.search_ids(vectors[70:71], 1)[1][0, 0] == 70
+
+    reloaded = ShardedVectorIndex(verbose=False)
+    reloaded.load(str(tmp_path))
+    assert reloaded.ntotal == 197 and not reloaded.tombstones
+    assert reloaded.chunk_texts[int(remap[71])] == "chunk 71"
@@ -0,0 +1,48 @@
+import json
+
+import numpy as np
+
+from src import RAGPipeline, ShardedVectorIndex, VectorIndexFAISS
+from src.__main__ import main
+
+from conftest import paper
+
+QUERIES = ["how alpha works", "experiment beta3", "how gamma works in experiment"]
+
+
+def built_store(make_pipeline, corpus, tmp_path, index=None):
+    files = corpus({"a": paper("alpha"), "b": paper("beta"), "c": paper("gamma")})
+    pipeline = make_pipeline(index)
+    pipeline.incremental_build(str(tmp_path / "store"), file_names=files)
+    return pipeline, str(tmp_path / "store")
+
+
+def test_from_store_answers_like_the_built_pipeline(make_pipeline, corpus, stub_encoder, tmp_path):
+    built, store = built_store(make_pipeline, corpus, tmp_path, VectorIndexFAISS(metric="cosine", verbose=False))
+
+    served = RAGPipeline.from_store(store)
+    assert served.embedder.model_name == "stub-model"
+    assert served.store_version is None
+    assert served.index.metric == "cosine"
+    assert served.index.ntotal == built.index.ntotal
+    assert served.index.chunk_texts[:] == built.index.chunk_texts[:]
+    np.testing.assert_allclose(served.index.embeddings, built.index.embeddings)
+    assert served.ask_batch(QUERIES, top_k=3) == built.ask_batch(QUERIES, top_k=3)
+
+
+def test_sharded_store_round_trip(make_pipeline, corpus, stub_encoder, tmp_path):
+    built, store = built_store(make_pipeline, corpus, tmp_path, ShardedVectorIndex(shard_size=4, verbose=False))
+
+    served = RAGPipeline.from_store(store)
+    assert isinstance(served.index, ShardedVectorIndex)
+    assert len(served.index.shards) == len(built.index.shards) > 1
+    assert served.ask_batch(QUERIES, top_k=3) == built.ask_batch(QUERIES, top_k=3)
+
+
+def test_cli_query_reads_the_saved_store(make_pipeline, corpus, stub_encoder, tmp_path, capsys):
+    built, store = built_store(make_pipeline, corpus, tmp_path)
+
+    main(["query", "how beta works", "--store", store, "--top-k", "2"])
+    answer = json.loads(capsys.readouterr().out)
+    assert answer == built.ask("how beta works", top_k=2)
+    assert answer["answers"][0]["source"].endswith("b.pdf")
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src import EmbeddingCache, EmbeddingGenerator
+
+from conftest import TextLoader, paper
+
+
+def run_bounded(fn, timeout=30):
+    """Run fn in a thread; a hang fails the test instead of the whole run."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["value"] = fn()
+        except BaseException as e:
+            outcome["error"] = e
+
+    t = threading.Thread(target=target, daemon=True)
+    t.start()
+    t.join(timeout)
+    assert not t.is_alive(), f"did not return within {timeout}s (deadlocked stages?)"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+
+def test_stream_build_matches_phased_build(make_pipeline, corpus):
+    files = corpus({f"doc{i}": paper(f"topic{i}") for i in range(4)})
+
+    streamed = make_pipeline()
+    ids_by_file = run_bounded(lambda: streamed.stream_build(files, queue_size=1, batch_size=2))
+
+    phased = make_pipeline()
+    phased.load_pdfs(files)
+    phased.make_chunks()
+    phased.embed()
+    phased.build_faiss()
+
+    assert streamed.index.ntotal == phased.index.ntotal
+    assert sorted(i for ids in ids_by_file.values() for i in ids) == list(range(streamed.index.ntotal))
+    hit = streamed.ask("how topic2 works", top_k=1)["answers"][0]
+    assert hit["source"].endswith("doc2.pdf")
+
+
+def slow_extract(monkeypatch, seconds=0.2):
+    extract = TextLoader.extract_text
+
+    def slow(self, pdf_path):
+        time.sleep(seconds)
+        return extract(self, pdf_path)
+
+    monkeypatch.setattr(TextLoader, "extract_text", slow)
+
+
+def test_embed_failure_is_raised_not_deadlocked(make_pipeline, corpus, stub_encoder, monkeypatch):
+    # the embed stage fails on the second document while the chunk stage waits for the next extraction
+    files = corpus({f"doc{i}": paper("poison" if i == 1 else f"topic{i}") for i in range(5)})
+    stub_encoder.fail_on = "poison"
+    slow_extract(monkeypatch)
+
+    pipeline = make_pipeline()
+    with pytest.raises(RuntimeError, match="poison"):
+        run_bounded(lambda: pipeline.stream_build(files, queue_size=1, batch_size=2))
+
+
+def test_extract_failure_is_raised(make_pipeline, corpus):
+    files = corpus({f"doc{i}": paper(f"topic{i}") for i in range(3)}) + ["/nonexistent/missing.pdf"]
+
+    pipeline = make_pipeline()
+    with pytest.raises(FileNotFoundError):
+        run_bounded(lambda: pipeline.stream_build(files, queue_size=1, batch_size=2))
+
+
+def test_index_failure_stops_the_producers(make_pipeline, corpus, monkeypatch):
+    files = corpus({f"doc{i}": paper(f"topic{i}", n_sentences=30) for i in range(6)})
+    pipeline = make_pipeline()
+
+    def broken_build(*args, **kwargs):
+        raise ValueError("index stage failed")
+
+    monkeypatch.setattr(pipeline.index, "build", broken_build)
+    with pytest.raises(ValueError, match="index stage failed"):
+        run_bounded(lambda: pipeline.stream_build(files, queue_size=1, batch_size=2))
+    assert not any(t.name.startswith("build-") and t.is_alive() for t in threading.enumerate())
+
+
+def test_stream_build_ids_cover_each_file(make_pipeline, corpus):
+    files = corpus({"a": paper("alpha"), "b": paper("beta")})
+    pipeline = make_pipeline()
+    ids_by_file = run_bounded(lambda: pipeline.stream_build(files, batch_size=3))
+
+    doc_ids = np.asarray(pipeline.index.chunk_meta.column("doc_id"))
+    for doc_id, path in enumerate(files):
+        assert set(np.flatnonzero(doc_ids == doc_id)) == set(ids_by_file[path])
+
+
+def cached_pipeline(make_pipeline, tmp_path, monkeypatch):
+    pipeline = make_pipeline()
+    pipeline.embedder.cache = EmbeddingCache(str(tmp_path / "cache"), "stub-model")
+    flushes = []
+    flush = EmbeddingCache.flush
+    monkeypatch.setattr(EmbeddingCache, "flush", lambda self: (flushes.append(len(self)), flush(self))[1])
+    return pipeline, flushes
+
+
+def test_streamed_batches_flush_the_cache_once(make_pipeline, corpus, tmp_path, monkeypatch):
+    files = corpus({f"doc{i}": paper(f"topic{i}", n_sentences=30) for i in range(4)})
+    pipeline, flushes = cached_pipeline(make_pipeline, tmp_path, monkeypatch)
+    run_bounded(lambda: pipeline.stream_build(files, batch_size=2))
+
+    assert pipeline.index.ntotal == 40
+    assert flushes == [40]
+    again = EmbeddingGenerator("stub-model", cache_dir=str(tmp_path / "cache"))
+    again.encode_chunks(list(pipeline.index.chunk_texts), None)
+    assert again.cache_misses == 0
+
+
+def test_cache_is_flushed_when_a_later_batch_fails(make_pipeline, corpus, stub_encoder, tmp_path, monkeypatch):
+    files = corpus({"doc0": paper("topic0"), "doc1": paper("poison")})
+    stub_encoder.fail_on = "poison"
+    pipeline, flushes = cached_pipeline(make_pipeline, tmp_path, monkeypatch)
+    with pytest.raises(RuntimeError, match="poison"):
+        run_bounded(lambda: pipeline.stream_build(files, batch_size=2))
+    assert flushes == [4]
@@ -0,0 +1,81 @@
+from src import EmbeddingBackend, EmbeddingGenerator, TextChunker
+
+from conftest import HashEncoder, paper
+
+PAPER = (
+    "Deep Policies for Control. Abstract We study agents. The results in Table 3 Results are strong. "
+    "1 Introduction Prior work is discussed in Section 2 Background and in the Appendix. "
+    "Agents learn from sparse rewards. 2 Background Q-learning is old 3.1 Method We use PPO "
+    "with a learned critic. It works well. References Sutton and Barto. Appendix A. Proofs follow."
+)
+
+
+def test_headings_and_sentences_per_section():
+    chunker = TextChunker(sentences_per_chunk=2, overlap_sentences=0, verbose=False)
+    spans = chunker._section_boundaries(PAPER)
+    sections = dict(zip([name for name, _, _ in spans], chunker._sentences_by_section(PAPER, spans)))
+
+    # "Table 3 Results", "Section 2 Background" and "in the Appendix" only refer to headings
+    assert sections == {
+        "preface": ["Deep Policies for Control."],
+        "abstract": ["Abstract We study agents.", "The results in Table 3 Results are strong."],
+        "introduction": ["1 Introduction Prior work is discussed in Section 2 Background and in the Appendix.",
+                         "Agents learn from sparse rewards."],
+        # a heading inside a sentence still ends it
+        "background": ["2 Background Q-learning is old"],
+        "method": ["3.1 Method We use PPO with a learned critic.", "It works well."],
+        "references": ["References Sutton and Barto."],
+        "appendix": ["Appendix A. Proofs follow."],
+    }
+
+
+def test_chunks_never_cross_sections():
+    chunker = TextChunker(sentences_per_chunk=2, overlap_sentences=0, verbose=False)
+    chunks = chunker.process_documents({"paper.pdf": PAPER})
+    meta = chunker.get_chunk_meta()
+
+    assert [m["section"] for m in meta] == ["preface", "abstract", "introduction", "background", "method",
+                                             "references", "appendix"]
+    assert chunks[2] == ("1 Introduction Prior work is discussed in Section 2 Background and in the Appendix. "
+                         "Agents learn from sparse rewards.")
+    assert [m["chunk_id"] for m in meta] == list(range(7))
+    assert (meta[4]["sentence_start"], meta[4]["sentence_end"]) == (0, 2)
+
+
+def test_text_without_headings_is_one_body_section():
+    chunker = TextChunker(sentences_per_chunk=3, overlap_sentences=0, verbose=False)
+    chunks = chunker.process_documents({"notes.pdf": "One. Two. Three. Four. Five."}, doc_id_start=4)
+    meta = chunker.get_chunk_meta()
+
+    assert chunks == ["One. Two. Three.", "Four. Five."]
+    assert {m["section"] for m in meta} == {"body"} and {m["doc_id"] for m in meta} == {4}
+
+
+class WordPieceEncoder(HashEncoder):
+    """HashEncoder with a tokenizer: one piece per 4 characters of each word, 16 pieces per sequence."""
+
+    max_seq_length = 18
+
+    def tokenizer(self, texts, add_special_tokens=True, **kwargs):
+        return {"input_ids": [[0] * sum(-(-len(w) // 4) for w in text.split()) for text in texts]}
+
+
+def test_chunks_fit_the_embedder_token_budget(monkeypatch):
+    monkeypatch.setattr(EmbeddingBackend, "load", staticmethod(lambda *args, **kwargs: WordPieceEncoder()))
+    embedder = EmbeddingGenerator("stub-model", verbose=False)
+    assert embedder.token_budget() == 16
+
+    long_sentence = "An unusually long sentence " + "with many interchangeable qualifiers " * 6 + "ends here."
+    text = "1 Introduction " + paper("alpha", 5) + " " + long_sentence + " 2 Method " + paper("beta", 4)
+    chunker = TextChunker.for_embedder(embedder, overlap_tokens=4, verbose=False)
+    chunks = chunker.process_documents({"paper.pdf": text})
+    meta = chunker.get_chunk_meta()
+
+    counts = embedder.count_tokens(chunks)
+    assert max(counts) <= 16
+    assert [m["n_tokens"] for m in meta] == counts
+    assert {m["section"] for m in meta} == {"introduction", "method"}
+    # the over-long sentence is cut into word windows, in order, with nothing lost
+    pieces = [c for c, m in zip(chunks, meta) if m["sentence_start"] == m["sentence_end"] - 1 == 5]
+    assert len(pieces) > 1
+    assert " ".join(pieces).split() == long_sentence.split()
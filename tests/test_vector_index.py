@@ -0,0 +1,78 @@
+import numpy as np
+
+from src import Benchmark, ChunkMetaStore, VectorIndexFAISS
+
+from conftest import paper
+
+
+def random_corpus(n=200, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype("float32")
+    texts = [f"chunk {i}" for i in range(n)]
+    meta = [{"doc_id": i % 3, "chunk_id": i, "section": "method"} for i in range(n)]
+    return vectors, texts, meta
+
+
+def test_build_copies_caller_texts_and_meta():
+    vectors, texts, meta = random_corpus()
+    meta_store = ChunkMetaStore.from_dicts(meta)
+    vindex = VectorIndexFAISS(verbose=False)
+    vindex.build(vectors, texts, meta_store)
+
+    vindex.add(vectors[:5], ["extra"] * 5, meta[:5])
+    assert len(texts) == 200
+    assert len(meta_store) == 200
+    assert vindex.ntotal == len(vindex.chunk_texts) == len(vindex.chunk_meta) == 205
+
+
+def test_flat_embeddings_are_a_read_only_view_of_the_index():
+    vectors, texts, meta = random_corpus()
+    vindex = VectorIndexFAISS(verbose=False)
+    vindex.build(vectors, texts, meta)
+
+    emb = vindex.embeddings
+    assert not emb.flags.writeable
+    np.testing.assert_array_equal(emb, vectors)
+    assert vindex._vectors is None
+
+
+def test_pipeline_stages_reports_indexed_chunks(make_pipeline, corpus, tmp_path):
+    corpus({"a": paper("alpha"), "b": paper("beta")})
+    pipeline = make_pipeline()
+
+    bench = Benchmark(data_dir=str(tmp_path / "docs"), verbose=False)
+    bench.pipeline_stages(pipeline, trace_memory=False)
+
+    info = bench.results["pipeline_stages"]
+    assert info["num_documents"] == 2
+    assert info["num_chunks"] == pipeline.index.ntotal > 0
+
+
+def test_pq_index_keeps_no_raw_copy_unless_asked(tmp_path):
+    vectors, texts, meta = random_corpus(n=1000)
+    pq_kw = dict(index_type="ivf_pq", nlist=8, nprobe=8, pq_m=4, pq_nbits=6, verbose=False)
+
+    vindex = VectorIndexFAISS(**pq_kw)
+    vindex.build(vectors, texts, meta)
+    assert vindex._vectors is None
+    vindex.save(str(tmp_path / "codes"))
+    assert not (tmp_path / "codes" / "embeddings.npy").exists()
+
+    # compaction retrains on vectors decoded from the PQ codes
+    vindex = VectorIndexFAISS(verbose=False)
+    vindex.load(str(tmp_path / "codes"), mmap=False)
+    vindex.tombstone(range(100))
+    vindex.compact()
+    assert vindex.ntotal == 900 and vindex._vectors is None
+    hits = vindex.search_ids(vectors[100:150], 10)[1]
+    assert np.mean([q in row for q, row in enumerate(hits)]) > 0.8
+
+    exact = VectorIndexFAISS(exact_compaction=True, **pq_kw)
+    exact.build(vectors, texts, meta)
+    np.testing.assert_array_equal(exact.embeddings, vectors)
+    exact.save(str(tmp_path / "exact"))
+    assert (tmp_path / "exact" / "embeddings.npy").exists()
+    exact.load(str(tmp_path / "exact"), mmap=False)
+    exact.tombstone(range(100))
+    exact.compact()
+    np.testing.assert_array_equal(exact.embeddings, vectors[100:])